@@ -0,0 +1,65 @@
+"""Precomputed unit-circle tables shared by the HUD and procedural meshes.
+
+Everything here is plain NumPy so it can be used without a GL context.
+Tables are built once per resolution and returned as read-only arrays;
+callers slice them instead of calling cos/sin per vertex per frame.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Resolutions the game uses; others are built on first request
+CIRCLE_RESOLUTIONS = (4, 8, 12, 20, 32, 36, 80, 360)
+
+PIE_SEGMENTS = 360  # One vertex per degree, so pies are sliced to 1 degree
+
+
+def _freeze(array):
+    array.setflags(write=False)
+    return array
+
+
+@lru_cache(maxsize=None)
+def unit_circle(segments):
+    """(segments + 1, 2) cos/sin table from 0 to 2*pi; the last point repeats the first"""
+    theta = np.linspace(0.0, 2.0 * math.pi, segments + 1)
+    table = np.stack([np.cos(theta), np.sin(theta)], axis=-1)
+    table[-1] = table[0]  # Exact closure
+    return _freeze(table.astype(np.float32))
+
+
+@lru_cache(maxsize=None)
+def unit_circle_loop(segments):
+    """(segments, 3) closed line loop in the XY plane (no repeated point)"""
+    loop = np.zeros((segments, 3), dtype=np.float32)
+    loop[:, :2] = unit_circle(segments)[:-1]
+    return _freeze(loop)
+
+
+@lru_cache(maxsize=None)
+def unit_fan(segments=PIE_SEGMENTS):
+    """Triangle-fan vertices for a unit disc: centre first, then the rim from angle 0"""
+    fan = np.zeros((segments + 2, 2), dtype=np.float32)
+    fan[1:] = unit_circle(segments)
+    return _freeze(fan)
+
+
+def pie_fan(fraction, segments=PIE_SEGMENTS):
+    """Slice of the cached unit fan covering fraction (0-1) of the circle"""
+    steps = int(round(max(0.0, min(1.0, fraction)) * segments))
+    return unit_fan(segments)[:steps + 2]
+
+
+def arc(segments, fraction):
+    """Rim points of a partial circle, sliced from the cached table"""
+    steps = int(round(max(0.0, min(1.0, fraction)) * segments))
+    return unit_circle(segments)[:steps + 1]
+
+
+def warm_tables():
+    """Build every table the game uses up front"""
+    for segments in CIRCLE_RESOLUTIONS:
+        unit_circle(segments)
+        unit_circle_loop(segments)
+    unit_fan()
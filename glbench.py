@@ -0,0 +1,96 @@
+"""Compare PyOpenGL render profiles over a recorded session.
+
+Each profile (see GL_PROFILES in main.py) runs the game in its own process,
+because PyOpenGL reads its flags once at import. Every run plays the same
+replay file with --benchmark, one tick per frame, and reports the display
+time per frame. Update and snapshot-decoding time are the same in every
+profile, so they are left out. Vsync is switched off for Mesa and NVIDIA
+drivers so swaps don't round frames up to the refresh interval.
+
+    python main.py --record session.sqr            # play a while, then quit
+    python glbench.py session.sqr --frames 1200 --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import main as game
+
+GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+RESULT_PREFIX = "Benchmark: "
+NO_VSYNC = {'vblank_mode': '0', '__GL_SYNC_TO_VBLANK': '0'}
+
+
+def game_command(replay, profile, frames, renderer):
+    return [sys.executable, GAME, '--replay', replay, '--benchmark', str(frames),
+            '--gl-profile', profile, '--renderer', renderer, '--hitch-ms', '1e9']
+
+
+def run_profile(replay, profile, frames, renderer):
+    """Play the replay once under a profile; returns the game's benchmark result"""
+    completed = subprocess.run(game_command(replay, profile, frames, renderer), capture_output=True, text=True,
+                               env={**os.environ, **NO_VSYNC})
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{profile} run printed no result (exit {completed.returncode}):\n"
+                       f"{completed.stdout[-2000:]}{completed.stderr[-2000:]}")
+
+
+def summarize(results):
+    """Median of each timing over repeated runs"""
+    summary = dict(results[0])
+    for key in ('display_mean', 'display_p50', 'display_p99'):
+        summary[key] = statistics.median(result[key] for result in results)
+    summary['runs'] = len(results)
+    return summary
+
+
+def print_report(report, baseline):
+    print(f"{'profile':<10}{'frames':>8}{'mean ms':>9}{'p50 ms':>8}{'p99 ms':>8}{'speedup':>9}  gl calls/frame")
+    base = report[baseline]['display_mean'] if baseline in report else None
+    for profile, entry in report.items():
+        speedup = f"{base / entry['display_mean']:.2f}x" if base else '-'
+        calls = f"{entry['gl_calls_per_frame']:.0f}" if entry['gl_calls_per_frame'] is not None else '-'
+        print(f"{profile:<10}{entry['frames']:>8}{entry['display_mean']:>9.2f}{entry['display_p50']:>8.2f}"
+              f"{entry['display_p99']:>8.2f}{speedup:>9}  {calls}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="glbench", description=__doc__.split('\n\n')[0])
+    parser.add_argument('replay', help="file recorded with main.py --record")
+    parser.add_argument('--profiles', default='default,release,debug', help="comma-separated: " + ", ".join(game.GL_PROFILES))
+    parser.add_argument('--frames', type=int, default=1200, help="frames per run (capped at the recording)")
+    parser.add_argument('--runs', type=int, default=3, help="runs per profile; the report uses the median")
+    parser.add_argument('--renderer', choices=['fixed', 'shader'], default='fixed')
+    parser.add_argument('--baseline', default='default', help="profile the speedup is measured against")
+    parser.add_argument('--report', help="also write the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    profiles = args.profiles.split(',')
+    unknown = [name for name in profiles if name not in game.GL_PROFILES]
+    if unknown:
+        sys.exit(f"unknown profiles: {', '.join(unknown)}")
+
+    report = {}
+    for run in range(args.runs):
+        # Interleave profiles so drift (thermals, other load) hits them all alike
+        for profile in profiles:
+            result = run_profile(args.replay, profile, args.frames, args.renderer)
+            report.setdefault(profile, []).append(result)
+            print(f"[run {run + 1}/{args.runs}] {profile}: {result['display_mean']:.2f} ms/frame")
+    report = {profile: summarize(results) for profile, results in report.items()}
+    print_report(report, args.baseline)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,203 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
-from OpenGL.GLUT import GLUT_BITMAP_TIMES_ROMAN_24
+import atexit
+import bisect
+import ctypes
+import hashlib
+import json
 import math
+import os
+import random
+import struct
 import sys
 import time
+from array import array
+from collections import Counter, deque
+from contextlib import contextmanager
+
+IMPORT_START = time.perf_counter()
+
+import numpy as np
+
+import geometry_tables
+import replay
+import telemetry
+import terrain
+
+# ============ GL LOADING ============
+
+# PyOpenGL costs more to import than the rest of the module together, and the
+# headless users of this module (vec_env, tournament, the netplay server) never
+# draw. So GL, GLU and GLUT are only imported by load_gl(), which the renderer
+# calls before opening a window; until then the draw functions are
+# unusable but the game rules, input callbacks and command buffer all work.
+IMPORT_BUDGET_MS = 150.0  # numpy, the helper modules and this module's body; see `python -X importtime -c "import main"`
+
+# Values fixed by the GL and GLUT specs, needed without a window by mesh
+# registration and the input callbacks. load_gl() leaves them as they are.
+GL_LINES = 0x0001
+GL_TRIANGLES = 0x0004
+GLUT_LEFT_BUTTON = 0
+GLUT_RIGHT_BUTTON = 2
+GLUT_DOWN = 0
+GLUT_UP = 1
+GLUT_KEY_F5 = 5
+GLUT_KEY_LEFT = 100
+GLUT_KEY_UP = 101
+GLUT_KEY_RIGHT = 102
+GLUT_KEY_DOWN = 103
+GLUT_KEY_HOME = 106
+GLUT_KEY_END = 107
+
+# PyOpenGL reads these flags once, when OpenGL.GL is first imported, so the
+# profile has to be chosen before load_gl() (--gl-profile). By default every GL
+# call is followed by glGetError and its array arguments are size-checked,
+# which nearly doubles the cost of a small call like glColor3f. 'release'
+# drops those checks; 'debug' keeps them, logs every GL error and counts calls
+# per function. STORE_POINTERS stays on in both: gl*Pointer arrays that
+# PyOpenGL converts must outlive the call. 'default' leaves PyOpenGL's own
+# settings.
+GL_PROFILES = {
+    'release': {'ERROR_CHECKING': False, 'ERROR_LOGGING': False, 'CONTEXT_CHECKING': False,
+                'ARRAY_SIZE_CHECKING': False, 'FULL_LOGGING': False},
+    'debug': {'ERROR_CHECKING': True, 'ERROR_LOGGING': True, 'CONTEXT_CHECKING': True,
+              'ARRAY_SIZE_CHECKING': True, 'FULL_LOGGING': False},
+    'default': {},
+}
+
+gl_loaded = False
+gl_profile = 'release'
+gl_call_counts = None  # Counter of calls per GL/GLU/GLUT function under the debug profile
+gl_calls_last_frame = 0
+
+
+def counted_gl_call(name, function):
+    """Wrap a GL entry point so each call is tallied in gl_call_counts"""
+    def call(*args, **kwargs):
+        gl_call_counts[name] += 1
+        return function(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+def load_gl():
+    """Import GL, GLU and GLUT into this module, as the star imports used to (names defined here win)"""
+    global gl_loaded, gl_call_counts
+    if gl_loaded:
+        return
+    import OpenGL
+    if 'OpenGL.GL' in sys.modules and GL_PROFILES[gl_profile]:
+        print(f"OpenGL.GL was imported before load_gl(); the '{gl_profile}' profile flags have no effect")
+    for flag, value in GL_PROFILES[gl_profile].items():
+        setattr(OpenGL, flag, value)
+    from OpenGL import GL, GLU, GLUT
+    counting = gl_profile == 'debug'
+    if counting:
+        gl_call_counts = Counter()
+    module = globals()
+    for library in (GL, GLU, GLUT):
+        for name in getattr(library, '__all__', None) or [n for n in dir(library) if not n.startswith('_')]:
+            if name not in module:
+                value = getattr(library, name)
+                # Entry points missing from this GL are falsy; leave them unwrapped so checks still work
+                if counting and name.startswith('gl') and callable(value) and bool(value):
+                    value = counted_gl_call(name, value)
+                module[name] = value
+    gl_loaded = True
+
+
+# ============ ARRAY STORAGE ============
+
+class ArrayPool:
+    """Struct-of-arrays entity storage: one NumPy column per field, live rows kept contiguous"""
+
+    def __init__(self, fields, capacity=256):
+        self.fields = fields  # {name: (dtype, width)}
+        self.head = 0  # Live rows are columns[head:head + count]
+        self.count = 0
+        self.columns = {name: self._alloc(dtype, width, capacity) for name, (dtype, width) in fields.items()}
+
+    @staticmethod
+    def _alloc(dtype, width, capacity):
+        return np.zeros(capacity if width == 1 else (capacity, width), dtype=dtype)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.columns[name][self.head:self.head + self.count]
+
+    def capacity(self):
+        return len(next(iter(self.columns.values())))
+
+    def add(self, n, **values):
+        """Append n rows; unspecified fields are zeroed. Returns the new rows as a slice"""
+        if self.head + self.count + n > self.capacity():
+            new_capacity = self.capacity()
+            if self.count + n > new_capacity:
+                new_capacity = max(self.count + n, new_capacity * 2)
+            for name, (dtype, width) in self.fields.items():
+                moved = self._alloc(dtype, width, new_capacity)
+                moved[:self.count] = self.columns[name][self.head:self.head + self.count]
+                self.columns[name] = moved
+            self.head = 0
+        rows = slice(self.head + self.count, self.head + self.count + n)
+        for name, column in self.columns.items():
+            column[rows] = values.get(name, 0)
+        self.count += n
+        return slice(rows.start - self.head, rows.stop - self.head)
+
+    def keep(self, mask):
+        """Compact the pool down to the rows where mask is True"""
+        mask = np.array(mask, dtype=bool) # Copy: the mask may be a view of one of our columns
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for column in self.columns.values():
+            column[:kept] = column[self.head:self.head + self.count][mask]
+        self.head = 0
+        self.count = kept
+
+    def drop_front(self, n):
+        """Discard the first n rows without moving the rest"""
+        n = min(n, self.count)
+        self.head += n
+        self.count -= n
+        if self.count == 0:
+            self.head = 0
+
+    def reorder(self, order):
+        """Permute the live rows by an index array"""
+        for column in self.columns.values():
+            live = column[self.head:self.head + self.count]
+            live[:] = live[order]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+# World entities all move monotonically in Z, so containers are kept sorted
+# by Z: incoming entities (obstacles, enemies, collectibles) front-to-back
+# with the nearest first, player bullets oldest (furthest downrange) first.
+# Despawning is then a trim from the front and Z ranges are binary searches.
+
+def z_count_from(z, limit):
+    """Leading rows of a descending z column with z >= limit"""
+    return len(z) - int(np.searchsorted(z[::-1], limit, side='left'))
+
+
+def z_window(z, z_near, z_far):
+    """Slice of a descending z column covering z_far <= z <= z_near"""
+    ascending = z[::-1]
+    return slice(len(z) - int(np.searchsorted(ascending, z_near, side='right')),
+                 len(z) - int(np.searchsorted(ascending, z_far, side='left')))
+
+
+def z_sort(pool):
+    """Restore nearest-first order after entities moved at different speeds"""
+    z = pool['pos'][:, 2]
+    if len(z) > 1 and (z[1:] > z[:-1]).any():
+        pool.reorder(np.argsort(-z, kind='stable'))
+
 
 # Game State Constants
 MENU = 0
@@ -36,25 +229,58 @@ player_hp = 100
 player_shield = False
 player_bounds_x = 80
 player_bounds_y = 50
+PLAYER_ACCEL = 3.0     # Velocity added per key press
+PLAYER_MAX_SPEED = 4.0
+PLAYER_FRICTION = 0.85
+PLAYER_MIN_SPEED = 0.1 # Slower than this snaps to a stop
+TICK_SECONDS = 0.016   # Timers assume ~60 ticks per second
+COLLISION_DAMAGE = 10  # Flying into an obstacle or enemy
+
+# Co-op wingman (--coop): a second jet at the player's depth that shares the
+# player's HP, shield and score. Arrow keys fly it, '.' fires and ',' launches missiles.
+coop = False
+wingman_x = 0.0
+wingman_y = 0.0
+wingman_vx = 0.0
+wingman_vy = 0.0
+WINGMAN_START_X = 30.0
 
 # Game Objects
-obstacles = []  # List of dicts: {'x', 'y', 'z', 'type', 'active'}
+obstacles = []  # List of dicts: {'x', 'y', 'z', 'type', 'active'}, nearest first
 OBSTACLE_SPAWN_Z = -800
 OBSTACLE_DESPAWN_Z = 50
+OBSTACLE_SPEED = 3.0
 GAME_SPEED = 2.0  # World movement speed
 
 # Combat
-bullets = []
+bullets = [] # Oldest (furthest downrange) first
+spent_bullets = 0 # Bullets used up this tick, still in the list
 BULLET_SPEED = 5.0
 BULLET_MAX_DIST = -1000
+BULLET_DAMAGE = {'normal': 1, 'laser': 5}      # Per hit on an enemy; lasers pierce and hit every tick
+BOSS_BULLET_DAMAGE = {'normal': 5, 'laser': 2}
 
 missiles = []
 MISSILE_SPEED = 4.0
 missile_cooldown_timer = 0.0
 MISSILE_COOLDOWN_MAX = 5.0
+MISSILE_BARRAGE = 6
+MISSILE_LIFE = 100 # Ticks
+MISSILE_STEER = 0.2 # Fraction of the velocity turned towards the target per tick
+MISSILE_DAMAGE = 5
+MISSILE_BOSS_DAMAGE = 15
 
-# Pickups
-pickups = [] # {'x', 'y', 'z', 'type', 'rot'}
+# Collectibles: power-ups and bonus rings share one array pool. 'type'
+# indexes COLLECTIBLE_TYPES; per-type behaviour lives in COLLECTIBLE_SPECS.
+COLLECTIBLE_TYPES = ('health', 'shield', 'laser', 'ring')
+COLLECTIBLE_TYPE_INDEX = {name: i for i, name in enumerate(COLLECTIBLE_TYPES)}
+collectibles = ArrayPool({
+    'pos': (np.float64, 3),
+    'type': (np.int8, 1),
+    'rot': (np.float64, 1),
+}, capacity=64)
+COLLECTIBLE_SPAWN_Z = -800
+HEALTH_PICKUP_HP = 20
 PICKUP_SPEED = 2.0
 laser_active = False
 laser_timer = 0.0
@@ -62,21 +288,143 @@ LASER_DURATION = 10.0
 
 # Scoring & Rings
 score = 0
-rings = [] # {'x', 'y', 'z', 'rot'}
 RING_SPEED = 2.0
+RING_RADIUS = 5
+RING_TUBE_RADIUS = 0.8
+RING_LOD_Z = -400 # Rings further away than this use the low-poly torus
 
-enemy_bullets = [] # {'x', 'y', 'z', 'dx', 'dy', 'dz'}
+# Enemy bullets live in arrays so boss patterns can keep thousands in flight.
+# 'speed' follows a per-bullet curve (accel towards max_speed) and 'turn'
+# rotates the heading around Z each tick for spirals.
+enemy_bullets = ArrayPool({
+    'pos': (np.float64, 3),
+    'dir': (np.float64, 3),
+    'speed': (np.float64, 1),
+    'accel': (np.float64, 1),
+    'max_speed': (np.float64, 1),
+    'turn': (np.float64, 1),
+}, capacity=1024)
+ENEMY_BULLET_SPEED = 3.0
+ENEMY_BULLET_HIT_RADIUS = 8 # Distance to the player that counts as a hit
+ENEMY_BULLET_DAMAGE = 5
 
-enemies = [] # [{'x', 'y', 'z', 'type', 'hp'}]
+# Enemies are array-backed too so waves of hundreds update in a few NumPy
+# passes. 'type' indexes ENEMY_TYPES and the per-type tables below; 'uid'
+# is a stable handle missiles use to keep their target across compaction.
+ENEMY_TYPES = ('standard', 'fast', 'heavy')
+ENEMY_TYPE_INDEX = {name: i for i, name in enumerate(ENEMY_TYPES)}
+ENEMY_SPEED = np.array([1.2, 2.0, 0.8])          # Z units per tick
+ENEMY_TRACKING = np.array([0.005, 0.005, 0.0])   # Fraction of the gap to the player closed per tick
+ENEMY_HP = np.array([2, 1, 5])
+ENEMY_POINTS = np.array([50, 100, 300])
+ENEMY_FIRE_CHANCE = 0.015 # Per enemy per tick
+ENEMY_FIRE_Z = -700       # Enemies hold fire until they're this close
+
+enemies = ArrayPool({
+    'pos': (np.float64, 3),
+    'type': (np.int8, 1),
+    'hp': (np.int32, 1),
+    'active': (np.bool_, 1),
+    'uid': (np.int64, 1),
+}, capacity=256)
+next_enemy_uid = 1
+enemy_rng = np.random.default_rng()
 ENEMY_SPAWN_Z = -800
 
 boss = None # {'x', 'y', 'z', 'hp', 'max_hp', 'active', 'phase', 'angle'}
+BOSS_HP = 500
+BOSS_Z = -200 # Boss holds this distance
+BOSS_POINTS = 5000
 cheat_mode = False
+show_perf_overlay = False
+
+# Live entity caps per kind (override with --budget KIND=N). Spawns past the
+# cap are skipped; bullets evict their least important rows to make room.
+ENTITY_BUDGETS = {
+    'obstacles': 120,
+    'enemies': 300,
+    'enemy_bullets': 4000,
+    'bullets': 150,
+    'missiles': 48,
+    'collectibles': 64,
+}
+budget_stats = {kind: {'skipped': 0, 'evicted': 0} for kind in ENTITY_BUDGETS}
+
+# ============ LEVEL DEFINITIONS ============
+
+# Spawn densities are expected spawns per tick (the old per-tick dice rolls).
+# Patterns: 'tunnel' keeps the centre lane mostly clear, 'scatter' is uniform
+# over the spawn box, 'wave' spawns 'size' enemies together in a V.
+# 'terrain' is the ground theme for terrain.terrain_height.
+SCATTER_BOX = {'x': (-60, 60), 'y': (-30, 30)}
+ENEMY_BOX = {'x': (-50, 50), 'y': (-20, 40)}
+
+LEVEL_DEFS = [
+    {   # Level 1: Forest
+        'score_to_advance': 200,
+        'obstacles': {'types': ['tree'], 'density': 0.15, 'pattern': 'tunnel'},
+        'enemies': {'types': ['standard', 'fast', 'heavy'], 'density': 0.008, 'pattern': 'scatter'},
+        'pickups': {'types': ['health', 'shield', 'laser'], 'density': 0.02, 'pattern': 'scatter'},
+        'rings': {'density': 0.005, 'pattern': 'scatter'},
+        'terrain': {'style': 'hills', 'amplitude': 40, 'wavelength': 250},
+    },
+    {   # Level 2: Ocean
+        'score_to_advance': 500,
+        'obstacles': {'types': ['buoy'], 'density': 0.15, 'pattern': 'tunnel'},
+        'enemies': {'types': ['standard', 'fast', 'heavy'], 'density': 0.008, 'pattern': 'scatter'},
+        'pickups': {'types': ['health', 'shield', 'laser'], 'density': 0.02, 'pattern': 'scatter'},
+        'rings': {'density': 0.005, 'pattern': 'scatter'},
+        'terrain': {'style': 'swell', 'amplitude': 4, 'wavelength': 160},
+    },
+    {   # Level 3: Desert
+        'score_to_advance': 1000,
+        'obstacles': {'types': ['cactus'], 'density': 0.15, 'pattern': 'tunnel'},
+        'enemies': {'types': ['standard', 'fast', 'heavy'], 'density': 0.003, 'pattern': 'wave', 'size': 3},
+        'pickups': {'types': ['health', 'shield', 'laser'], 'density': 0.02, 'pattern': 'scatter'},
+        'rings': {'density': 0.005, 'pattern': 'scatter'},
+        'terrain': {'style': 'dunes', 'amplitude': 30, 'wavelength': 300},
+    },
+    {   # Level 4: Purple
+        'score_to_advance': 1500,
+        'obstacles': {'types': ['mushroom'], 'density': 0.15, 'pattern': 'tunnel'},
+        'enemies': {'types': ['standard', 'fast', 'heavy'], 'density': 0.002, 'pattern': 'wave', 'size': 5},
+        'pickups': {'types': ['health', 'shield', 'laser'], 'density': 0.02, 'pattern': 'scatter'},
+        'rings': {'density': 0.005, 'pattern': 'scatter'},
+        'terrain': {'style': 'hills', 'amplitude': 55, 'wavelength': 200},
+    },
+    {   # Level 5: Volcanic (boss, no minions)
+        'score_to_advance': None,
+        'obstacles': {'types': ['spike'], 'density': 0.15, 'pattern': 'tunnel'},
+        'enemies': {'types': ['standard'], 'density': 0.0, 'pattern': 'scatter'},
+        'pickups': {'types': ['health', 'shield', 'laser'], 'density': 0.02, 'pattern': 'scatter'},
+        'rings': {'density': 0.005, 'pattern': 'scatter'},
+        'terrain': {'style': 'crags', 'amplitude': 60, 'wavelength': 150},
+    },
+]
+BOSS_LEVEL = len(LEVEL_DEFS) - 1
 
 # ============ UTILITY FUNCTIONS ============
 
-def get_text_width(text, font=GLUT_BITMAP_TIMES_ROMAN_24):
+font_lists = {}  # id(GLUT bitmap font) -> base of 256 display lists, one per Latin-1 character
+
+
+def font_list_base(font):
+    """Display lists that draw each character of a bitmap font (built once, see warm_up)"""
+    base = font_lists.get(id(font))  # Font handles aren't hashable; they're module constants, so ids are stable
+    if base is None:
+        base = glGenLists(256)
+        for code in range(256):
+            glNewList(base + code, GL_COMPILE)
+            glutBitmapCharacter(font, code)  # glBitmap also advances the raster position
+            glEndList()
+        font_lists[id(font)] = base
+    return base
+
+
+def get_text_width(text, font=None):
     """Estimate text width for centering"""
+    if font is None:
+        font = GLUT_BITMAP_TIMES_ROMAN_24
     width = 0
     for char in text:
         if font == GLUT_BITMAP_TIMES_ROMAN_24:
@@ -86,8 +434,10 @@ def get_text_width(text, font=GLUT_BITMAP_TIMES_ROMAN_24):
     return width
 
 
-def draw_text_2d(text, x, y, color=(1.0, 1.0, 1.0), font=GLUT_BITMAP_TIMES_ROMAN_24, centered=False):
+def draw_text_2d(text, x, y, color=(1.0, 1.0, 1.0), font=None, centered=False):
     """Draw 2D text at screen position"""
+    if font is None:
+        font = GLUT_BITMAP_TIMES_ROMAN_24
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
@@ -105,8 +455,9 @@ def draw_text_2d(text, x, y, color=(1.0, 1.0, 1.0), font=GLUT_BITMAP_TIMES_ROMAN
         x = x - (text_width / 2)
     
     glRasterPos2f(x, y)
-    for char in text:
-        glutBitmapCharacter(font, ord(char))
+    # One call per string instead of one glutBitmapCharacter per character
+    glListBase(font_list_base(font))
+    glCallLists(text.encode('latin-1', 'replace'))
     
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
@@ -114,7 +465,7 @@ def draw_text_2d(text, x, y, color=(1.0, 1.0, 1.0), font=GLUT_BITMAP_TIMES_ROMAN
     glMatrixMode(GL_MODELVIEW)
 
 
-def draw_text_with_border(text, x, y, text_color=(1.0, 1.0, 1.0), border_color=(0.0, 0.0, 0.0), font=GLUT_BITMAP_TIMES_ROMAN_24, centered=False):
+def draw_text_with_border(text, x, y, text_color=(1.0, 1.0, 1.0), border_color=(0.0, 0.0, 0.0), font=None, centered=False):
     """Draw 2D text with a border"""
     # Draw border
     draw_text_2d(text, x - 1, y, border_color, font, centered)
@@ -126,275 +477,756 @@ def draw_text_with_border(text, x, y, text_color=(1.0, 1.0, 1.0), border_color=(
     draw_text_2d(text, x, y, text_color, font, centered)
 
 
-def draw_sphere(radius, slices=80, stacks=80):
-    """Draw a sphere using GLU"""
-    quad = gluNewQuadric()
-    gluSphere(quad, radius, slices, stacks)
+# ============ RENDER COMMANDS ============
 
+# The draw_* layer no longer talks to GL for world geometry. It keeps a CPU-side
+# matrix stack that mirrors glPushMatrix/glTranslatef/... and emits compact
+# (mesh id, model matrix, color, space) commands into a per-frame buffer. A
+# backend then executes the buffer against GL or just counts the work.
+#
+# Matrices are stored transposed ("row-vector" form) so they match OpenGL's
+# column-major memory layout and can be handed to glLoadMatrixf directly.
+SPACE_WORLD = 0  # Model matrix is in world space; the camera view is applied at execute time
+SPACE_VIEW = 1   # Model matrix is already in camera space (e.g. the sky backdrop)
 
-def draw_cylinder(radius, height, slices=80, stacks=80):
-    """Draw a cylinder using GLU"""
-    quad = gluNewQuadric()
-    gluCylinder(quad, radius, radius, height, slices, stacks)
+MESHES = []     # mesh id -> {'name', 'mode', 'vertices', 'radius'}
+mesh_ids = {}   # (builder name, *params) -> mesh id
+free_mesh_ids = []  # Slots of released meshes, reused by register_mesh
 
+render_commands = []  # (mesh id, matrix, color, space)
+rc_stack = [np.identity(4, dtype=np.float32)]
+rc_spaces = [SPACE_WORLD]
+rc_current_color = (1.0, 1.0, 1.0)
 
-def draw_cube(size):
-    """Draw a cube using GL primitives"""
-    half = size / 2.0
-    glBegin(GL_QUADS)
-    
-    # Front
-    glVertex3f(-half, -half, half)
-    glVertex3f(half, -half, half)
-    glVertex3f(half, half, half)
-    glVertex3f(-half, half, half)
-    
-    # Back
-    glVertex3f(-half, -half, -half)
-    glVertex3f(-half, half, -half)
-    glVertex3f(half, half, -half)
-    glVertex3f(half, -half, -half)
-    
-    # Left
-    glVertex3f(-half, -half, -half)
-    glVertex3f(-half, -half, half)
-    glVertex3f(-half, half, half)
-    glVertex3f(-half, half, -half)
-    
-    # Right
-    glVertex3f(half, -half, -half)
-    glVertex3f(half, half, -half)
-    glVertex3f(half, half, half)
-    glVertex3f(half, -half, half)
-    
-    # Top
-    glVertex3f(-half, half, -half)
-    glVertex3f(-half, half, half)
-    glVertex3f(half, half, half)
-    glVertex3f(half, half, -half)
-    
-    # Bottom
-    glVertex3f(-half, -half, -half)
-    glVertex3f(half, -half, -half)
-    glVertex3f(half, -half, half)
-    glVertex3f(-half, -half, half)
-    
-    glEnd()
 
+def build_sphere_mesh(slices, stacks):
+    """Unit sphere as GL_TRIANGLES, stacked along Z like gluSphere"""
+    theta = np.linspace(0, math.pi, stacks + 1)
+    phi = geometry_tables.unit_circle(slices)
+    grid = np.stack([
+        np.outer(np.sin(theta), phi[:, 0]),
+        np.outer(np.sin(theta), phi[:, 1]),
+        np.outer(np.cos(theta), np.ones(slices + 1)),
+    ], axis=-1)
+    a = grid[:-1, :-1]; b = grid[1:, :-1]; c = grid[1:, 1:]; d = grid[:-1, 1:]
+    return np.concatenate([np.stack([a, b, c], axis=2), np.stack([a, c, d], axis=2)]).reshape(-1, 3)
 
-def draw_ground_plane(z_offset, color, size=400, grid_spacing=40):
-    """Draw a large ground plane with a grid pattern for infinite stretching effect"""
-    # Main ground surface
-    glColor3f(color[0], color[1], color[2])
-    glBegin(GL_QUADS)
-    glVertex3f(-size, -85, z_offset)
-    glVertex3f(size, -85, z_offset)
-    glVertex3f(size, -250, z_offset)
-    glVertex3f(-size, -250, z_offset)
-    glEnd()
-    
-    # Draw grid lines for depth perception
-    glColor3f(color[0] * 0.85, color[1] * 0.85, color[2] * 0.85)
-    glBegin(GL_LINES)
-    
-    # Vertical lines (left-right)
-    for i in range(-int(size), int(size) + 1, int(grid_spacing)):
-        glVertex3f(i, -85, z_offset)
-        glVertex3f(i, -250, z_offset)
-    
-    # Horizontal lines (closer lines are darker/more visible)
-    line_count = int((250 - 85) / grid_spacing)
-    for j in range(line_count + 1):
-        y = -85 - j * grid_spacing
-        glVertex3f(-size, y, z_offset)
-        glVertex3f(size, y, z_offset)
+
+def build_cylinder_mesh(slices):
+    """Open unit cylinder along +Z from 0 to 1, like gluCylinder"""
+    ring = np.zeros((slices + 1, 3))
+    ring[:, :2] = geometry_tables.unit_circle(slices)
+    top = ring + (0, 0, 1)
+    a = ring[:-1]; b = ring[1:]; c = top[1:]; d = top[:-1]
+    return np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)]).reshape(-1, 3)
+
+
+def build_torus_mesh(major_radius, minor_radius, major_segments, minor_segments):
+    """Torus in the XY plane around the Z axis"""
+    u = geometry_tables.unit_circle(major_segments)
+    v = geometry_tables.unit_circle(minor_segments)
+    ring = major_radius + minor_radius * v[None, :, 0]
+    x = ring * u[:, 0, None]
+    y = ring * u[:, 1, None]
+    z = np.broadcast_to(minor_radius * v[None, :, 1], x.shape)
+    grid = np.stack([x, y, z], axis=-1)
+    a = grid[:-1, :-1]; b = grid[1:, :-1]; c = grid[1:, 1:]; d = grid[:-1, 1:]
+    return np.concatenate([np.stack([a, b, c], axis=2), np.stack([a, c, d], axis=2)]).reshape(-1, 3)
+
+
+def build_cube_mesh():
+    """Unit cube centred on the origin"""
+    corners = np.array([[x, y, z] for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)])
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return np.array([corners[[f[0], f[1], f[2], f[0], f[2], f[3]]] for f in faces]).reshape(-1, 3)
+
+
+def build_quad_mesh():
+    """Unit square in the XY plane centred on the origin"""
+    return np.array([[-0.5, -0.5, 0], [0.5, -0.5, 0], [0.5, 0.5, 0],
+                     [-0.5, -0.5, 0], [0.5, 0.5, 0], [-0.5, 0.5, 0]])
+
+
+def build_ground_strip_mesh(width, z_start, z_end, tile):
+    """Scrolling ground: one quad per tile at y=0, from z_start back to z_end"""
+    tris = []
+    for z in range(z_start, z_end, -tile):
+        a = (-width, 0, z); b = (width, 0, z); c = (width, 0, z - tile); d = (-width, 0, z - tile)
+        tris += [a, b, c, a, c, d]
+    return np.array(tris)
+
+
+def build_ground_lines_mesh(width, z_start, z_end, tile):
+    """Cross lines drawn one unit above the ground strip"""
+    lines = []
+    for z in range(z_start, z_end, -tile):
+        lines += [(-width, 1, z), (width, 1, z)]
+    return np.array(lines)
+
+
+def build_crosshair_mesh():
+    """Plus sign with a circle around it, as GL_LINES"""
+    plus = np.array([(-20, 0, 0), (20, 0, 0), (0, -20, 0), (0, 20, 0)], dtype=np.float32)
+    circle = geometry_tables.unit_circle_loop(20) * 15
+    segments = np.stack([circle, np.roll(circle, -1, axis=0)], axis=1).reshape(-1, 3)
+    return np.concatenate([plus, segments])
+
+
+MESH_BUILDERS = {
+    'sphere': (GL_TRIANGLES, build_sphere_mesh),
+    'cylinder': (GL_TRIANGLES, build_cylinder_mesh),
+    'cube': (GL_TRIANGLES, build_cube_mesh),
+    'torus': (GL_TRIANGLES, build_torus_mesh),
+    'quad': (GL_TRIANGLES, build_quad_mesh),
+    'ground_strip': (GL_TRIANGLES, build_ground_strip_mesh),
+    'ground_lines': (GL_LINES, build_ground_lines_mesh),
+    'crosshair': (GL_LINES, build_crosshair_mesh),
+}
+
+
+def mesh_id(name, *params):
+    """Id of a (lazily built) mesh; the same name and params always share one mesh"""
+    key = (name,) + params
+    mid = mesh_ids.get(key)
+    if mid is None:
+        mode, builder = MESH_BUILDERS[name]
+        vertices = np.ascontiguousarray(builder(*params), dtype=np.float32)
+        mid = len(MESHES)
+        MESHES.append({
+            'name': name,
+            'mode': mode,
+            'vertices': vertices,
+            'radius': float(np.sqrt((vertices ** 2).sum(axis=1).max())) if len(vertices) else 0.0,
+        })
+        mesh_ids[key] = mid
+    return mid
+
+
+def register_mesh(name, mode, vertices):
+    """Add a mesh that isn't built from MESH_BUILDERS (e.g. streamed terrain); returns its id"""
+    mesh = {
+        'name': name,
+        'mode': mode,
+        'vertices': np.ascontiguousarray(vertices, dtype=np.float32),
+        'radius': float(np.sqrt((vertices ** 2).sum(axis=1).max())) if len(vertices) else 0.0,
+    }
+    if free_mesh_ids:
+        mid = free_mesh_ids.pop()
+        MESHES[mid] = mesh
+    else:
+        mid = len(MESHES)
+        MESHES.append(mesh)
+    return mid
+
+
+def release_mesh(mid):
+    """Free a registered mesh and any GPU buffers the backend holds for it"""
+    if render_backend is not None:
+        render_backend.release(mid)
+    MESHES[mid] = None
+    free_mesh_ids.append(mid)
+
+
+def rotation_matrix(angle_deg, x, y, z):
+    """glRotatef rotation in row-vector form"""
+    axis = np.array([x, y, z], dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    x, y, z = axis
+    c = math.cos(math.radians(angle_deg))
+    s = math.sin(math.radians(angle_deg))
+    t = 1 - c
+    return np.array([
+        [t * x * x + c,     t * x * y + s * z, t * x * z - s * y],
+        [t * x * y - s * z, t * y * y + c,     t * y * z + s * x],
+        [t * x * z + s * y, t * y * z - s * x, t * z * z + c],
+    ], dtype=np.float32)
+
+
+def look_at(eye, center, up):
+    """gluLookAt view matrix in row-vector form"""
+    eye = np.asarray(eye, dtype=np.float64)
+    f = np.asarray(center, dtype=np.float64) - eye
+    f /= np.linalg.norm(f)
+    side = np.cross(f, up)
+    side /= np.linalg.norm(side)
+    u = np.cross(side, f)
+    view = np.identity(4)
+    view[:3, 0] = side
+    view[:3, 1] = u
+    view[:3, 2] = -f
+    view[3, :3] = -eye @ view[:3, :3]
+    return view.astype(np.float32)
+
+
+def rc_begin_frame():
+    """Start a new command buffer with an identity world transform"""
+    global rc_current_color
+    render_commands.clear()
+    for key in render_stats:
+        render_stats[key] = 0
+    rc_stack[:] = [np.identity(4, dtype=np.float32)]
+    rc_spaces[:] = [SPACE_WORLD]
+    rc_current_color = (1.0, 1.0, 1.0)
+
+
+def rc_push():
+    rc_stack.append(rc_stack[-1].copy())
+    rc_spaces.append(rc_spaces[-1])
+
+
+def rc_pop():
+    rc_stack.pop()
+    rc_spaces.pop()
+
+
+def rc_load_identity():
+    """Reset the current transform to camera space (like glLoadIdentity on the modelview)"""
+    rc_stack[-1][:] = np.identity(4, dtype=np.float32)
+    rc_spaces[-1] = SPACE_VIEW
+
+
+def rc_translate(x, y, z):
+    top = rc_stack[-1]
+    top[3] += x * top[0] + y * top[1] + z * top[2]
+
+
+def rc_rotate(angle_deg, x, y, z):
+    top = rc_stack[-1]
+    top[:3] = rotation_matrix(angle_deg, x, y, z) @ top[:3]
+
+
+def rc_scale(x, y, z):
+    top = rc_stack[-1]
+    top[0] *= x
+    top[1] *= y
+    top[2] *= z
+
+
+def rc_color(r, g, b):
+    global rc_current_color
+    rc_current_color = (r, g, b)
+
+
+def submit(mesh):
+    """Emit a draw of a mesh with the current transform and color"""
+    render_commands.append((mesh, rc_stack[-1].copy(), rc_current_color, rc_spaces[-1]))
+
+
+def count_state_changes(commands):
+    """Color and mesh switches needed to execute commands in the given order"""
+    changes = 0
+    last_color = None
+    last_mesh = None
+    for mid, matrix, color, space in commands:
+        if color != last_color:
+            changes += 1
+            last_color = color
+        if mid != last_mesh:
+            changes += 1
+            last_mesh = mid
+    return changes
+
+
+def sort_render_commands(commands, view):
+    """Group commands by mesh and material, each group front-to-back, nearest group first"""
+    if not commands:
+        return []
+    origins = np.array([matrix[3] for _, matrix, _, _ in commands])
+    spaces = np.array([space for _, _, _, space in commands])
+    depth = -(origins @ view)[:, 2]
+    view_space = spaces == SPACE_VIEW
+    depth[view_space] = -origins[view_space, 2]
     
-    glEnd()
+    group_depth = {}
+    for (mid, _, color, _), d in zip(commands, depth.tolist()):
+        key = (mid, color)
+        if d < group_depth.get(key, math.inf):
+            group_depth[key] = d
+    order = sorted(range(len(commands)),
+                   key=lambda i: (group_depth[(commands[i][0], commands[i][2])],
+                                  commands[i][0], commands[i][2], depth[i]))
+    return [commands[i] for i in order]
+
+
+class GLBackend:
+    """Executes render commands with fixed-function GL, one vertex buffer per mesh"""
+
+    def __init__(self):
+        self.buffers = {}
+
+    def mesh_buffer(self, mid):
+        vbo = self.buffers.get(mid)
+        if vbo is None:
+            vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(GL_ARRAY_BUFFER, MESHES[mid]['vertices'], GL_STATIC_DRAW)
+            self.buffers[mid] = vbo
+        return vbo
+
+    def release(self, mid):
+        vbo = self.buffers.pop(mid, None)
+        if vbo is not None:
+            glDeleteBuffers(1, [vbo])
+
+    def execute(self, commands, view):
+        glMatrixMode(GL_MODELVIEW)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        last_color = None
+        last_mesh = None
+        for mid, matrix, color, space in commands:
+            glLoadMatrixf(matrix @ view if space == SPACE_WORLD else matrix)
+            if color != last_color:
+                glColor3f(*color)
+                last_color = color
+            if mid != last_mesh:
+                glBindBuffer(GL_ARRAY_BUFFER, self.mesh_buffer(mid))
+                glVertexPointer(3, GL_FLOAT, 0, None)
+                last_mesh = mid
+            glDrawArrays(MESHES[mid]['mode'], 0, len(MESHES[mid]['vertices']))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glLoadMatrixf(view)
+
+
+class NullBackend:
+    """Counts the draw work a frame would do without touching GL"""
+
+    def __init__(self):
+        self.stats = {}
+
+    def release(self, mid):
+        pass
+
+    def execute(self, commands, view):
+        self.stats = {
+            'commands': len(commands),
+            'state_changes': count_state_changes(commands),
+            'vertices': sum(len(MESHES[mid]['vertices']) for mid, _, _, _ in commands),
+        }
+
+
+class ShaderBackend:
+    """GLSL 3.3 backend: one instanced draw per mesh from a per-frame instance buffer.
     
-    # Draw horizon line
-    glColor3f(color[0] * 0.6, color[1] * 0.6, color[2] * 0.6)
-    glBegin(GL_LINES)
-    glVertex3f(-size, -240, z_offset)
-    glVertex3f(size, -240, z_offset)
-    glEnd()
+    Needs a GL 3.3 capable (compatibility) context; Mesa llvmpipe works, e.g.
+    LIBGL_ALWAYS_SOFTWARE=1 python main.py --renderer=shader
+    """
+
+    VERTEX_SHADER = """
+#version 330
+layout(location = 0) in vec3 position;
+layout(location = 1) in mat4 modelview;   // Per instance, locations 1-4
+layout(location = 5) in vec3 color;       // Per instance
+uniform mat4 projection;
+out vec3 v_color;
+void main() {
+    gl_Position = projection * modelview * vec4(position, 1.0);
+    v_color = color;
+}
+"""
+
+    FRAGMENT_SHADER = """
+#version 330
+in vec3 v_color;
+out vec4 frag_color;
+void main() {
+    frag_color = vec4(v_color, 1.0);
+}
+"""
+
+    INSTANCE_FLOATS = 16 + 3  # modelview + color
+
+    def __init__(self):
+        self.program = self._link(self.VERTEX_SHADER, self.FRAGMENT_SHADER)
+        self.projection_loc = glGetUniformLocation(self.program, "projection")
+        self.instance_vbo = glGenBuffers(1)
+        self.vaos = {}
+
+    @staticmethod
+    def _compile(source, kind):
+        shader = glCreateShader(kind)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(glGetShaderInfoLog(shader).decode(errors='replace'))
+        return shader
+
+    def _link(self, vertex_source, fragment_source):
+        program = glCreateProgram()
+        glAttachShader(program, self._compile(vertex_source, GL_VERTEX_SHADER))
+        glAttachShader(program, self._compile(fragment_source, GL_FRAGMENT_SHADER))
+        glLinkProgram(program)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            raise RuntimeError(glGetProgramInfoLog(program).decode(errors='replace'))
+        return program
+
+    def mesh_vao(self, mid):
+        """VAO with the mesh's vertices plus per-instance attributes from the shared instance buffer"""
+        entry = self.vaos.get(mid)
+        if entry is not None:
+            return entry[0]
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, MESHES[mid]['vertices'], GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        
+        stride = self.INSTANCE_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for column in range(4):
+            glEnableVertexAttribArray(1 + column)
+            glVertexAttribPointer(1 + column, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(column * 16))
+            glVertexAttribDivisor(1 + column, 1)
+        glEnableVertexAttribArray(5)
+        glVertexAttribPointer(5, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(64))
+        glVertexAttribDivisor(5, 1)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.vaos[mid] = (vao, vbo)
+        return vao
+
+    def release(self, mid):
+        entry = self.vaos.pop(mid, None)
+        if entry is not None:
+            glDeleteVertexArrays(1, [entry[0]])
+            glDeleteBuffers(1, [entry[1]])
+
+    def execute(self, commands, view):
+        if commands:
+            glUseProgram(self.program)
+            glUniformMatrix4fv(self.projection_loc, 1, GL_FALSE, glGetFloatv(GL_PROJECTION_MATRIX))
+            
+            # Commands arrive grouped by mesh (see sort_render_commands); batch each run
+            start = 0
+            while start < len(commands):
+                mid = commands[start][0]
+                end = start + 1
+                while end < len(commands) and commands[end][0] == mid:
+                    end += 1
+                self.draw_instances(mid, commands[start:end], view)
+                start = end
+            
+            glBindVertexArray(0)
+            glUseProgram(0)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadMatrixf(view)
+
+    def draw_instances(self, mid, batch, view):
+        models = np.stack([matrix for _, matrix, _, _ in batch])
+        world = np.array([space == SPACE_WORLD for _, _, _, space in batch])
+        models[world] = models[world] @ view
+        instances = np.empty((len(batch), self.INSTANCE_FLOATS), dtype=np.float32)
+        instances[:, :16] = models.reshape(len(batch), 16)
+        instances[:, 16:] = [color for _, _, color, _ in batch]
+        
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instances, GL_STREAM_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(self.mesh_vao(mid))
+        glDrawArraysInstanced(MESHES[mid]['mode'], 0, len(MESHES[mid]['vertices']), len(batch))
+
+
+def create_render_backend(name):
+    """Backend for --renderer; the shader path falls back to fixed-function if GL 3.3 isn't there"""
+    load_gl()
+    if name == 'shader':
+        try:
+            return ShaderBackend()
+        except Exception as e:
+            print(f"Shader renderer unavailable ({e}); using fixed-function")
+    return GLBackend()
+
+
+render_backend = None  # Created after the GL context exists (see main)
+render_sorting = True
+render_culling = True
+render_stats = {'commands': 0, 'culled': 0, 'state_changes_before': 0, 'state_changes_after': 0}
+
+CAMERA_FOVY = 45
+CAMERA_NEAR = 0.1
+CAMERA_FAR = 1000.0
+
+
+def render_bounds(commands):
+    """Bounding sphere centre, radius and space of every command, computed once and shared by all viewports"""
+    if not commands:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int8)
+    matrices = np.array([matrix for _, matrix, _, _ in commands])
+    scale = np.sqrt((matrices[:, :3, :3] ** 2).sum(axis=2)).max(axis=1)
+    radii = scale * np.array([MESHES[mid]['radius'] for mid, _, _, _ in commands], dtype=np.float32)
+    spaces = np.array([space for _, _, _, space in commands], dtype=np.int8)
+    return matrices[:, 3], radii, spaces
+
+
+def cull_render_commands(commands, bounds, view, aspect):
+    """Commands whose bounding sphere intersects the camera's view frustum"""
+    origins, radii, spaces = bounds
+    if not commands:
+        return commands
+    centers = np.where((spaces == SPACE_WORLD)[:, None], origins @ view, origins)
+    depth = -centers[:, 2]
+    tan_y = math.tan(math.radians(CAMERA_FOVY) / 2)
+    tan_x = tan_y * aspect
+    # Signed distance outside the side planes (they pass through the eye)
+    outside = ((np.abs(centers[:, 0]) - depth * tan_x) / math.sqrt(1 + tan_x * tan_x) > radii) | \
+              ((np.abs(centers[:, 1]) - depth * tan_y) / math.sqrt(1 + tan_y * tan_y) > radii) | \
+              (depth + radii < CAMERA_NEAR) | (depth - radii > CAMERA_FAR)
+    return [commands[i] for i in np.flatnonzero(~outside)]
+
+
+def execute_render_commands(view, aspect=None, bounds=None):
+    """Cull and sort the frame's command buffer for one camera and hand it to the active backend"""
+    commands = render_commands
+    if render_culling:
+        if bounds is None:
+            bounds = render_bounds(commands)
+        if aspect is None:
+            aspect = WINDOW_WIDTH / WINDOW_HEIGHT
+        commands = cull_render_commands(commands, bounds, view, aspect)
+    # Accumulated over the frame's viewports; rc_begin_frame resets them
+    render_stats['commands'] += len(commands)
+    render_stats['culled'] += len(render_commands) - len(commands)
+    render_stats['state_changes_before'] += count_state_changes(commands)
+    if render_sorting:
+        commands = sort_render_commands(commands, view)
+    render_stats['state_changes_after'] += count_state_changes(commands)
+    backend = render_backend if render_backend is not None else NullBackend()
+    backend.execute(commands, view)
+
+
+def draw_sphere(radius, slices=80, stacks=80):
+    """Draw a sphere (unit sphere mesh scaled to radius)"""
+    rc_push()
+    rc_scale(radius, radius, radius)
+    submit(mesh_id('sphere', slices, stacks))
+    rc_pop()
+
+
+def draw_cylinder(radius, height, slices=80, stacks=80):
+    """Draw an open cylinder along +Z (stacks don't change the flat-shaded result)"""
+    rc_push()
+    rc_scale(radius, radius, height)
+    submit(mesh_id('cylinder', slices))
+    rc_pop()
+
+
+def draw_cube(size):
+    """Draw a cube centred on the origin"""
+    rc_push()
+    rc_scale(size, size, size)
+    submit(mesh_id('cube'))
+    rc_pop()
 
 
 def draw_cloud(x, y, z, scale=1.0):
     """Draw a fluffy cloud made of multiple spheres"""
-    glColor3f(1.0, 1.0, 1.0)
-    glPushMatrix()
-    glTranslatef(x, y, z)
+    rc_color(1.0, 1.0, 1.0)
+    rc_push()
+    rc_translate(x, y, z)
     
     # Create a fluffy cloud effect with overlapping spheres
     for i in range(8):
-        glPushMatrix()
-        glTranslatef(-6 + i * 1.8, 0, 0)
+        rc_push()
+        rc_translate(-6 + i * 1.8, 0, 0)
         draw_sphere(3.5 * scale, slices=60, stacks=60)
-        glPopMatrix()
+        rc_pop()
     
-    glPopMatrix()
+    rc_pop()
 
 
 def draw_player_jet():
-    """Draw the player jet using hierarchical primitives"""
-    glPushMatrix()
-    glTranslatef(player_x, player_y, player_z)
+    """Draw the player's jet, and the wingman's in co-op"""
+    draw_jet(player_x, player_y, player_z, (0.7, 0.7, 0.7))
+    if coop:
+        draw_jet(wingman_x, wingman_y, player_z, (0.9, 0.55, 0.2))
+
+
+def draw_jet(x_pos, y_pos, z_pos, body_color):
+    """Draw one jet using hierarchical primitives"""
+    rc_push()
+    rc_translate(x_pos, y_pos, z_pos)
     
     # Rotate jet to face forward (-Z direction)
-    glRotatef(180, 0, 1, 0)
+    rc_rotate(180, 0, 1, 0)
     
     # Main Body (Fuselage)
-    glColor3f(0.7, 0.7, 0.7)  # Light gray
-    glPushMatrix()
-    glScalef(1.0, 0.6, 4.0)
+    rc_color(*body_color)  # Light gray for the player
+    rc_push()
+    rc_scale(1.0, 0.6, 4.0)
     draw_cube(5)
-    glPopMatrix()
+    rc_pop()
     
     # Cockpit
-    glColor3f(0.2, 0.4, 0.8)  # Blue glass
-    glPushMatrix()
-    glTranslatef(0, 1.5, 2)
-    glScalef(0.6, 0.4, 1.2)
+    rc_color(0.2, 0.4, 0.8)  # Blue glass
+    rc_push()
+    rc_translate(0, 1.5, 2)
+    rc_scale(0.6, 0.4, 1.2)
     draw_sphere(3)
-    glPopMatrix()
+    rc_pop()
     
     # Left Wing
-    glColor3f(0.5, 0.5, 0.5)
-    glPushMatrix()
-    glTranslatef(-6, 0, -1)
-    glScalef(2.5, 0.2, 1.5)
+    rc_color(0.5, 0.5, 0.5)
+    rc_push()
+    rc_translate(-6, 0, -1)
+    rc_scale(2.5, 0.2, 1.5)
     draw_cube(5)
-    glPopMatrix()
+    rc_pop()
     
     # Right Wing
-    glPushMatrix()
-    glTranslatef(6, 0, -1)
-    glScalef(2.5, 0.2, 1.5)
+    rc_push()
+    rc_translate(6, 0, -1)
+    rc_scale(2.5, 0.2, 1.5)
     draw_cube(5)
-    glPopMatrix()
+    rc_pop()
     
     # Tail Fin
-    glColor3f(0.6, 0.6, 0.6)
-    glPushMatrix()
-    glTranslatef(0, 3, -7)
-    glScalef(0.2, 1.5, 1.0)
+    rc_color(0.6, 0.6, 0.6)
+    rc_push()
+    rc_translate(0, 3, -7)
+    rc_scale(0.2, 1.5, 1.0)
     draw_cube(4)
-    glPopMatrix()
+    rc_pop()
     
     # Engines
-    glColor3f(0.2, 0.2, 0.2)
+    rc_color(0.2, 0.2, 0.2)
     # Left Engine
-    glPushMatrix()
-    glTranslatef(-2.5, -1, -8)
+    rc_push()
+    rc_translate(-2.5, -1, -8)
     draw_cylinder(1.5, 4)
-    glPopMatrix()
+    rc_pop()
     # Right Engine
-    glPushMatrix()
-    glTranslatef(2.5, -1, -8)
+    rc_push()
+    rc_translate(2.5, -1, -8)
     draw_cylinder(1.5, 4)
-    glPopMatrix()
+    rc_pop()
     
-    glPopMatrix()
+    rc_pop()
     
     # Draw Shield
     if player_shield:
-        glPushMatrix()
-        glTranslatef(player_x, player_y, player_z)
-        glColor3f(0.0, 0.5, 1.0)
+        rc_push()
+        rc_translate(x_pos, y_pos, z_pos)
+        rc_color(0.0, 0.5, 1.0)
         # glutWireSphere not allowed. Use solid gluSphere.
         # It might obscure the player, so we'll draw it small or rely on a different visual cue?
         # Let's draw it as a small "energy core" above the jet or a large solid sphere
         # If we draw a large solid sphere, we can't see the jet (no transparency).
         # Solution: Draw 4 small spheres rotating around the jet?
         # Or just one small sphere above it.
-        glPushMatrix()
-        glTranslatef(0, 5, 0)
+        rc_push()
+        rc_translate(0, 5, 0)
         draw_sphere(5)
-        glPopMatrix()
-        glPopMatrix()
+        rc_pop()
+        rc_pop()
 
 
 # ============ LEVEL RENDERING ============
 
+TERRAIN_SCROLL_SPEED = 180 # Ground units per second, matches obstacle speed at 60 ticks/sec
+TERRAIN_NEAR_Z = 200
+TERRAIN_FAR_Z = -1040
+TERRAIN_PREFETCH = 2 # Extra chunks requested beyond the far plane
+TERRAIN_CACHE_CHUNKS = 48
+terrain_streamer = None # Started on first draw
+
 def draw_common_sky(color):
     """Draw a large background quad for the sky"""
-    glPushMatrix()
-    glLoadIdentity()
+    rc_push()
+    rc_load_identity()
     background_z = -900
-    glBegin(GL_QUADS)
-    glColor3f(color[0], color[1], color[2])
-    glVertex3f(-1000, -1000, background_z)
-    glVertex3f(1000, -1000, background_z)
-    glVertex3f(1000, 1000, background_z)
-    glVertex3f(-1000, 1000, background_z)
-    glEnd()
-    glPopMatrix()
+    rc_translate(0, 0, background_z)
+    rc_scale(2000, 2000, 1)
+    rc_color(color[0], color[1], color[2])
+    submit(mesh_id('quad'))
+    rc_pop()
 
-def draw_moving_ground(color, grid_color):
-    """Draw the infinite scrolling ground grid"""
-    ground_offset = (elapsed_time * 180) % 40 
-    glPushMatrix()
-    glTranslatef(0, 0, ground_offset) 
-    for z in range(-1000, 200, 40):
-        glColor3f(color[0], color[1], color[2])
-        glBegin(GL_QUADS)
-        glVertex3f(-400, -100, z)
-        glVertex3f(400, -100, z)
-        glVertex3f(400, -100, z - 40)
-        glVertex3f(-400, -100, z - 40)
-        glEnd()
-        glColor3f(grid_color[0], grid_color[1], grid_color[2])
-        glBegin(GL_LINES)
-        glVertex3f(-400, -99, z)
-        glVertex3f(400, -99, z)
-        glEnd()
-    glPopMatrix()
+def draw_terrain(level, color, grid_color):
+    """Draw the streamed heightfield ground for a level, scrolling with elapsed time"""
+    global terrain_streamer
+    if terrain_streamer is None:
+        terrain_streamer = terrain.ChunkStreamer(TERRAIN_CACHE_CHUNKS)
+    
+    # Upload happens here on the render thread; chunks pushed out of the LRU free their meshes
+    for entry in terrain_streamer.collect():
+        if entry['meshes'] is not None:
+            for mid in entry['meshes']:
+                release_mesh(mid)
+    
+    theme = LEVEL_DEFS[level]['terrain']
+    scroll = elapsed_time * TERRAIN_SCROLL_SPEED
+    flat_mesh = mesh_id('ground_strip', terrain.HALF_WIDTH, 0, -terrain.CHUNK_LENGTH, 25)
+    flat_lines = mesh_id('ground_lines', terrain.HALF_WIDTH, 0, -terrain.CHUNK_LENGTH, 25)
+    for index in terrain.visible_chunks(scroll, TERRAIN_NEAR_Z, TERRAIN_FAR_Z, TERRAIN_PREFETCH):
+        key = (level, index)
+        terrain_streamer.request(key, theme)
+        chunk_z = scroll - index * terrain.CHUNK_LENGTH
+        if chunk_z < TERRAIN_FAR_Z:
+            continue # Prefetched, not in view yet
+        
+        entry = terrain_streamer.get(key)
+        if entry is None:
+            surface, lines = flat_mesh, flat_lines # Still building
+        else:
+            if entry['meshes'] is None:
+                entry['meshes'] = (register_mesh('terrain', GL_TRIANGLES, entry['triangles']),
+                                   register_mesh('terrain_lines', GL_LINES, entry['lines']))
+            surface, lines = entry['meshes']
+        
+        rc_push()
+        rc_translate(0, -100, chunk_z)
+        rc_color(color[0], color[1], color[2])
+        submit(surface)
+        rc_color(grid_color[0], grid_color[1], grid_color[2])
+        submit(lines)
+        rc_pop()
 
 def draw_level_1():
     """Level 1: Blue sky + green forest ground"""
     draw_common_sky((0.2, 0.6, 1.0))
-    draw_moving_ground((0.2, 0.6, 0.2), (0.1, 0.5, 0.1))
+    draw_terrain(0, (0.2, 0.6, 0.2), (0.1, 0.5, 0.1))
     draw_obstacles()
 
 def draw_level_2():
     """Level 2: Sunset sky + dark blue ocean ground"""
     draw_common_sky((1.0, 0.6, 0.3))
     # Draw a sun
-    glPushMatrix()
-    glTranslatef(-50, 60, -200)
-    glColor3f(1.0, 0.5, 0.0)
+    rc_push()
+    rc_translate(-50, 60, -200)
+    rc_color(1.0, 0.5, 0.0)
     draw_sphere(20)
-    glPopMatrix()
-    draw_moving_ground((0.1, 0.3, 0.6), (0.2, 0.5, 0.8))
+    rc_pop()
+    draw_terrain(1, (0.1, 0.3, 0.6), (0.2, 0.5, 0.8))
     draw_obstacles()
 
 def draw_level_3():
     """Level 3: Blue sky + orange desert ground"""
     draw_common_sky((0.4, 0.7, 1.0))
-    draw_moving_ground((1.0, 0.7, 0.3), (0.9, 0.8, 0.4))
+    draw_terrain(2, (1.0, 0.7, 0.3), (0.9, 0.8, 0.4))
     draw_obstacles()
 
 def draw_level_4():
     """Level 4: Purple sunset + green forest ground"""
     draw_common_sky((0.6, 0.3, 0.8))
-    glPushMatrix()
-    glTranslatef(60, 50, -200)
-    glColor3f(1.0, 0.4, 0.2)
+    rc_push()
+    rc_translate(60, 50, -200)
+    rc_color(1.0, 0.4, 0.2)
     draw_sphere(18)
-    glPopMatrix()
-    draw_moving_ground((0.3, 0.5, 0.2), (0.2, 0.4, 0.1))
+    rc_pop()
+    draw_terrain(3, (0.3, 0.5, 0.2), (0.2, 0.4, 0.1))
     draw_obstacles()
 
 def draw_level_5():
     """Level 5: Red sky (final boss level) + red volcanic ground"""
     draw_common_sky((1.0, 0.3, 0.2))
     # Large ominous boss indicator - Pushed very far back
-    glPushMatrix()
-    glTranslatef(0, 50, -1200) 
-    glColor3f(0.8, 0.0, 0.0)
+    rc_push()
+    rc_translate(0, 50, -1200) 
+    rc_color(0.8, 0.0, 0.0)
     draw_sphere(150)
-    glPopMatrix()
-    draw_moving_ground((0.8, 0.2, 0.1), (0.5, 0.1, 0.0))
+    rc_pop()
+    draw_terrain(4, (0.8, 0.2, 0.1), (0.5, 0.1, 0.0))
     draw_obstacles()
 
 
@@ -448,7 +1280,9 @@ def draw_level_select():
         gluPerspective(45, (WINDOW_WIDTH / WINDOW_HEIGHT), 0.1, 1000.0)
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
+        rc_begin_frame()
         levels[selected_level]()
+        execute_render_commands(np.identity(4, dtype=np.float32))
     
     # Draw semi-transparent overlay (2D)
     glMatrixMode(GL_PROJECTION)
@@ -599,7 +1433,7 @@ def draw_hud():
     glPopMatrix()
     
     # 5. Boss HP
-    if current_level == 4 and boss and boss['active']:
+    if current_level == BOSS_LEVEL and boss and boss['active']:
         boss_pct = max(0, boss['hp'] / boss['max_hp'])
         bx, by = WINDOW_WIDTH // 2 - 200, 50
         bw, bh = 400, 20
@@ -622,45 +1456,84 @@ def draw_hud():
     if cheat_mode:
         draw_text_with_border("CHEAT MODE", 100, WINDOW_HEIGHT - 30, (1,1,0), centered=True)
     
+    # 7. Split-screen divider
+    if coop:
+        glColor3f(0.0, 0.0, 0.0)
+        glBegin(GL_QUADS)
+        glVertex3f(WINDOW_WIDTH / 2 - 2, 0, 0); glVertex3f(WINDOW_WIDTH / 2 + 2, 0, 0)
+        glVertex3f(WINDOW_WIDTH / 2 + 2, WINDOW_HEIGHT, 0); glVertex3f(WINDOW_WIDTH / 2 - 2, WINDOW_HEIGHT, 0)
+        glEnd()
+        draw_text_with_border("P2", WINDOW_WIDTH - 40, WINDOW_HEIGHT - 30, (0.9, 0.55, 0.2), centered=True)
+    
+    # 8. Perf Overlay
+    if show_perf_overlay:
+        draw_perf_overlay()
+    
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
 
+def perf_overlay_lines():
+    """Text lines for the perf overlay (toggled with P)"""
+    stats = frame_histogram.summary()
+    return [
+        f"frame p50 {stats['p50']:.1f} ms  p99 {stats['p99']:.1f} ms  max {stats['max']:.1f} ms",
+        f"draw cmds {render_stats['commands']} (culled {render_stats['culled']})  state changes {render_stats['state_changes_before']}"
+        f" -> {render_stats['state_changes_after']}",
+        "entities " + " ".join(f"{k}:{v}" for k, v in entity_counts().items()),
+        "budget " + (" ".join(f"{k}:-{v['skipped']}/x{v['evicted']}" for k, v in budget_summary().items()) or "ok"),
+        f"autosave {snapshot_stats['saves']}x  {snapshot_stats['bytes']} B  {snapshot_stats['pack_ms']:.2f} ms",
+        f"resolution {resolution_stats['width']}x{resolution_stats['height']} ({render_scale:.0%}"
+        f"{', dynamic' if dynamic_resolution else ''})  scene {resolution_stats['scene_ms']:.2f} ms {resolution_stats['source']}"
+        f"  changes {resolution_stats['changes']}",
+        f"gl profile {gl_profile}" + (f"  {gl_calls_last_frame} calls/frame" if gl_call_counts is not None else ""),
+    ]
+
+
+def draw_perf_overlay():
+    """Draw profiler counters in the top-left corner"""
+    for i, line in enumerate(perf_overlay_lines()):
+        draw_text_2d(line, 20, 110 + i * 18, (1.0, 1.0, 1.0), font=GLUT_BITMAP_HELVETICA_12)
+
+
 def draw_circle_fan(radius, angle_deg):
-    """Draw a filled circle sector using allowed primitives"""
-    glBegin(GL_TRIANGLE_FAN)
-    glVertex3f(0, 0, 0) # Center
-    
-    # Segments
-    segments = int(angle_deg / 10) + 1
-    for i in range(segments + 1):
-        theta = math.radians(min(angle_deg, i * 10))
-        # Note: In HUD (Ortho2D), Y is down. Cos/Sin calculation:
-        # 0 deg = Right (X+). 90 deg = Down (Y+).
-        x = radius * math.cos(theta)
-        y = radius * math.sin(theta)
-        glVertex3f(x, y, 0)
-        
-    glEnd()
+    """Draw a filled circle sector by slicing the cached unit fan"""
+    # Note: In HUD (Ortho2D), Y is down. 0 deg = Right (X+). 90 deg = Down (Y+).
+    vertices = geometry_tables.pie_fan(angle_deg / 360.0)
+    glPushMatrix()
+    glScalef(radius, radius, 1)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, vertices)
+    glDrawArrays(GL_TRIANGLE_FAN, 0, len(vertices))
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glPopMatrix()
 
 
 def reset_game():
     """Reset all game variables for a new run"""
-    global player_hp, player_x, player_y, player_vx, player_vy, bullets, enemy_bullets, enemies, obstacles, score, rings, pickups, boss
+    global player_hp, player_x, player_y, player_vx, player_vy, bullets, spent_bullets, obstacles, score, boss
+    global wingman_x, wingman_y, wingman_vx, wingman_vy
     player_hp = 100
-    player_x = 0
+    player_x = -WINGMAN_START_X if coop else 0
     player_y = 0
     player_vx = 0
     player_vy = 0
+    wingman_x = WINGMAN_START_X
+    wingman_y = 0
+    wingman_vx = 0
+    wingman_vy = 0
     score = 0
     bullets = []
-    enemy_bullets = []
-    enemies = []
+    spent_bullets = 0
+    enemy_bullets.clear()
+    enemies.clear()
     obstacles = []
-    rings = []
-    pickups = []
+    collectibles.clear()
     boss = None
+    for pool in particle_pools.values():
+        pool.clear()
+    start_level_timeline(current_level)
 
 def draw_game_over():
     """Draw Game Over screen"""
@@ -678,7 +1551,7 @@ def draw_game_over():
     
     msg = "GAME OVER"
     color = (1.0, 0.0, 0.0)
-    if current_level == 4 and boss and not boss['active']:
+    if current_level == BOSS_LEVEL and boss and not boss['active']:
         msg = "VICTORY!"
         color = (0.0, 1.0, 0.0)
     
@@ -692,79 +1565,505 @@ def draw_game_over():
                  text_color=(1.0, 1.0, 1.0), font=GLUT_BITMAP_TIMES_ROMAN_24, centered=True)
 
 
-# ============ DISPLAY & CALLBACKS ============
+# ============ PROFILING ============
 
-def display():
-    """Display callback"""
-    global elapsed_time, last_time
-    
-    # Update elapsed time
-    current_time = time.time()
-    delta_time = current_time - last_time
-    last_time = current_time
-    
-    if game_state == PLAYING and not paused:
-        elapsed_time += delta_time
-    
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(45, (WINDOW_WIDTH / WINDOW_HEIGHT), 0.1, 1000.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()  # Reset the modelview matrix before applying camera transforms
-    
-    if game_state == MENU:
-        draw_menu()
-    elif game_state == LEVEL_SELECT:
-        draw_level_select()
-    elif game_state == PLAYING:
-        # Set up camera: Third-person behind the jet
-        # Look from behind the player (further back in Z)
-        gluLookAt(0, 20, 100,  # Eye position
-                  0, 0, -100,  # Center position (looking forward)
-                  0, 1, 0)     # Up vector
-        
-        draw_current_level()
-        draw_player_jet()
-        draw_enemies()
-        if current_level == 4:
-            draw_boss()
-        draw_pickups()
-        draw_rings()
-        draw_bullets()
-        draw_missiles()
-        draw_hud()
-        
-        if paused:
-            draw_pause_menu()
-    elif game_state == GAME_OVER:
-        draw_game_over()
-    
-    glutSwapBuffers()
+# Frame-time tracking: anything slower than the threshold is a "hitch" and
+# dumps a context snapshot to HITCH_DIR so it can be diagnosed after the session.
+HITCH_THRESHOLD_MS = 50.0
+HITCH_COOLDOWN = 1.0  # Seconds between snapshots so a bad patch doesn't flood the disk
+HITCH_DIR = "hitches"
+PROFILE_SCOPE_HISTORY = 64
 
+profile_scopes = deque(maxlen=PROFILE_SCOPE_HISTORY)  # (name, duration_ms)
+last_hitch_time = 0.0
+hitch_count = 0
+telemetry_writer = None  # Ring buffer for external dashboards (see telemetry.py)
+last_frame_start = 0.0
+gl_calls_seen = 0
+BENCHMARK_SKIP_FRAMES = 10  # Left out of --benchmark results while drivers settle
+benchmark = None  # {'frames', 'display_ms', 'gl_calls'} with --benchmark
 
-def mouse(button, state, x, y):
-    """Mouse callback for shooting"""
-    global game_state, bullets
-    
+
+class FrameTimeHistogram:
+    """HDR-style histogram: log2 magnitude buckets with linear sub-buckets (~1.5% precision)"""
+
+    SUB_BITS = 7
+    HALF = 1 << (SUB_BITS - 1)
+
+    def __init__(self, max_us=60_000_000):
+        self.counts = [0] * (self._index(max_us) + 1)
+        self.max_us = max_us
+        self.total = 0
+        self.max_seen = 0
+
+    def _index(self, value):
+        magnitude = value.bit_length() - self.SUB_BITS
+        if magnitude <= 0:
+            return value
+        return magnitude * self.HALF + (value >> magnitude)
+
+    def _value(self, index):
+        # Highest value that lands in this bucket
+        if index < 2 * self.HALF:
+            return index
+        magnitude = index // self.HALF - 1
+        sub = index - magnitude * self.HALF
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, ms):
+        value = min(self.max_us, max(0, int(ms * 1000)))
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.max_seen = max(self.max_seen, value)
+
+    def percentile(self, pct):
+        """Frame time in ms at the given percentile (0-100)"""
+        if self.total == 0:
+            return 0.0
+        target = max(1, math.ceil(self.total * pct / 100.0))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(self._value(index), self.max_seen) / 1000.0
+        return self.max_seen / 1000.0
+
+    def summary(self):
+        return {
+            'frames': self.total,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p99.9': self.percentile(99.9),
+            'max': self.max_seen / 1000.0,
+        }
+
+
+frame_histogram = FrameTimeHistogram()
+
+
+@contextmanager
+def profile_scope(name):
+    """Time a block and keep it in the recent-scope ring for hitch snapshots"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile_scopes.append((name, (time.perf_counter() - start) * 1000.0))
+
+
+def entity_counts():
+    """Live entity count per world list"""
+    return {
+        'obstacles': len(obstacles),
+        'enemies': len(enemies),
+        'enemy_bullets': len(enemy_bullets),
+        'bullets': len(bullets),
+        'missiles': len(missiles),
+        'collectibles': len(collectibles),
+        'particles': particle_count(),
+    }
+
+
+def capture_hitch(frame_ms):
+    """Write the game context around a slow frame to HITCH_DIR"""
+    global hitch_count
+    state_names = {MENU: 'MENU', LEVEL_SELECT: 'LEVEL_SELECT', PLAYING: 'PLAYING',
+                   GAME_OVER: 'GAME_OVER', PAUSED: 'PAUSED'}
+    snapshot = {
+        'time': time.time(),
+        'frame_ms': frame_ms,
+        'threshold_ms': HITCH_THRESHOLD_MS,
+        'game_state': state_names.get(game_state, game_state),
+        'paused': paused,
+        'current_level': current_level,
+        'score': score,
+        'player_hp': player_hp,
+        'entities': entity_counts(),
+        'budgets': budget_summary(),
+        'render': dict(render_stats),
+        'boss': None if not boss else {
+            'hp': boss['hp'],
+            'phase': boss.get('phase', 0),
+            'active': boss['active'],
+        },
+        'scopes': [{'name': name, 'ms': round(ms, 3)} for name, ms in profile_scopes],
+    }
+    hitch_count += 1
+    try:
+        os.makedirs(HITCH_DIR, exist_ok=True)
+        path = os.path.join(HITCH_DIR, f"hitch_{int(snapshot['time'] * 1000)}_{hitch_count}.json")
+        with open(path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        print(f"Hitch: {frame_ms:.1f} ms -> {path}")
+    except OSError as e:
+        print(f"Hitch: {frame_ms:.1f} ms (snapshot failed: {e})")
+
+
+def publish_telemetry(frame_start, frame_time, tick_ms, frame_ms):
+    """Write this frame's record into the telemetry ring (--telemetry); frame_time is wall-clock at frame start"""
+    global last_frame_start
+    interval = frame_start - last_frame_start
+    last_frame_start = frame_start
+    telemetry_writer.publish(
+        time=frame_time, frame_ms=frame_ms, tick_ms=tick_ms, fps=1.0 / interval if interval > 0 else 0.0,
+        game_state=game_state, level=current_level, paused=paused, player_hp=player_hp, score=score,
+        **entity_counts())
+
+
+def record_frame(frame_ms):
+    """Feed one frame time into the histogram and the hitch detector"""
+    global last_hitch_time
+    frame_histogram.record(frame_ms)
+    if frame_ms > HITCH_THRESHOLD_MS:
+        now = time.time()
+        if now - last_hitch_time >= HITCH_COOLDOWN:
+            last_hitch_time = now
+            capture_hitch(frame_ms)
+
+
+def update_gl_call_stats():
+    """Calls made since the previous frame (debug profile only)"""
+    global gl_calls_last_frame, gl_calls_seen
+    total = sum(gl_call_counts.values())
+    gl_calls_last_frame = total - gl_calls_seen
+    gl_calls_seen = total
+
+
+def record_benchmark_frame(display_ms):
+    """Collect one --benchmark frame; prints the result line and exits after the last"""
+    benchmark['display_ms'].append(display_ms)
+    benchmark['gl_calls'].append(gl_calls_last_frame)
+    if len(benchmark['display_ms']) >= benchmark['frames']:
+        print_benchmark_report()
+        sys.exit()
+
+
+def print_benchmark_report():
+    """One 'Benchmark: {json}' line for glbench.py to parse"""
+    display_ms = np.array(benchmark['display_ms'][BENCHMARK_SKIP_FRAMES:] or benchmark['display_ms'])
+    gl_calls = benchmark['gl_calls'][BENCHMARK_SKIP_FRAMES:] or benchmark['gl_calls']
+    result = {
+        'profile': gl_profile,
+        'renderer': type(render_backend).__name__,
+        'frames': len(display_ms),
+        'display_mean': float(display_ms.mean()),
+        'display_p50': float(np.percentile(display_ms, 50)),
+        'display_p99': float(np.percentile(display_ms, 99)),
+        'gl_calls_per_frame': float(np.mean(gl_calls)) if gl_call_counts is not None else None,
+    }
+    print("Benchmark: " + json.dumps(result))
+
+
+def print_frame_report():
+    """Print frame-time percentiles (registered with atexit)"""
+    stats = frame_histogram.summary()
+    if stats['frames'] == 0:
+        return
+    print(f"Frames: {stats['frames']}  p50 {stats['p50']:.2f} ms  p90 {stats['p90']:.2f} ms  "
+          f"p99 {stats['p99']:.2f} ms  p99.9 {stats['p99.9']:.2f} ms  max {stats['max']:.2f} ms  "
+          f"hitches: {hitch_count}")
+    for kind, counts in budget_summary().items():
+        print(f"Budget {kind}: {counts['skipped']} spawns skipped, {counts['evicted']} evicted")
+    if gl_call_counts:
+        frames = max(1, stats['frames'])
+        top = ", ".join(f"{name} {count / frames:.0f}" for name, count in gl_call_counts.most_common(8))
+        print(f"GL calls: {sum(gl_call_counts.values()) / frames:.0f}/frame  top: {top}")
+    late = list(mesh_ids)[startup_stats.get('warm_meshes', len(mesh_ids)):]
+    if late:
+        print(f"Meshes built after warmup (add them to WARM_MESHES): {late}")
+
+
+# ============ DYNAMIC RESOLUTION ============
+
+# The 3D scene can render into an offscreen framebuffer at render_scale times
+# the window size and be stretched (linear filtering) onto the window; the HUD
+# is drawn afterwards straight to the window, so text stays sharp. With
+# dynamic resolution on, the scale follows the GPU time of the scene pass (GL
+# timer queries, or the CPU draw time where they're missing): a run of frames
+# over budget steps it down, a longer run well under budget steps it back up.
+RENDER_SCALE_MIN = 0.5
+RENDER_SCALE_MAX = 1.0
+RENDER_SCALE_STEP = 0.125
+SCENE_BUDGET_MS = 10.0    # Scene pass target; leaves room for the HUD and update in a 60 Hz frame
+SCALE_DOWN_FRAMES = 8     # Consecutive frames over budget before dropping resolution
+SCALE_UP_FRAMES = 90      # Consecutive frames under SCALE_UP_HEADROOM * budget before raising it
+SCALE_UP_HEADROOM = 0.7
+GPU_TIMER_QUERIES = 4     # Timer results are read a few frames late so the CPU never waits on them
+
+dynamic_resolution = False
+render_scale = 1.0
+scene_target = None   # {'fbo', 'color', 'depth', 'width', 'height'} while rendering offscreen
+scene_timer = None    # GpuTimer, or False once timer queries turned out to be unsupported
+scene_cpu_start = 0.0
+resolution_stats = {'scene_ms': 0.0, 'source': 'cpu', 'width': WINDOW_WIDTH, 'height': WINDOW_HEIGHT,
+                    'over': 0, 'under': 0, 'changes': 0}
+
+
+class GpuTimer:
+    """Ring of GL_TIME_ELAPSED queries around the scene pass"""
+
+    def __init__(self, size=GPU_TIMER_QUERIES):
+        self.queries = list(glGenQueries(size))
+        self.pending = deque()  # Queries begun and not yet read, oldest first
+        self.active = None
+
+    def begin(self):
+        if len(self.pending) == len(self.queries):
+            return  # Every query still in flight; skip timing this frame
+        self.active = next(q for q in self.queries if q not in self.pending)
+        glBeginQuery(GL_TIME_ELAPSED, self.active)
+
+    def end(self):
+        if self.active is not None:
+            glEndQuery(GL_TIME_ELAPSED)
+            self.pending.append(self.active)
+            self.active = None
+
+    def poll(self):
+        """Milliseconds of the newest finished query, or None if nothing has finished"""
+        ms = None
+        while self.pending and glGetQueryObjectiv(self.pending[0], GL_QUERY_RESULT_AVAILABLE):
+            # 32-bit nanoseconds cover a 4 s pass, and PyOpenGL's ui64v wrapper lacks a type mapping
+            ms = int(glGetQueryObjectuiv(self.pending.popleft(), GL_QUERY_RESULT)) / 1e6
+        return ms
+
+
+def create_scene_target(width, height):
+    """Framebuffer with color and depth renderbuffers of the given size"""
+    fbo = glGenFramebuffers(1)
+    color, depth = glGenRenderbuffers(2)
+    glBindRenderbuffer(GL_RENDERBUFFER, color)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+    glBindRenderbuffer(GL_RENDERBUFFER, depth)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+    glBindRenderbuffer(GL_RENDERBUFFER, 0)
+    glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+    status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    target = {'fbo': fbo, 'color': color, 'depth': depth, 'width': width, 'height': height}
+    if status != GL_FRAMEBUFFER_COMPLETE:
+        release_scene_target(target)
+        raise RuntimeError(f"framebuffer incomplete (0x{int(status):x})")
+    return target
+
+
+def release_scene_target(target):
+    glDeleteFramebuffers(1, [target['fbo']])
+    glDeleteRenderbuffers(2, [target['color'], target['depth']])
+
+
+def scene_size():
+    """Offscreen resolution for the current window size and render scale"""
+    return max(1, round(WINDOW_WIDTH * render_scale)), max(1, round(WINDOW_HEIGHT * render_scale))
+
+
+def begin_scene():
+    """Bind the render target for the 3D pass and return its scale relative to the window"""
+    global scene_target, scene_timer, scene_cpu_start, dynamic_resolution, render_scale
+    scene_cpu_start = time.perf_counter()
+    if scene_timer is None and dynamic_resolution:
+        try:
+            scene_timer = GpuTimer()
+        except Exception as e:  # No GL 3.3 / ARB_timer_query: steer by CPU time instead
+            print(f"GPU timer queries unavailable ({e}); dynamic resolution uses CPU draw time")
+            scene_timer = False
+    if scene_timer:
+        scene_timer.begin()
+    
+    width, height = scene_size()
+    resolution_stats['width'], resolution_stats['height'] = width, height
+    if render_scale >= 1.0:
+        # Full resolution goes straight to the window and skips the blit
+        if scene_target is not None:
+            release_scene_target(scene_target)
+            scene_target = None
+        return 1.0
+    if scene_target is None or (scene_target['width'], scene_target['height']) != (width, height):
+        if scene_target is not None:
+            release_scene_target(scene_target)
+            scene_target = None
+        try:
+            scene_target = create_scene_target(width, height)
+        except Exception as e:
+            print(f"Offscreen rendering unavailable ({e}); rendering at full resolution")
+            dynamic_resolution = False
+            render_scale = 1.0
+            return 1.0
+    glBindFramebuffer(GL_FRAMEBUFFER, scene_target['fbo'])
+    glViewport(0, 0, width, height)
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    return width / WINDOW_WIDTH
+
+
+def end_scene():
+    """Upscale the offscreen scene onto the window and feed the scale controller"""
+    if scene_target is not None:
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, scene_target['fbo'])
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        glBlitFramebuffer(0, 0, scene_target['width'], scene_target['height'],
+                          0, 0, WINDOW_WIDTH, WINDOW_HEIGHT, GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    if scene_timer:
+        scene_timer.end()
+        scene_ms = scene_timer.poll()
+        source = 'gpu'
+    else:
+        scene_ms = (time.perf_counter() - scene_cpu_start) * 1000.0
+        source = 'cpu'
+    if scene_ms is not None:
+        resolution_stats['scene_ms'] = scene_ms
+        resolution_stats['source'] = source
+        if dynamic_resolution:
+            update_render_scale(scene_ms)
+
+
+def update_render_scale(scene_ms):
+    """Step render_scale by one notch after a sustained run over or under budget"""
+    global render_scale
+    stats = resolution_stats
+    stats['over'] = stats['over'] + 1 if scene_ms > SCENE_BUDGET_MS else 0
+    stats['under'] = stats['under'] + 1 if scene_ms < SCENE_BUDGET_MS * SCALE_UP_HEADROOM else 0
+    scale = render_scale
+    if stats['over'] >= SCALE_DOWN_FRAMES:
+        scale = max(RENDER_SCALE_MIN, render_scale - RENDER_SCALE_STEP)
+    elif stats['under'] >= SCALE_UP_FRAMES:
+        scale = min(RENDER_SCALE_MAX, render_scale + RENDER_SCALE_STEP)
+    if scale != render_scale:
+        render_scale = scale
+        stats['over'] = stats['under'] = 0
+        stats['changes'] += 1
+
+
+# ============ DISPLAY & CALLBACKS ============
+
+def build_scene_commands():
+    """Fill the command buffer with the world for the current frame"""
+    rc_begin_frame()
+    draw_current_level()
+    draw_player_jet()
+    draw_enemies()
+    if current_level == BOSS_LEVEL:
+        draw_boss()
+    draw_collectibles()
+    draw_bullets()
+    draw_missiles()
+
+
+def measure_draw_cost():
+    """Run the draw layer on the current state through a NullBackend and return its counts"""
+    backend = NullBackend()
+    build_scene_commands()
+    view = np.identity(4, dtype=np.float32)
+    backend.execute(sort_render_commands(render_commands, view) if render_sorting else render_commands, view)
+    return backend.stats
+
+
+def camera_views():
+    """(viewport, view matrix) pairs: the whole window, or one half per jet in co-op"""
+    if not coop:
+        # Set up camera: Third-person behind the jet
+        # Look from behind the player (further back in Z)
+        view = look_at((0, 20, 100),   # Eye position
+                       (0, 0, -100),   # Center position (looking forward)
+                       (0, 1, 0))      # Up vector
+        return [((0, 0, WINDOW_WIDTH, WINDOW_HEIGHT), view)]
+    half = WINDOW_WIDTH // 2
+    # Each half follows its own jet sideways
+    return [((i * half, 0, half, WINDOW_HEIGHT), look_at((x, 20, z + 100), (x, 0, z - 100), (0, 1, 0)))
+            for i, (x, y, z) in enumerate(jet_positions())]
+
+
+def display():
+    """Display callback"""
+    global elapsed_time, last_time
+    
+    if loading is not None:
+        draw_loading_screen(*loading)
+        glutSwapBuffers()
+        return
+    
+    # Update elapsed time
+    current_time = time.time()
+    delta_time = current_time - last_time
+    last_time = current_time
+    
     if game_state == PLAYING and not paused:
+        elapsed_time += delta_time
+    
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(45, (WINDOW_WIDTH / WINDOW_HEIGHT), 0.1, 1000.0)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()  # Reset the modelview matrix before applying camera transforms
+    
+    if game_state == MENU:
+        draw_menu()
+    elif game_state == LEVEL_SELECT:
+        draw_level_select()
+    elif game_state == PLAYING:
+        # The world is built into one command buffer; each viewport only
+        # sets its camera, then culls, sorts and submits that shared buffer
+        build_scene_commands()
+        bounds = render_bounds(render_commands)
+        particles = particle_batches()
+        scale = begin_scene()
+        for (x, y, width, height), view in camera_views():
+            # Viewports are in window pixels; the aspect comes from the window, not the rounded target
+            glViewport(round(x * scale), round(y * scale), max(1, round(width * scale)), max(1, round(height * scale)))
+            glMatrixMode(GL_PROJECTION)
+            glLoadIdentity()
+            gluPerspective(CAMERA_FOVY, width / height, CAMERA_NEAR, CAMERA_FAR)
+            glMatrixMode(GL_MODELVIEW)
+            execute_render_commands(view, width / height, bounds)
+            draw_particles(particles, scale)
+        end_scene()
+        glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+        draw_hud()
+        
+        if replay_reader is not None:
+            draw_replay_status()
+        elif paused:
+            draw_pause_menu()
+    elif game_state == GAME_OVER:
+        draw_game_over()
+    
+    glutSwapBuffers()
+
+
+def mouse(button, state, x, y):
+    """Mouse callback for shooting"""
+    global game_state
+    
+    if game_state == PLAYING and not paused and replay_reader is None:
         if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-            # Spawn bullet or laser
-            b_type = 'laser' if laser_active else 'normal'
-            bullets.append({
-                'x': player_x,
-                'y': player_y,
-                'z': player_z, # Start exactly at player
-                'type': b_type
-            })
+            fire_bullet(player_x, player_y)
         elif button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
-            spawn_missiles()
+            spawn_missiles(player_x, player_y)
+
+def fire_bullet(x_pos, y_pos):
+    """Spawn a bullet (or laser while the power-up lasts) from a jet"""
+    b_type = 'laser' if laser_active else 'normal'
+    evict_leading_bullets(1)
+    bullets.append({
+        'x': x_pos,
+        'y': y_pos,
+        'z': player_z, # Start exactly at the jet
+        'type': b_type,
+        'active': True
+    })
 
 def keyboard(key, x, y):
     """Keyboard callback"""
     global game_state, selected_level, current_level, paused, player_x, player_y, player_vx, player_vy
     
     key = key.lower()
+    if replay_reader is not None:
+        replay_keyboard(key)
+        return
     
     if key == b'\x1b':  # ESC
         if game_state == PLAYING:
@@ -801,616 +2100,1018 @@ def keyboard(key, x, y):
         global cheat_mode
         cheat_mode = not cheat_mode
         print(f"Cheat Mode: {cheat_mode}")
+    
+    elif key == b'p': # Perf Overlay Toggle
+        global show_perf_overlay
+        show_perf_overlay = not show_perf_overlay
             
+    # Wingman weapons
+    if coop and game_state == PLAYING and not paused:
+        if key == b'.':
+            fire_bullet(wingman_x, wingman_y)
+        elif key == b',':
+            spawn_missiles(wingman_x, wingman_y)
+    
     # Apply acceleration (Inertia movement)
-    accel = 3.0 
     if game_state == PLAYING and not paused:
-        if key == b'w': player_vy += accel
-        if key == b'a': player_vx -= accel
-        if key == b's': player_vy -= accel
-        if key == b'd': player_vx += accel
+        if key == b'w': player_vy += PLAYER_ACCEL
+        if key == b'a': player_vx -= PLAYER_ACCEL
+        if key == b's': player_vy -= PLAYER_ACCEL
+        if key == b'd': player_vx += PLAYER_ACCEL
         
         # Velocity clamping
-        max_v = 4.0
-        player_vx = max(-max_v, min(max_v, player_vx))
-        player_vy = max(-max_v, min(max_v, player_vy))
+        player_vx = max(-PLAYER_MAX_SPEED, min(PLAYER_MAX_SPEED, player_vx))
+        player_vy = max(-PLAYER_MAX_SPEED, min(PLAYER_MAX_SPEED, player_vy))
 
 
 def special(key, x, y):
     """Special keys callback (arrows)"""
     global selected_level
     
-    if game_state == LEVEL_SELECT:
+    if replay_reader is not None:
+        replay_special(key)
+    elif game_state == LEVEL_SELECT:
         if key == GLUT_KEY_LEFT:
             selected_level = max(0, selected_level - 1)
         elif key == GLUT_KEY_RIGHT:
             selected_level = min(4, selected_level + 1)
+    elif coop and game_state == PLAYING and not paused and key in (GLUT_KEY_UP, GLUT_KEY_DOWN, GLUT_KEY_LEFT, GLUT_KEY_RIGHT):
+        # Wingman flies on the arrows with the same inertia as the player
+        global wingman_vx, wingman_vy
+        if key == GLUT_KEY_UP: wingman_vy += PLAYER_ACCEL
+        if key == GLUT_KEY_DOWN: wingman_vy -= PLAYER_ACCEL
+        if key == GLUT_KEY_LEFT: wingman_vx -= PLAYER_ACCEL
+        if key == GLUT_KEY_RIGHT: wingman_vx += PLAYER_ACCEL
+        wingman_vx = max(-PLAYER_MAX_SPEED, min(PLAYER_MAX_SPEED, wingman_vx))
+        wingman_vy = max(-PLAYER_MAX_SPEED, min(PLAYER_MAX_SPEED, wingman_vy))
+    elif game_state == PLAYING and key == GLUT_KEY_F5:
+        # Quick snapshot for debugging; load it with --resume PATH
+        path = os.path.join(SNAPSHOT_DIR, f"snapshot_{int(time.time() * 1000)}.sqs")
+        try:
+            size = write_snapshot(path)
+            print(f"Snapshot: {size} bytes in {snapshot_stats['pack_ms']:.2f} ms -> {path}")
+        except OSError as e:
+            print(f"Snapshot failed: {e}")
 
 
-def spawn_pickup():
-    """Randomly spawn power-ups"""
-    if random.random() < 0.02: # Frequent (was 0.005)
-        p_type = random.choice(['health', 'shield', 'laser'])
-        
-        pickups.append({
-            'x': random.uniform(-60, 60),
-            'y': random.uniform(-30, 30),
-            'z': -800,
-            'type': p_type,
-            'rot': 0,
-            'active': True
-        })
+# ============ SPAWN TIMELINES ============
+
+# Each level's spawns are precomputed into a tick-sorted timeline that the sim
+# walks with a cursor, so spawning costs O(spawns) instead of a dice roll per
+# kind per tick. Timelines are stored as packed parallel arrays and cached on disk.
+SPAWN_OBSTACLE = 0
+SPAWN_ENEMY = 1
+SPAWN_PICKUP = 2
+SPAWN_RING = 3
+SPAWN_KINDS = ['obstacles', 'enemies', 'pickups', 'rings']
+
+TIMELINE_TICKS = 60 * 60 * 3  # 3 minutes at 60 ticks/sec, then the timeline loops
+TIMELINE_VARIANTS = 4  # Precomputed seeds per level so runs don't repeat exactly
+TIMELINE_VERSION = 1
+SPAWN_CACHE_DIR = "cache"
+
+spawn_timeline = None
+spawn_variant = 0
+spawn_cursor = 0
+level_tick = 0
+
+
+def spawn_gaps(rng, density, length):
+    """Yield event ticks for a per-tick spawn probability (geometric gaps)"""
+    if density <= 0:
+        return
+    log_q = math.log(1.0 - density)
+    tick = 0
+    while True:
+        tick += int(math.log(1.0 - rng.random()) / log_q) + 1
+        if tick >= length:
+            return
+        yield tick
 
-def update_pickups():
-    """Move pickups and check collisions"""
-    global player_hp, player_shield, laser_active, laser_timer
+
+def build_spawn_timeline(level, variant):
+    """Generate the tick-sorted spawn timeline for one level variant"""
+    level_def = LEVEL_DEFS[level]
+    rng = random.Random(level * 1000 + variant)
+    events = []  # (tick, kind, type_index, x, y)
+    
+    obs = level_def['obstacles']
+    for tick in spawn_gaps(rng, obs['density'], TIMELINE_TICKS):
+        type_index = rng.randrange(len(obs['types']))
+        if obs['pattern'] == 'tunnel' and rng.random() < 0.7:
+            # Side spawn, creating a "tunnel" effect
+            x_pos = rng.uniform(-120, -30) if rng.random() < 0.5 else rng.uniform(30, 120)
+        else:
+            # Occasional center obstacle
+            x_pos = rng.uniform(-30, 30)
+        events.append((tick, SPAWN_OBSTACLE, type_index, x_pos, -100.0))
+    
+    en = level_def['enemies']
+    for tick in spawn_gaps(rng, en['density'], TIMELINE_TICKS):
+        type_index = rng.randrange(len(en['types']))
+        x_lo, x_hi = ENEMY_BOX['x']
+        y_lo, y_hi = ENEMY_BOX['y']
+        if en['pattern'] == 'wave':
+            # V formation around a leader, all the same type
+            size = en.get('size', 3)
+            lead_x = rng.uniform(x_lo + 20, x_hi - 20)
+            lead_y = rng.uniform(y_lo, y_hi)
+            for i in range(size):
+                offset = (i + 1) // 2 * (1 if i % 2 else -1)
+                events.append((tick, SPAWN_ENEMY, type_index,
+                               max(x_lo, min(x_hi, lead_x + offset * 15)),
+                               max(y_lo, min(y_hi, lead_y + abs(offset) * 8))))
+        else:
+            events.append((tick, SPAWN_ENEMY, type_index, rng.uniform(x_lo, x_hi), rng.uniform(y_lo, y_hi)))
+    
+    for kind, key in ((SPAWN_PICKUP, 'pickups'), (SPAWN_RING, 'rings')):
+        spec = level_def[key]
+        types = spec.get('types', [None])
+        for tick in spawn_gaps(rng, spec['density'], TIMELINE_TICKS):
+            type_index = rng.randrange(len(types))
+            events.append((tick, kind, type_index,
+                           rng.uniform(*SCATTER_BOX['x']), rng.uniform(*SCATTER_BOX['y'])))
+    
+    events.sort(key=lambda e: (e[0], e[1]))
+    return {
+        'ticks': array('I', [e[0] for e in events]),
+        'kinds': array('B', [e[1] for e in events]),
+        'types': array('B', [e[2] for e in events]),
+        'xs': array('f', [e[3] for e in events]),
+        'ys': array('f', [e[4] for e in events]),
+    }
+
+
+def spawn_timeline_path(level, variant):
+    """Cache file for a level variant, keyed by a hash of its definition"""
+    key = json.dumps([TIMELINE_VERSION, TIMELINE_TICKS, level, variant, LEVEL_DEFS[level]], sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(SPAWN_CACHE_DIR, f"spawn_l{level + 1}_v{variant}_{digest}.bin")
+
+
+def load_spawn_timeline(level, variant):
+    """Load a timeline from the disk cache, building and caching it on a miss"""
+    path = spawn_timeline_path(level, variant)
+    fields = [('ticks', 'I'), ('kinds', 'B'), ('types', 'B'), ('xs', 'f'), ('ys', 'f')]
+    try:
+        with open(path, 'rb') as f:
+            count = array('I', f.read(4))[0]
+            timeline = {}
+            for name, code in fields:
+                timeline[name] = array(code)
+                timeline[name].fromfile(f, count)
+            return timeline
+    except (OSError, EOFError, IndexError):
+        pass
+    
+    timeline = build_spawn_timeline(level, variant)
+    try:
+        os.makedirs(SPAWN_CACHE_DIR, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            array('I', [len(timeline['ticks'])]).tofile(f)
+            for name, _ in fields:
+                timeline[name].tofile(f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Spawn cache write failed: {e}")
+    return timeline
+
+
+def start_level_timeline(level):
+    """Reset the spawn cursor onto a (random variant of the) level's timeline"""
+    global spawn_timeline, spawn_variant, spawn_cursor, level_tick
+    spawn_variant = random.randrange(TIMELINE_VARIANTS)
+    spawn_timeline = load_spawn_timeline(level, spawn_variant)
+    spawn_cursor = 0
+    level_tick = 0
+
+
+def run_spawn_timeline():
+    """Spawn everything scheduled up to the current level tick"""
+    global spawn_cursor, level_tick
+    
+    if spawn_timeline is None:
+        start_level_timeline(current_level)
+    
+    level_def = LEVEL_DEFS[current_level]
+    ticks = spawn_timeline['ticks']
+    count = len(ticks)
+    while spawn_cursor < count and ticks[spawn_cursor] <= level_tick:
+        i = spawn_cursor
+        kind = spawn_timeline['kinds'][i]
+        type_index = spawn_timeline['types'][i]
+        x_pos = spawn_timeline['xs'][i]
+        y_pos = spawn_timeline['ys'][i]
+        if kind == SPAWN_OBSTACLE:
+            spawn_obstacle(level_def['obstacles']['types'][type_index], x_pos)
+        elif kind == SPAWN_ENEMY:
+            spawn_enemy(level_def['enemies']['types'][type_index], x_pos, y_pos)
+        elif kind == SPAWN_PICKUP:
+            spawn_pickup(level_def['pickups']['types'][type_index], x_pos, y_pos)
+        else:
+            spawn_ring(x_pos, y_pos)
+        spawn_cursor += 1
+    
+    level_tick += 1
+    if level_tick >= TIMELINE_TICKS:
+        level_tick = 0
+        spawn_cursor = 0
+
+
+# ============ COLLECTIBLES ============
+
+def spawn_collectible(c_type, x_pos, y_pos):
+    """Spawn a collectible of the given type at the far end of the world"""
+    if not budget_room('collectibles', len(collectibles)):
+        return
+    collectibles.add(1, pos=(x_pos, y_pos, COLLECTIBLE_SPAWN_Z), type=COLLECTIBLE_TYPE_INDEX[c_type])
+
+def spawn_pickup(p_type, x_pos, y_pos):
+    """Spawn a power-up at the far end of the world"""
+    spawn_collectible(p_type, x_pos, y_pos)
+
+def spawn_ring(x_pos, y_pos):
+    """Spawn a bonus ring"""
+    spawn_collectible('ring', x_pos, y_pos)
+
+
+# Effect handlers get the number collected of their type this tick
+def collect_health(count):
+    global player_hp
+    player_hp = min(100, player_hp + HEALTH_PICKUP_HP * count)
+    print("Picked up Health!")
+
+def collect_shield(count):
+    global player_shield
+    player_shield = True
+    print("Shield Activated!")
+
+def collect_laser(count):
+    global laser_active, laser_timer
+    laser_active = True
+    laser_timer = LASER_DURATION
+    print("Laser Weapon Active!")
+
+def collect_ring(count):
+    print(f"Ring Collected! +{100 * count}")
+
+
+def draw_health_icon(z):
+    rc_color(0.0, 1.0, 0.0) # Green Cross
+    rc_push()
+    rc_scale(2.0, 0.5, 0.5)
+    draw_cube(1.5)
+    rc_pop()
+    rc_push()
+    rc_scale(0.5, 2.0, 0.5)
+    draw_cube(1.5)
+    rc_pop()
+
+def draw_shield_icon(z):
+    rc_color(0.0, 0.5, 1.0) # Blue Sphere
+    draw_sphere(2.5)
+
+def draw_laser_icon(z):
+    rc_color(1.0, 0.0, 0.0) # Red Beam/Bar
+    rc_push()
+    rc_scale(0.5, 0.5, 4.0)
+    draw_cube(1.5)
+    rc_pop()
+
+def draw_ring(z):
+    """Cached torus mesh, dropping to a coarser torus in the distance"""
+    rc_color(1.0, 0.8, 0.0)
+    if z < RING_LOD_Z:
+        submit(mesh_id('torus', RING_RADIUS, RING_TUBE_RADIUS, 12, 4))
+    else:
+        submit(mesh_id('torus', RING_RADIUS, RING_TUBE_RADIUS, 32, 8))
+
+
+# radius: pickup distance to the player; spin: degrees per tick about 'axis'
+COLLECTIBLE_SPECS = {
+    'health': {'speed': PICKUP_SPEED, 'radius': 12, 'spin': 2, 'axis': (0, 1, 0), 'score': 0,
+               'effect': collect_health, 'draw': draw_health_icon},
+    'shield': {'speed': PICKUP_SPEED, 'radius': 12, 'spin': 2, 'axis': (0, 1, 0), 'score': 0,
+               'effect': collect_shield, 'draw': draw_shield_icon},
+    'laser': {'speed': PICKUP_SPEED, 'radius': 12, 'spin': 2, 'axis': (0, 1, 0), 'score': 0,
+              'effect': collect_laser, 'draw': draw_laser_icon},
+    'ring': {'speed': RING_SPEED, 'radius': 15, 'spin': 1, 'axis': (0, 0, 1), 'score': 100,
+             'effect': collect_ring, 'draw': draw_ring},
+}
+COLLECTIBLE_SPECS_BY_INDEX = [COLLECTIBLE_SPECS[name] for name in COLLECTIBLE_TYPES]
+COLLECTIBLE_SPEED = np.array([spec['speed'] for spec in COLLECTIBLE_SPECS_BY_INDEX])
+COLLECTIBLE_SPIN = np.array([spec['spin'] for spec in COLLECTIBLE_SPECS_BY_INDEX])
+COLLECTIBLE_RADIUS_SQ = np.array([spec['radius'] ** 2 for spec in COLLECTIBLE_SPECS_BY_INDEX])
+COLLECTIBLE_SCORE = np.array([spec['score'] for spec in COLLECTIBLE_SPECS_BY_INDEX])
+COLLECTIBLE_REACH = max(spec['radius'] for spec in COLLECTIBLE_SPECS_BY_INDEX)
+
+
+def update_collectibles():
+    """Move every collectible, pick up the ones the player touches and apply their effects per type"""
+    global score, laser_active, laser_timer
     
     # Update Laser Timer
     if laser_active:
-        laser_timer -= 0.016
+        laser_timer -= TICK_SECONDS
         if laser_timer <= 0:
             laser_active = False
     
-    for p in pickups:
-        if not p['active']: continue
-        
-        p['z'] += PICKUP_SPEED
-        p['rot'] = (p['rot'] + 2) % 360
-        
-        # Collision with Player
-        dx = player_x - p['x']
-        dy = player_y - p['y']
-        dz = player_z - p['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if dist < 12: # Pickup radius + player radius
-            p['active'] = False
-            
-            # Apply Effect
-            if p['type'] == 'health':
-                player_hp = min(100, player_hp + 20)
-                print("Picked up Health!")
-            elif p['type'] == 'shield':
-                player_shield = True
-                print("Shield Activated!")
-            elif p['type'] == 'laser':
-                laser_active = True
-                laser_timer = LASER_DURATION
-                print("Laser Weapon Active!")
+    if collectibles.count == 0:
+        return
     
-    # Cleanup
-    pickups[:] = [p for p in pickups if p['active'] and p['z'] < 50]
-
-def spawn_ring():
-    """Spawn bonus rings"""
-    if random.random() < 0.005: # Rare (Too many before)
-        rings.append({
-            'x': random.uniform(-60, 60),
-            'y': random.uniform(-30, 30),
-            'z': -800,
-            'rot': 0,
-            'active': True
-        })
-
-def update_rings():
-    """Move rings and check collision"""
-    global score
+    pos = collectibles['pos']
+    types = collectibles['type']
+    rot = collectibles['rot']
     
-    for r in rings:
-        if not r['active']: continue
-        
-        r['z'] += RING_SPEED
-        r['rot'] = (r['rot'] + 1) % 360
-        
-        # Collision (Fly through)
-        dx = player_x - r['x']
-        dy = player_y - r['y']
-        dz = player_z - r['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if dist < 15: # Ring radius approx
-            r['active'] = False
-            score += 100
-            print("Ring Collected! +100")
-            
-    rings[:] = [r for r in rings if r['active'] and r['z'] < 50]
-
-def draw_rings():
-    """Draw rings using cylinder segments (Torus-like)"""
-    for r in rings:
-        glPushMatrix()
-        glTranslatef(r['x'], r['y'], r['z'])
-        glRotatef(r['rot'], 0, 0, 1) # Spin animation
-        
-        glColor3f(1.0, 0.8, 0.0)
-        
-        # Approximate torus geometry using segments
-        radius = 5 
-        tube_radius = 0.8
-        segments = 8
-        angle_step = 360 / segments
-        
-        for i in range(segments):
-            glPushMatrix()
-            angle = i * angle_step
-            # Calculate vertex position on circle
-            rad = math.radians(angle)
-            x = math.cos(rad) * radius
-            y = math.sin(rad) * radius
-            
-            glTranslatef(x, y, 0)
-            
-            # Rotate segment to be tangent to the circle
-            glRotatef(angle + 90, 0, 0, 1) 
-            
-            # Calculate chord length to close the gap between segments
-            length = 2 * radius * math.sin(math.radians(angle_step/2)) * 1.05
-            
-            # Center and align cylinder
-            glTranslatef(0, -length/2, 0)
-            glRotatef(90, 1, 0, 0) 
-            
-            draw_cylinder(tube_radius, length, 8, 1)
-            glPopMatrix()
-            
-        glPopMatrix()
-
-def draw_pickups():
-    """Render rotating pickups"""
-    for p in pickups:
-        glPushMatrix()
-        glTranslatef(p['x'], p['y'], p['z'])
-        glRotatef(p['rot'], 0, 1, 0)
-        
-        # Outer Shell (Solid sphere instead of wireframe)
-        glColor3f(1.0, 1.0, 1.0)
-        # We can't use glBlendFunc for transparency, so we make it small or just rely on color
-        # Spec only allows gluSphere
-        # We'll just draw the icon larger and skip the shell or make shell small?
-        # Let's draw the shell as a small "core" or skip it to avoid obscuring the icon.
-        # Or just draw the icon.
-        
-        # Icon inside
-        if p['type'] == 'health':
-            glColor3f(0.0, 1.0, 0.0) # Green Cross
-            glPushMatrix()
-            glScalef(2.0, 0.5, 0.5)
-            draw_cube(1.5)
-            glPopMatrix()
-            glPushMatrix()
-            glScalef(0.5, 2.0, 0.5)
-            draw_cube(1.5)
-            glPopMatrix()
-            
-        elif p['type'] == 'shield':
-            glColor3f(0.0, 0.5, 1.0) # Blue Sphere
-            draw_sphere(2.5)
-            
-        elif p['type'] == 'laser':
-            glColor3f(1.0, 0.0, 0.0) # Red Beam/Bar
-            glPushMatrix()
-            glScalef(0.5, 0.5, 4.0)
-            draw_cube(1.5)
-            glPopMatrix()
-            
-        glPopMatrix()
+    # Movement and spin
+    pos[:, 2] += COLLECTIBLE_SPEED[types]
+    np.remainder(rot + COLLECTIBLE_SPIN[types], 360, out=rot)
+    z_sort(collectibles)
+    
+    # Proximity to the player, only for the rows level with the player
+    rows = z_window(pos[:, 2], player_z + COLLECTIBLE_REACH, player_z - COLLECTIBLE_REACH)
+    collected = np.zeros(rows.stop - rows.start, dtype=bool)
+    for jet in jet_positions():
+        offset = pos[rows] - jet
+        collected |= np.einsum('ij,ij->i', offset, offset) < COLLECTIBLE_RADIUS_SQ[types[rows]]
+    
+    # Apply effects once per type with the number collected
+    if collected.any():
+        counts = np.bincount(types[rows][collected], minlength=len(COLLECTIBLE_TYPES))
+        score += int(counts @ COLLECTIBLE_SCORE)
+        for type_index in np.flatnonzero(counts):
+            COLLECTIBLE_SPECS_BY_INDEX[type_index]['effect'](int(counts[type_index]))
+        keep = np.ones(collectibles.count, dtype=bool)
+        keep[rows] = ~collected
+        collectibles.keep(keep)
+    
+    # Cleanup: passed collectibles are at the front
+    collectibles.drop_front(z_count_from(collectibles['pos'][:, 2], 50))
 
 
-import random
+def draw_collectibles():
+    """Draw all collectibles in one pass, spinning each about its type's axis"""
+    for (x, y, z), type_index, rot in zip(collectibles['pos'].tolist(), collectibles['type'].tolist(),
+                                          collectibles['rot'].tolist()):
+        spec = COLLECTIBLE_SPECS_BY_INDEX[type_index]
+        rc_push()
+        rc_translate(x, y, z)
+        rc_rotate(rot, *spec['axis'])
+        spec['draw'](z)
+        rc_pop()
 
-def spawn_obstacle():
-    """Spawn a new obstacle at the far end of the world"""
-    if random.random() < 0.15:  # Increased spawn rate
-        # Determine obstacle type based on level
-        if current_level == 0:   # Forest
-            obs_type = 'tree'
-        elif current_level == 1: # Ocean
-            obs_type = 'buoy'
-        elif current_level == 2: # Desert
-            obs_type = 'cactus'
-        elif current_level == 3: # Purple
-            obs_type = 'mushroom'
-        else:                    # Volcanic
-            obs_type = 'spike'
-            
-        # Spawn mostly on sides, creating a "tunnel" effect
-        # Center path (-25 to 25) is safer
-        if random.random() < 0.7:
-            # Side spawn
-            if random.choice([True, False]):
-                x_pos = random.uniform(-120, -30)
-            else:
-                x_pos = random.uniform(30, 120)
+
+# ============ COLLISION SHAPES ============
+
+# Compound hitboxes in entity-local space, matching the models drawn in
+# draw_obstacles, draw_enemies and draw_boss. Each hitbox has a bounding
+# sphere that is checked first with squared distances only, so the precise
+# sphere/capsule tests run for the few pairs that are actually close.
+PLAYER_HIT_RADIUS = 5
+BULLET_HIT_RADIUS = 4   # Normal bullet model is a 4-unit wide sphere
+LASER_HIT_RADIUS = 2
+MISSILE_HIT_RADIUS = 3
+
+HITBOX_SHAPES = {
+    # Obstacles: origin at the base, models grow up +Y
+    'tree': [('capsule', (0, 0, 0), (0, 30, 0), 3), ('sphere', (0, 30, 0), 12)],
+    'buoy': [('capsule', (0, 0, 0), (0, 15, 0), 4), ('sphere', (0, 15, 0), 5)],
+    'cactus': [('capsule', (0, 0, 0), (0, 35, 0), 4),
+               ('capsule', (3, 20, 0), (9, 20, 0), 2),
+               ('capsule', (9, 20, 0), (9, 30, 0), 2)],
+    # Flattened cap approximated by two crossed discs
+    'mushroom': [('capsule', (0, 0, 0), (0, 25, 0), 2),
+                 ('capsule', (-9.8, 25, 0), (9.8, 25, 0), 4.2),
+                 ('capsule', (0, 25, -9.8), (0, 25, 9.8), 4.2)],
+    'spike': [('sphere', (0, 0, 0), 12)],
+    # Enemies (models are drawn rotated 180 degrees about Y)
+    'standard': [('capsule', (-5.6, 0, 0), (5.6, 0, 0), 2.4),
+                 ('capsule', (0, 0, -5.6), (0, 0, 5.6), 2.4),
+                 ('sphere', (0, 2, 0), 4)],
+    'fast': [('capsule', (0, 0, -9), (0, 0, 9), 3), ('capsule', (-6, 0, 0), (6, 0, 0), 2)],
+    'heavy': [('sphere', (0, 0, 0), 7.5), ('sphere', (-4, 4, -4), 4)],
+}
+
+BOSS_BODY_RADIUS = 15
+BOSS_SPIKE_LENGTH = 10
+BOSS_SPIKE_RADIUS = 2
+
+
+def jet_positions():
+    """Positions of the jets in play: the player, then the wingman in co-op"""
+    if coop:
+        return [(player_x, player_y, player_z), (wingman_x, wingman_y, player_z)]
+    return [(player_x, player_y, player_z)]
+
+
+def nearest_jets(points):
+    """(n, 3) position of the jet nearest (in x/y) to each point"""
+    jets = np.array(jet_positions(), dtype=np.float64)
+    if len(jets) == 1:
+        return np.broadcast_to(jets[0], np.shape(points))
+    gap = np.asarray(points, dtype=np.float64)[:, None, :2] - jets[None, :, :2]
+    return jets[np.einsum('ijk,ijk->ij', gap, gap).argmin(axis=1)]
+
+
+def make_hitbox(shapes):
+    """Attach a bounding sphere (centred on the shapes' extent) to a shape list"""
+    points = []
+    for shape in shapes:
+        if shape[0] == 'sphere':
+            points.append((shape[1], shape[2]))
         else:
-            # Occasional center obstacle
-            x_pos = random.uniform(-30, 30)
-        
-        y_pos = -100 
-        
-        obstacles.append({
-            'x': x_pos,
-            'y': y_pos,
-            'z': OBSTACLE_SPAWN_Z,
-            'type': obs_type,
-            'active': True,
-            'radius': 8
-        })
+            points.append((shape[1], shape[3]))
+            points.append((shape[2], shape[3]))
+    lo = [min(p[i] - r for p, r in points) for i in range(3)]
+    hi = [max(p[i] + r for p, r in points) for i in range(3)]
+    center = tuple((lo[i] + hi[i]) / 2 for i in range(3))
+    radius = max(math.dist(center, p) + r for p, r in points)
+    return {'shapes': shapes, 'center': center, 'radius': radius}
+
+
+HITBOXES = {name: make_hitbox(shapes) for name, shapes in HITBOX_SHAPES.items()}
+
+# Enemy bounding spheres indexed like ENEMY_TYPES for the vectorized pre-pass
+ENEMY_BOUND_CENTERS = np.array([HITBOXES[name]['center'] for name in ENEMY_TYPES])
+ENEMY_BOUND_RADII = np.array([HITBOXES[name]['radius'] for name in ENEMY_TYPES])
+
+# Furthest any part of a hitbox reaches in Z from its entity's origin, for Z-window queries
+ENEMY_REACH = max(abs(c[2]) + r for c, r in zip(ENEMY_BOUND_CENTERS, ENEMY_BOUND_RADII))
+OBSTACLE_REACH = max(abs(HITBOXES[name]['center'][2]) + HITBOXES[name]['radius']
+                     for name in ('tree', 'buoy', 'cactus', 'mushroom', 'spike')) + PLAYER_HIT_RADIUS
+
+
+def boss_hitbox(boss):
+    """Boss body plus its eight spikes at their current spin angle"""
+    shapes = [('sphere', (0, 0, 0), BOSS_BODY_RADIUS)]
+    for i in range(8):
+        angle = math.radians(i * 45 + boss['timer'])
+        c = math.cos(angle)
+        s = math.sin(angle)
+        inner = BOSS_BODY_RADIUS
+        outer = BOSS_BODY_RADIUS + BOSS_SPIKE_LENGTH
+        shapes.append(('capsule', (c * inner, s * inner, 0), (c * outer, s * outer, 0), BOSS_SPIKE_RADIUS))
+    return {'shapes': shapes, 'center': (0, 0, 0), 'radius': BOSS_BODY_RADIUS + BOSS_SPIKE_LENGTH + BOSS_SPIKE_RADIUS}
+
+
+def point_segment_dist_sq(p, a, b):
+    """Squared distance from point p to segment ab"""
+    abx = b[0] - a[0]; aby = b[1] - a[1]; abz = b[2] - a[2]
+    apx = p[0] - a[0]; apy = p[1] - a[1]; apz = p[2] - a[2]
+    length_sq = abx * abx + aby * aby + abz * abz
+    t = 0.0
+    if length_sq > 0:
+        t = max(0.0, min(1.0, (apx * abx + apy * aby + apz * abz) / length_sq))
+    dx = apx - abx * t; dy = apy - aby * t; dz = apz - abz * t
+    return dx * dx + dy * dy + dz * dz
+
+
+def segment_segment_dist_sq(p0, p1, q0, q1):
+    """Squared distance between segments p0p1 and q0q1"""
+    d1 = (p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2])
+    d2 = (q1[0] - q0[0], q1[1] - q0[1], q1[2] - q0[2])
+    r = (p0[0] - q0[0], p0[1] - q0[1], p0[2] - q0[2])
+    a = d1[0] * d1[0] + d1[1] * d1[1] + d1[2] * d1[2]
+    e = d2[0] * d2[0] + d2[1] * d2[1] + d2[2] * d2[2]
+    f = d2[0] * r[0] + d2[1] * r[1] + d2[2] * r[2]
+    if a <= 1e-9:
+        return point_segment_dist_sq(p0, q0, q1)
+    if e <= 1e-9:
+        return point_segment_dist_sq(q0, p0, p1)
+    b = d1[0] * d2[0] + d1[1] * d2[1] + d1[2] * d2[2]
+    c = d1[0] * r[0] + d1[1] * r[1] + d1[2] * r[2]
+    denom = a * e - b * b
+    s = max(0.0, min(1.0, (b * f - c * e) / denom)) if denom > 1e-9 else 0.0
+    t = (b * s + f) / e
+    if t < 0.0:
+        t = 0.0
+        s = max(0.0, min(1.0, -c / a))
+    elif t > 1.0:
+        t = 1.0
+        s = max(0.0, min(1.0, (b - c) / a))
+    dx = r[0] + d1[0] * s - d2[0] * t
+    dy = r[1] + d1[1] * s - d2[1] * t
+    dz = r[2] + d1[2] * s - d2[2] * t
+    return dx * dx + dy * dy + dz * dz
+
+
+def hitbox_hit(hitbox, x, y, z, p0, p1=None, probe_radius=0.0):
+    """Does a probe (point p0 or swept segment p0-p1, with a radius) touch the hitbox placed at x, y, z?"""
+    # Work in hitbox-local space
+    a = (p0[0] - x, p0[1] - y, p0[2] - z)
+    b = a if p1 is None else (p1[0] - x, p1[1] - y, p1[2] - z)
+    
+    # Cheap early-out against the bounding sphere
+    reach = hitbox['radius'] + probe_radius
+    if point_segment_dist_sq(hitbox['center'], a, b) > reach * reach:
+        return False
+    
+    for shape in hitbox['shapes']:
+        if shape[0] == 'sphere':
+            reach = shape[2] + probe_radius
+            if point_segment_dist_sq(shape[1], a, b) <= reach * reach:
+                return True
+        else:
+            reach = shape[3] + probe_radius
+            if segment_segment_dist_sq(a, b, shape[1], shape[2]) <= reach * reach:
+                return True
+    return False
+
+
+def spawn_obstacle(obs_type, x_pos):
+    """Spawn a new obstacle at the far end of the world"""
+    if not budget_room('obstacles', len(obstacles)):
+        return
+    obstacles.append({
+        'x': x_pos,
+        'y': -100,
+        'z': OBSTACLE_SPAWN_Z,
+        'type': obs_type,
+        'active': True
+    })
+
+def obstacle_depth(obs):
+    """Sort key for the nearest-first obstacle list"""
+    return -obs['z']
 
 def update_obstacles():
     """Move obstacles and check collisions"""
     global player_hp, elapsed_time, last_time, player_shield, cheat_mode
     
-    # Obstacle movement speed
-    move_speed = 3.0 
-    
     for obs in obstacles:
-        if obs['active']:
-            obs['z'] += move_speed 
-            
-            # Distance calculation for collision
-            dx = player_x - obs['x']
-            dy = player_y - obs['y']
-            dz = player_z - obs['z']
-            distance = math.sqrt(dx*dx + dy*dy + dz*dz)
-            
-            # Check collision against radius
-            if distance < (obs['radius'] + 5):
-                obs['active'] = False
-                if player_shield:
-                    player_shield = False
-                    print("Shield Absorbed Obstacle!")
-                elif not cheat_mode:
-                    player_hp -= 10
-                    print(f"Collision! HP: {player_hp}")
-            
-            # Remove if behind camera
-            if obs['z'] > OBSTACLE_DESPAWN_Z:
-                obs['active'] = False
+        obs['z'] += OBSTACLE_SPEED
+    
+    # Remove the ones behind the camera (all at the front of the list)
+    del obstacles[:bisect.bisect_left(obstacles, -OBSTACLE_DESPAWN_Z, key=obstacle_depth)]
+    
+    # Check collision against the obstacle's model shape, only for obstacles level with the player
+    start = bisect.bisect_left(obstacles, -(player_z + OBSTACLE_REACH), key=obstacle_depth)
+    stop = bisect.bisect_right(obstacles, -(player_z - OBSTACLE_REACH), key=obstacle_depth)
+    crashed = False
+    for obs in obstacles[start:stop]:
+        if any(hitbox_hit(HITBOXES[obs['type']], obs['x'], obs['y'], obs['z'], jet, probe_radius=PLAYER_HIT_RADIUS)
+               for jet in jet_positions()):
+            obs['active'] = False
+            crashed = True
+            if player_shield:
+                player_shield = False
+                print("Shield Absorbed Obstacle!")
+            elif not cheat_mode:
+                player_hp -= COLLISION_DAMAGE
+                print(f"Collision! HP: {player_hp}")
     
-    obstacles[:] = [ob for ob in obstacles if ob['active']]
+    if crashed:
+        obstacles[:] = [ob for ob in obstacles if ob['active']]
 
 def draw_obstacles():
     """Render all active obstacles"""
     for obs in obstacles:
-        glPushMatrix()
-        glTranslatef(obs['x'], obs['y'], obs['z'])
+        rc_push()
+        rc_translate(obs['x'], obs['y'], obs['z'])
         
         if obs['type'] == 'tree':
             # Forest Tree
-            glColor3f(0.4, 0.3, 0.1)
-            glPushMatrix()
-            glRotatef(-90, 1, 0, 0)
+            rc_color(0.4, 0.3, 0.1)
+            rc_push()
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(3, 30)
-            glPopMatrix()
-            glColor3f(0.2, 0.6, 0.1)
-            glPushMatrix()
-            glTranslatef(0, 30, 0)
+            rc_pop()
+            rc_color(0.2, 0.6, 0.1)
+            rc_push()
+            rc_translate(0, 30, 0)
             draw_sphere(12)
-            glPopMatrix()
+            rc_pop()
             
         elif obs['type'] == 'buoy':
             # Ocean Buoy (Red/White striped)
-            glColor3f(0.8, 0.1, 0.1)
-            glPushMatrix()
-            glRotatef(-90, 1, 0, 0)
+            rc_color(0.8, 0.1, 0.1)
+            rc_push()
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(4, 15)
-            glPopMatrix()
-            glColor3f(1.0, 1.0, 1.0) # White top
-            glPushMatrix()
-            glTranslatef(0, 15, 0)
+            rc_pop()
+            rc_color(1.0, 1.0, 1.0) # White top
+            rc_push()
+            rc_translate(0, 15, 0)
             draw_sphere(5)
-            glPopMatrix()
+            rc_pop()
             
         elif obs['type'] == 'cactus':
             # Desert Cactus
-            glColor3f(0.1, 0.6, 0.2)
-            glPushMatrix()
-            glRotatef(-90, 1, 0, 0)
+            rc_color(0.1, 0.6, 0.2)
+            rc_push()
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(4, 35) # Main trunk
-            glPopMatrix()
+            rc_pop()
             # Arm
-            glPushMatrix()
-            glTranslatef(3, 20, 0)
-            glRotatef(90, 0, 1, 0)
+            rc_push()
+            rc_translate(3, 20, 0)
+            rc_rotate(90, 0, 1, 0)
             draw_cylinder(2, 6)
-            glPopMatrix()
+            rc_pop()
             # Top of arm
-            glPushMatrix()
-            glTranslatef(9, 20, 0)
-            glRotatef(-90, 1, 0, 0)
+            rc_push()
+            rc_translate(9, 20, 0)
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(2, 10)
-            glPopMatrix()
+            rc_pop()
             
         elif obs['type'] == 'mushroom':
             # Alien Mushroom
-            glColor3f(0.8, 0.8, 0.9) # White/Purple Stalk
-            glPushMatrix()
-            glRotatef(-90, 1, 0, 0)
+            rc_color(0.8, 0.8, 0.9) # White/Purple Stalk
+            rc_push()
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(2, 25)
-            glPopMatrix()
-            glColor3f(0.6, 0.2, 0.8) # Purple Cap
-            glPushMatrix()
-            glTranslatef(0, 25, 0)
-            glScalef(1.0, 0.3, 1.0)
+            rc_pop()
+            rc_color(0.6, 0.2, 0.8) # Purple Cap
+            rc_push()
+            rc_translate(0, 25, 0)
+            rc_scale(1.0, 0.3, 1.0)
             draw_sphere(14)
-            glPopMatrix()
+            rc_pop()
             
         elif obs['type'] == 'spike':
             # Volcanic Rock Spike
-            glColor3f(0.4, 0.2, 0.2)
-            glPushMatrix()
-            glRotatef(-90, 1, 0, 0)
+            rc_color(0.4, 0.2, 0.2)
+            rc_push()
+            rc_rotate(-90, 1, 0, 0)
             draw_cylinder(0.1, 40) # Cone-ish (top radius 0.1, base radius default?)
             # gluCylinder takes baseRadius, topRadius, height. 
             # My wrapper takes radius, height. Let's use custom glutCone or just stacked cylinders
             # or just a sphere
-            glPopMatrix()
+            rc_pop()
             draw_sphere(12) # Just a boulder for now to be safe
             
-        glPopMatrix()
+        rc_pop()
 
 
-def spawn_enemy():
-    """Spawn enemies based on level difficulty"""
-    if random.random() < 0.008: # Reduced spawn rate
-        # Types: 'standard', 'fast', 'heavy'
-        e_type = random.choice(['standard', 'fast', 'heavy'])
-        
-        x_pos = random.uniform(-50, 50)
-        y_pos = random.uniform(-20, 40)
-        
-        # Lowered HP to make them easier to kill
-        hp = 2 # Was 3
-        if e_type == 'fast': hp = 1 # Was 2
-        elif e_type == 'heavy': hp = 5 # Was 10
-        
-        enemies.append({
-            'x': x_pos,
-            'y': y_pos,
-            'z': ENEMY_SPAWN_Z,
-            'type': e_type,
-            'hp': hp,
-            'active': True,
-            'radius': 8,
-            'last_shot': 0
-        })
+def spawn_enemy(e_type, x_pos, y_pos):
+    """Spawn an enemy at the far end of the world"""
+    global next_enemy_uid
+    if not budget_room('enemies', len(enemies)):
+        return
+    type_index = ENEMY_TYPE_INDEX[e_type]
+    enemies.add(1, pos=(x_pos, y_pos, ENEMY_SPAWN_Z), type=type_index,
+                hp=ENEMY_HP[type_index], active=True, uid=next_enemy_uid)
+    next_enemy_uid += 1
+
+# ============ ENTITY BUDGETS ============
+
+def budget_room(kind, live, wanted=1):
+    """How many of `wanted` new entities fit under the budget; the rest are counted as skipped"""
+    allowed = max(0, min(wanted, ENTITY_BUDGETS[kind] - live))
+    budget_stats[kind]['skipped'] += wanted - allowed
+    return allowed
+
+
+def evict_farthest(pool, kind, room):
+    """Drop the rows of an array pool farthest from the player until `room` rows are free"""
+    excess = len(pool) + room - ENTITY_BUDGETS[kind]
+    if excess <= 0:
+        return
+    offset = pool['pos'] - (player_x, player_y, player_z)
+    dist_sq = np.einsum('ij,ij->i', offset, offset)
+    mask = np.ones(len(pool), dtype=bool)
+    mask[np.argpartition(dist_sq, -excess)[-excess:]] = False
+    pool.keep(mask)
+    budget_stats[kind]['evicted'] += excess
+
+
+def evict_leading_bullets(room):
+    """Drop the player bullets furthest downrange (closest to expiring) until `room` slots are free"""
+    excess = len(bullets) + room - ENTITY_BUDGETS['bullets']
+    if excess <= 0:
+        return
+    del bullets[:excess] # Oldest first
+    budget_stats['bullets']['evicted'] += excess
+
+
+def budget_summary():
+    """Non-zero skip/evict counters as {kind: {'skipped', 'evicted'}}"""
+    return {kind: dict(counts) for kind, counts in budget_stats.items() if any(counts.values())}
+
+
+# ============ BULLET PATTERNS ============
+
+def emit_enemy_bullets(origins, dirs, speed=None, accel=0.0, max_speed=None, turn=0.0):
+    """Append a batch of enemy bullets; dirs are normalised here (speeds default to ENEMY_BULLET_SPEED)"""
+    # Defaults resolve per call so tournament --set overrides of ENEMY_BULLET_SPEED apply
+    speed = ENEMY_BULLET_SPEED if speed is None else speed
+    max_speed = ENEMY_BULLET_SPEED if max_speed is None else max_speed
+    dirs = np.asarray(dirs, dtype=np.float64).reshape(-1, 3)
+    norms = np.linalg.norm(dirs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    # Make room by evicting the bullets farthest from the player (least threatening)
+    room = budget_room('enemy_bullets', 0, len(dirs))
+    evict_farthest(enemy_bullets, 'enemy_bullets', room)
+    origins = np.broadcast_to(np.asarray(origins, dtype=np.float64), dirs.shape)[:room]
+    enemy_bullets.add(room, pos=origins, dir=(dirs / norms)[:room],
+                      speed=speed, accel=accel, max_speed=max_speed, turn=turn)
+
+
+def aim_vector(origin):
+    """Vector from origin to the nearest jet"""
+    return nearest_jets(np.array([origin], dtype=np.float64))[0] - origin
+
+
+def pattern_aimed_fan(origin, count, spread, speed=None):
+    """Fan of bullets aimed at the player, spread sideways in world units at the player's depth"""
+    speed = ENEMY_BULLET_SPEED if speed is None else speed
+    aim = aim_vector(origin)
+    offsets = np.linspace(-spread / 2, spread / 2, count) if count > 1 else np.zeros(1)
+    dirs = np.repeat(aim[None, :], count, axis=0)
+    dirs[:, 0] += offsets
+    emit_enemy_bullets(origin, dirs, speed=speed, max_speed=speed)
+
+
+def pattern_ring(origin, count, radius, speed=None, phase=0.0):
+    """Ring of bullets that arrives at the player's depth as a circle of the given radius"""
+    speed = ENEMY_BULLET_SPEED if speed is None else speed
+    aim = aim_vector(origin)
+    angles = phase + np.arange(count) * (2 * math.pi / count)
+    dirs = np.repeat(aim[None, :], count, axis=0)
+    dirs[:, 0] += np.cos(angles) * radius
+    dirs[:, 1] += np.sin(angles) * radius
+    emit_enemy_bullets(origin, dirs, speed=speed, max_speed=speed)
+
+
+def pattern_spiral(origin, arms, phase, speed=1.0, accel=0.02, max_speed=None, turn=0.01):
+    """Spiral arms that start slow, accelerate and keep curling around the Z axis"""
+    angles = phase + np.arange(arms) * (2 * math.pi / arms)
+    dirs = np.empty((arms, 3))
+    dirs[:, 0] = np.cos(angles) * 0.6
+    dirs[:, 1] = np.sin(angles) * 0.6
+    dirs[:, 2] = 1.0  # Towards the camera
+    emit_enemy_bullets(origin, dirs, speed=speed, accel=accel, max_speed=max_speed, turn=turn)
+
 
 def update_enemy_bullets():
-    """Update enemy projectiles"""
+    """Advance every enemy bullet along its velocity curve and test the player in one pass"""
     global player_hp, player_shield, cheat_mode
     
-    speed = 3.0
-    for b in enemy_bullets:
-        b['x'] += b['dx'] * speed
-        b['y'] += b['dy'] * speed
-        b['z'] += b['dz'] * speed
-        
-        # Check collision with player
-        dx = player_x - b['x']
-        dy = player_y - b['y']
-        dz = player_z - b['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if dist < 8: # Player hit radius
-            b['z'] = 100 # Remove
-            if player_shield:
-                player_shield = False
-                print("Shield Absorbed Shot!")
-            elif not cheat_mode:
-                player_hp -= 5
-                print(f"Hit by enemy! HP: {player_hp}")
-            
+    if enemy_bullets.count == 0:
+        return
+    
+    pos = enemy_bullets['pos']
+    dirs = enemy_bullets['dir']
+    speed = enemy_bullets['speed']
+    turn = enemy_bullets['turn']
+    
+    # Velocity curves
+    np.minimum(speed + enemy_bullets['accel'], enemy_bullets['max_speed'], out=speed)
+    turning = turn != 0
+    if turning.any():
+        c = np.cos(turn[turning])
+        s = np.sin(turn[turning])
+        dx = dirs[turning, 0]
+        dy = dirs[turning, 1]
+        dirs[turning, 0] = dx * c - dy * s
+        dirs[turning, 1] = dx * s + dy * c
+    pos += dirs * speed[:, None]
+    
+    # Collision with the jets
+    hits = np.zeros(len(pos), dtype=bool)
+    for jet in jet_positions():
+        offset = pos - jet
+        hits |= np.einsum('ij,ij->i', offset, offset) < ENEMY_BULLET_HIT_RADIUS ** 2
+    for _ in range(int(np.count_nonzero(hits))):
+        if player_shield:
+            player_shield = False
+            print("Shield Absorbed Shot!")
+        elif not cheat_mode:
+            player_hp -= ENEMY_BULLET_DAMAGE
+            print(f"Hit by enemy! HP: {player_hp}")
+    
     # Cleanup
-    enemy_bullets[:] = [b for b in enemy_bullets if b['z'] < 50 and b['z'] > -1200]
+    z = pos[:, 2]
+    enemy_bullets.keep(~hits & (z < 50) & (z > -1200) &
+                       (np.abs(pos[:, 0]) < 400) & (np.abs(pos[:, 1]) < 400))
+
+def bullet_probe(b):
+    """Swept segment (start, end, radius) covering a player bullet's travel this tick"""
+    if b.get('type') == 'laser':
+        step = BULLET_SPEED * 40 # Lasers appear longer
+        radius = LASER_HIT_RADIUS
+    else:
+        step = BULLET_SPEED * 20
+        radius = BULLET_HIT_RADIUS
+    return (b['x'], b['y'], b['z']), (b['x'], b['y'], b['z'] - step), radius
+
+
+def enemy_probe_rows(p0, p1, probe_radius):
+    """Rows of active enemies whose bounding sphere the probe segment p0-p1 touches"""
+    # Only enemies within the probe's Z extent can be touched
+    margin = ENEMY_REACH + probe_radius
+    rows = z_window(enemies['pos'][:, 2], max(p0[2], p1[2]) + margin, min(p0[2], p1[2]) - margin)
+    types = enemies['type'][rows]
+    centers = enemies['pos'][rows] + ENEMY_BOUND_CENTERS[types]
+    a = np.asarray(p0, dtype=np.float64)
+    ab = np.asarray(p1, dtype=np.float64) - a
+    ap = centers - a
+    length_sq = ab @ ab
+    if length_sq > 0:
+        t = np.clip(ap @ ab / length_sq, 0.0, 1.0)
+        ap -= t[:, None] * ab
+    reach = ENEMY_BOUND_RADII[types] + probe_radius
+    hits = enemies['active'][rows] & (np.einsum('ij,ij->i', ap, ap) <= reach * reach)
+    return np.flatnonzero(hits) + rows.start
+
+
+def destroy_enemy(i):
+    """Deactivate enemy row i, blow it up and award its points"""
+    global score
+    enemies['active'][i] = False
+    emit_particles('explosion', tuple(enemies['pos'][i]), 60)
+    pts = int(ENEMY_POINTS[enemies['type'][i]])
+    score += pts
+    return pts
+
+
+def crash_into_enemy(i):
+    """A jet flew into enemy row i"""
+    global player_hp, player_shield
+    enemies['active'][i] = False
+    emit_particles('explosion', tuple(enemies['pos'][i]), 40)
+    if player_shield:
+        player_shield = False
+        print("Shield Absorbed Collision!")
+    elif not cheat_mode:
+        player_hp -= COLLISION_DAMAGE
+        print("Crashed into enemy!")
+    else:
+        print("Cheat: Collision Ignored")
+
 
 def update_enemies():
-    """Move enemies, handle shooting, and check collisions"""
-    global player_hp, elapsed_time, player_shield, score, cheat_mode
+    """Move enemies, handle shooting, and check collisions in batched phases"""
+    if enemies.count == 0:
+        return
     
-    for e in enemies:
-        if not e['active']: continue
-        
-        # Movement
-        speed = 1.2 # Slower enemies
-        if e['type'] == 'fast': speed = 2.0
-        elif e['type'] == 'heavy': speed = 0.8
-        
-        e['z'] += speed 
-        
-        # Tracking
-        if e['type'] != 'heavy':
-            dx = player_x - e['x']
-            dy = player_y - e['y']
-            e['x'] += dx * 0.005
-            e['y'] += dy * 0.005
-            
-        # Shooting Logic
-        if random.random() < 0.015 and e['z'] > -700:
-            dx = player_x - e['x']
-            dy = player_y - e['y']
-            dz = player_z - e['z']
-            mag = math.sqrt(dx*dx + dy*dy + dz*dz)
-            
-            enemy_bullets.append({
-                'x': e['x'],
-                'y': e['y'],
-                'z': e['z'],
-                'dx': dx / mag,
-                'dy': dy / mag,
-                'dz': dz / mag
-            })
-            
-        # Collision with Player
-        dx = player_x - e['x']
-        dy = player_y - e['y']
-        dz = player_z - e['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if dist < (e['radius'] + 5):
-            e['active'] = False
-            if player_shield:
-                player_shield = False
-                print("Shield Absorbed Collision!")
-            elif not cheat_mode:
-                player_hp -= 10
-                print("Crashed into enemy!")
-            else:
-                print("Cheat: Collision Ignored")
+    pos = enemies['pos']
+    types = enemies['type']
+    active = enemies['active']
+    
+    # Movement by type, then restore nearest-first order where fast ones overtook
+    pos[:, 2] += ENEMY_SPEED[types]
+    z_sort(enemies)
+    
+    # Tracking (heavies have zero tracking)
+    tracking = ENEMY_TRACKING[types]
+    if coop:
+        targets = nearest_jets(pos)
+        pos[:, :2] += (targets[:, :2] - pos[:, :2]) * tracking[:, None]
+    else:
+        pos[:, 0] += (player_x - pos[:, 0]) * tracking
+        pos[:, 1] += (player_y - pos[:, 1]) * tracking
+    
+    # Shooting: enemies inside the fire range are the leading rows; one RNG draw covers them all
+    in_range = z_count_from(pos[:, 2], ENEMY_FIRE_Z)
+    shooters = active[:in_range] & (enemy_rng.random(in_range) < ENEMY_FIRE_CHANCE)
+    if shooters.any():
+        origins = pos[:in_range][shooters]
+        emit_enemy_bullets(origins, nearest_jets(origins) - origins)
+    
+    # Collision with the jets (bounding spheres first, exact hitboxes for the rest)
+    for jet in jet_positions():
+        for i in enemy_probe_rows(jet, jet, PLAYER_HIT_RADIUS):
+            x, y, z = pos[i]
+            if not active[i] or not hitbox_hit(HITBOXES[ENEMY_TYPES[types[i]]], x, y, z, jet,
+                                               probe_radius=PLAYER_HIT_RADIUS):
+                continue
+            crash_into_enemy(i)
+    
+    # Collision with Bullets
+    hp = enemies['hp']
+    for b in bullets:
+        if not b['active']: continue
+        # Swept collision along the bullet's travel this tick
+        p0, p1, probe_radius = bullet_probe(b)
+        for i in enemy_probe_rows(p0, p1, probe_radius):
+            x, y, z = pos[i]
+            if not hitbox_hit(HITBOXES[ENEMY_TYPES[types[i]]], x, y, z, p0, p1, probe_radius):
+                continue
+            # HIT!
+            emit_particles('impact', (x, y, z), 6)
+            hp[i] -= BULLET_DAMAGE[b['type']]
+            if b['type'] != 'laser':
+                spend_bullet(b) # Laser does NOT despawn (Piercing)
             
-        # Collision with Bullets
-        for b in bullets:
-            # Check lateral distance (X/Y)
-            bdx = b['x'] - e['x']
-            bdy = b['y'] - e['y']
-            lateral_dist = math.sqrt(bdx*bdx + bdy*bdy)
+            if hp[i] <= 0:
+                pts = destroy_enemy(i)
+                print(f"Enemy Destroyed! +{pts}")
             
-            # Hit radius for lateral check
-            hit_radius = e['radius'] + 5 
-
-            if lateral_dist < hit_radius:
-                # Check Z depth (Swept collision)
-                bullet_step = BULLET_SPEED * 20
-                if b.get('type') == 'laser': bullet_step = BULLET_SPEED * 40 # Lasers appear longer
-                
-                z_start = b['z'] + e['radius']
-                z_end = b['z'] - bullet_step - e['radius']
-                
-                if e['z'] <= z_start and e['z'] >= z_end:
-                    # HIT!
-                    if b.get('type') == 'laser':
-                        e['hp'] -= 5 # High damage per frame
-                        # Laser does NOT despawn (Piercing)
-                    else:
-                        e['hp'] -= 1
-                        b['z'] = BULLET_MAX_DIST - 100 # Despawn bullet
-                        
-                    if e['hp'] <= 0:
-                        e['active'] = False
-                        pts = 50
-                        if e['type'] == 'fast': pts = 100
-                        elif e['type'] == 'heavy': pts = 300
-                        score += pts
-                        print(f"Enemy Destroyed! +{pts}")
-                    
-                    if b.get('type') != 'laser':
-                        break # Bullet consumed (normal only)
-
-    # Cleanup
-    enemies[:] = [e for e in enemies if e['active'] and e['z'] < 50]
+            if b.get('type') != 'laser':
+                break # Bullet consumed (normal only)
+    
+    # Cleanup: passed enemies are at the front, destroyed ones need a compaction
+    if not active.all():
+        enemies.keep(active)
+    enemies.drop_front(z_count_from(enemies['pos'][:, 2], 50))
 
 
 def draw_enemies():
     """Render enemies with better models"""
-    for e in enemies:
-        glPushMatrix()
-        glTranslatef(e['x'], e['y'], e['z'])
-        glRotatef(180, 0, 1, 0)
+    for (x, y, z), type_index in zip(enemies['pos'].tolist(), enemies['type'].tolist()):
+        e_type = ENEMY_TYPES[type_index]
+        rc_push()
+        rc_translate(x, y, z)
+        rc_rotate(180, 0, 1, 0)
         
-        if e['type'] == 'standard':
-            glColor3f(0.8, 0.2, 0.2) # Redish Saucer
-            glPushMatrix()
-            glScalef(1.0, 0.3, 1.0)
+        if e_type == 'standard':
+            rc_color(0.8, 0.2, 0.2) # Redish Saucer
+            rc_push()
+            rc_scale(1.0, 0.3, 1.0)
             draw_sphere(8)
-            glPopMatrix()
-            glColor3f(0.4, 0.8, 1.0) # Cockpit
-            glPushMatrix()
-            glTranslatef(0, 2, 0)
+            rc_pop()
+            rc_color(0.4, 0.8, 1.0) # Cockpit
+            rc_push()
+            rc_translate(0, 2, 0)
             draw_sphere(4)
-            glPopMatrix()
+            rc_pop()
             
-        elif e['type'] == 'fast':
-            glColor3f(1.0, 0.8, 0.0) # Yellow Dart
-            glPushMatrix()
-            glScalef(0.5, 0.5, 2.0)
+        elif e_type == 'fast':
+            rc_color(1.0, 0.8, 0.0) # Yellow Dart
+            rc_push()
+            rc_scale(0.5, 0.5, 2.0)
             draw_sphere(6)
-            glPopMatrix()
-            glColor3f(0.8, 0.6, 0.0) # Wings
-            glPushMatrix()
-            glScalef(2.0, 0.1, 0.5)
+            rc_pop()
+            rc_color(0.8, 0.6, 0.0) # Wings
+            rc_push()
+            rc_scale(2.0, 0.1, 0.5)
             draw_cube(8)
-            glPopMatrix()
+            rc_pop()
             
-        elif e['type'] == 'heavy':
-            glColor3f(0.5, 0.0, 0.8) # Purple Mothership
+        elif e_type == 'heavy':
+            rc_color(0.5, 0.0, 0.8) # Purple Mothership
             draw_cube(12)
-            glColor3f(0.8, 0.2, 0.8)
-            glPushMatrix()
-            glTranslatef(4, 4, 4)
+            rc_color(0.8, 0.2, 0.8)
+            rc_push()
+            rc_translate(4, 4, 4)
             draw_sphere(4)
-            glPopMatrix()
+            rc_pop()
             
-        glPopMatrix()
+        rc_pop()
 
 
-def spawn_missiles():
-    """Fire a barrage of homing missiles"""
+def spawn_missiles(x_pos, y_pos):
+    """Fire a barrage of homing missiles from a jet"""
     global missile_cooldown_timer
     
     if missile_cooldown_timer <= 0:
         missile_cooldown_timer = MISSILE_COOLDOWN_MAX
         
-        # Spawn 6 missiles in an arc
-        for i in range(6):
+        # Spawn a barrage in an arc (fewer if the missile budget is nearly full)
+        for i in range(budget_room('missiles', len(missiles), MISSILE_BARRAGE)):
             # Spread them out slightly
             offset_x = (i - 2.5) * 5
             missiles.append({
-                'x': player_x + offset_x,
-                'y': player_y,
+                'x': x_pos + offset_x,
+                'y': y_pos,
                 'z': player_z,
                 'dx': 0, # Initial velocity (will be guided)
                 'dy': 0, 
                 'dz': -1,
                 'target_id': None, # Will find target
-                'life': 100 # Frames to live
+                'life': MISSILE_LIFE # Frames to live
             })
 
 def update_missiles():
     """Update missile homing logic and collisions"""
-    global missile_cooldown_timer, score
+    global missile_cooldown_timer
     
     # Cooldown tick
     if missile_cooldown_timer > 0:
-        missile_cooldown_timer -= 0.016 # Approx 60 FPS
+        missile_cooldown_timer -= TICK_SECONDS
     
+    expired_early = False
     for m in missiles:
         m['life'] -= 1
         m['z'] -= MISSILE_SPEED # Base forward movement
         
         # 1. Find Target if none or dead
         target = None
-        best_dist = 9999
         
         # Check if current target is still valid
-        valid_target = False
         if m['target_id'] is not None:
-            for e in enemies:
-                if id(e) == m['target_id'] and e['active']:
-                    target = e
-                    valid_target = True
-                    break
+            rows = np.flatnonzero(enemies['active'] & (enemies['uid'] == m['target_id']))
+            if len(rows):
+                target = rows[0]
         
         # Find new target if needed
-        if not valid_target:
+        if target is None:
             m['target_id'] = None
-            for e in enemies:
-                if not e['active']: continue
-                dx = e['x'] - m['x']
-                dy = e['y'] - m['y']
-                dz = e['z'] - m['z']
-                dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-                
-                # Prefer enemies in front
-                if dz < 0 and dist < best_dist:
-                    best_dist = dist
-                    target = e
-            
-            if target:
-                m['target_id'] = id(target)
+            offset = enemies['pos'] - (m['x'], m['y'], m['z'])
+            dist_sq = np.einsum('ij,ij->i', offset, offset)
+            # Prefer enemies in front
+            candidates = enemies['active'] & (offset[:, 2] < 0) & (dist_sq < 9999 * 9999)
+            if candidates.any():
+                target = int(np.argmin(np.where(candidates, dist_sq, np.inf)))
+                m['target_id'] = int(enemies['uid'][target])
         
-        # 2. Homing Physics
-        if target:
+        # 2. Homing Physics (target is a pool row index and 0 is a valid row, so compare against None)
+        if target is not None:
             # Vector to target
-            tx, ty, tz = target['x'], target['y'], target['z']
+            tx, ty, tz = enemies['pos'][target]
             dx = tx - m['x']
             dy = ty - m['y']
             dz = tz - m['z']
@@ -1423,63 +3124,55 @@ def update_missiles():
                 dz /= mag
                 
                 # Steer missile (interpolate velocity)
-                steer_strength = 0.2
-                m['dx'] = m['dx'] * (1 - steer_strength) + dx * steer_strength
-                m['dy'] = m['dy'] * (1 - steer_strength) + dy * steer_strength
-                m['dz'] = m['dz'] * (1 - steer_strength) + dz * steer_strength
+                m['dx'] = m['dx'] * (1 - MISSILE_STEER) + dx * MISSILE_STEER
+                m['dy'] = m['dy'] * (1 - MISSILE_STEER) + dy * MISSILE_STEER
+                m['dz'] = m['dz'] * (1 - MISSILE_STEER) + dz * MISSILE_STEER
         
         # Apply steering to position
         m['x'] += m['dx'] * MISSILE_SPEED
         m['y'] += m['dy'] * MISSILE_SPEED
         m['z'] += m['dz'] * MISSILE_SPEED # Extra Z push
+        emit_particles('trail', (m['x'], m['y'], m['z']), 2)
         
         # 3. Collision with Enemies
         hit = False
-        for e in enemies:
-            if not e['active']: continue
-            
-            dx = m['x'] - e['x']
-            dy = m['y'] - e['y']
-            dz = m['z'] - e['z']
-            dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-            
-            if dist < e['radius'] + 5:
-                e['hp'] -= 5 # High damage
+        point = (m['x'], m['y'], m['z'])
+        for i in enemy_probe_rows(point, point, MISSILE_HIT_RADIUS):
+            x, y, z = enemies['pos'][i]
+            if hitbox_hit(HITBOXES[ENEMY_TYPES[enemies['type'][i]]], x, y, z, point,
+                          probe_radius=MISSILE_HIT_RADIUS):
+                enemies['hp'][i] -= MISSILE_DAMAGE
                 hit = True
-                if e['hp'] <= 0:
-                    e['active'] = False
-                    pts = 50
-                    if e['type'] == 'fast': pts = 100
-                    elif e['type'] == 'heavy': pts = 300
-                    score += pts
+                emit_particles('impact', point, 12)
+                if enemies['hp'][i] <= 0:
+                    destroy_enemy(i)
                 break
         
-        if hit:
+        if hit or m['z'] <= BULLET_MAX_DIST:
             m['life'] = 0 # Destroy missile
+            expired_early = True
 
-    # Cleanup
-    missiles[:] = [m for m in missiles if m['life'] > 0 and m['z'] > BULLET_MAX_DIST]
+    # Cleanup: missiles age in launch order, so expired ones are at the front
+    if expired_early:
+        missiles[:] = [m for m in missiles if m['life'] > 0]
+    else:
+        del missiles[:bisect.bisect_right(missiles, 0, key=lambda m: m['life'])]
 
 def draw_missiles():
     """Render missiles"""
     for m in missiles:
-        glPushMatrix()
-        glTranslatef(m['x'], m['y'], m['z'])
+        rc_push()
+        rc_translate(m['x'], m['y'], m['z'])
         
         # Rotate to face direction of travel? 
         # For simplicity, just draw a cool shape
         
-        glColor3f(1.0, 0.5, 0.0) # Orange
+        rc_color(1.0, 0.5, 0.0) # Orange
         draw_sphere(2)
         
-        # Trail
-        glColor3f(1.0, 1.0, 0.0)
-        glBegin(GL_LINES)
-        glVertex3f(0, 0, 0)
-        glVertex3f(0, 0, 10) # Trail behind
-        glEnd()
+        # Trail is emitted as particles in update_missiles
         
-        glPopMatrix()
+        rc_pop()
 
 
 def spawn_boss():
@@ -1488,12 +3181,13 @@ def spawn_boss():
     boss = {
         'x': 0,
         'y': 20,
-        'z': -200, # Stay in distance
-        'hp': 500,
-        'max_hp': 500,
+        'z': BOSS_Z,
+        'hp': BOSS_HP,
+        'max_hp': BOSS_HP,
         'active': True,
         'angle': 0,
-        'timer': 0
+        'timer': 0,
+        'phase': 0
     }
 
 def update_boss():
@@ -1507,44 +3201,42 @@ def update_boss():
     boss['x'] = math.sin(boss['angle']) * 80
     boss['y'] = math.cos(boss['angle'] * 2) * 30 + 10
     
-    # Shooting
+    # Shooting: pattern mix depends on the phase (by remaining HP)
     boss['timer'] += 1
-    if boss['timer'] > 60:
-        boss['timer'] = 0
-        # Fire spread
-        for i in range(-1, 2):
-            dx = (player_x - boss['x']) + i * 40
-            dy = (player_y - boss['y'])
-            dz = (player_z - boss['z'])
-            mag = math.sqrt(dx*dx + dy*dy + dz*dz)
-            
-            enemy_bullets.append({
-                'x': boss['x'],
-                'y': boss['y'],
-                'z': boss['z'],
-                'dx': dx / mag,
-                'dy': dy / mag,
-                'dz': dz / mag
-            })
+    hp_pct = boss['hp'] / boss['max_hp']
+    boss['phase'] = 0 if hp_pct > 0.66 else (1 if hp_pct > 0.33 else 2)
+    origin = (boss['x'], boss['y'], boss['z'])
+    
+    if boss['phase'] == 0:
+        if boss['timer'] % 60 == 0:
+            pattern_aimed_fan(origin, 3, 80) # Original three-bullet spread
+    elif boss['phase'] == 1:
+        if boss['timer'] % 45 == 0:
+            pattern_aimed_fan(origin, 7, 180)
+        if boss['timer'] % 90 == 0:
+            pattern_ring(origin, 24, 60, phase=boss['angle'])
+    else:
+        if boss['timer'] % 3 == 0:
+            pattern_spiral(origin, 8, boss['timer'] * 0.07)
+        if boss['timer'] % 60 == 0:
+            pattern_aimed_fan(origin, 5, 120)
+            pattern_ring(origin, 36, 45, phase=boss['angle'])
             
-    # Collision with Player Bullets
+    # Collision with Player Bullets (body plus spinning spikes)
+    hitbox = boss_hitbox(boss)
     for b in bullets:
-        dx = b['x'] - boss['x']
-        dy = b['y'] - boss['y']
-        dz = b['z'] - boss['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        # Boss Hitbox is large
-        if dist < 25:
-            if b.get('type') == 'laser':
-                boss['hp'] -= 2 # Laser tick
-            else:
-                boss['hp'] -= 5
-                b['z'] = 100 # Despawn
+        if not b['active']: continue
+        p0, p1, probe_radius = bullet_probe(b)
+        if hitbox_hit(hitbox, boss['x'], boss['y'], boss['z'], p0, p1, probe_radius):
+            emit_particles('impact', (b['x'], b['y'], b['z']), 4 if b.get('type') == 'laser' else 10)
+            boss['hp'] -= BOSS_BULLET_DAMAGE[b['type']]
+            if b['type'] != 'laser':
+                spend_bullet(b)
             
             if boss['hp'] <= 0:
                 boss['active'] = False
-                score += 5000
+                emit_particles('explosion', (boss['x'], boss['y'], boss['z']), 2000, scale=4.0)
+                score += BOSS_POINTS
                 print("BOSS DEFEATED!")
                 # Trigger Win
                 # We'll handle win state in logic
@@ -1554,106 +3246,512 @@ def update_boss():
 
     # Collision with Missiles
     for m in missiles:
-        dx = m['x'] - boss['x']
-        dy = m['y'] - boss['y']
-        dz = m['z'] - boss['z']
-        dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if dist < 25:
-            boss['hp'] -= 15
+        if hitbox_hit(hitbox, boss['x'], boss['y'], boss['z'], (m['x'], m['y'], m['z']),
+                      probe_radius=MISSILE_HIT_RADIUS):
+            boss['hp'] -= MISSILE_BOSS_DAMAGE
             m['life'] = 0
+            emit_particles('explosion', (m['x'], m['y'], m['z']), 80)
             if boss['hp'] <= 0:
                 boss['active'] = False
-                score += 5000
+                emit_particles('explosion', (boss['x'], boss['y'], boss['z']), 2000, scale=4.0)
+                score += BOSS_POINTS
 
 def draw_boss():
     """Render the Boss"""
     if not boss or not boss['active']: return
     
-    glPushMatrix()
-    glTranslatef(boss['x'], boss['y'], boss['z'])
+    rc_push()
+    rc_translate(boss['x'], boss['y'], boss['z'])
     
     # Main Body
-    glColor3f(0.8, 0.0, 0.0) # Red
+    rc_color(0.8, 0.0, 0.0) # Red
     draw_sphere(15)
     
     # Spikes / Details
-    glColor3f(0.2, 0.0, 0.0)
+    rc_color(0.2, 0.0, 0.0)
     for i in range(8):
-        glPushMatrix()
-        glRotatef(i * 45 + boss['timer'], 0, 0, 1)
-        glTranslatef(15, 0, 0)
-        glRotatef(90, 0, 1, 0)
+        rc_push()
+        rc_rotate(i * 45 + boss['timer'], 0, 0, 1)
+        rc_translate(15, 0, 0)
+        rc_rotate(90, 0, 1, 0)
         draw_cylinder(2, 10)
-        glPopMatrix()
+        rc_pop()
         
     # Core
-    glColor3f(1.0, 0.5, 0.0)
-    glPushMatrix()
-    glScalef(1.2 + math.sin(boss['timer']*0.1)*0.2, 1.2, 1.2) # Pulsing effect
+    rc_color(1.0, 0.5, 0.0)
+    rc_push()
+    rc_scale(1.2 + math.sin(boss['timer']*0.1)*0.2, 1.2, 1.2) # Pulsing effect
     draw_sphere(8)
-    glPopMatrix()
+    rc_pop()
     
-    glPopMatrix()
+    rc_pop()
+
 
+def spend_bullet(b):
+    """Mark a bullet as used up; it's removed in update_bullets"""
+    global spent_bullets
+    b['active'] = False
+    spent_bullets += 1
 
 def update_bullets():
     """Move bullets and check cleanup"""
+    global spent_bullets
     for b in bullets:
         b['z'] -= BULLET_SPEED * 20 # Move forward fast
     
-    # Remove far bullets
-    bullets[:] = [b for b in bullets if b['z'] > BULLET_MAX_DIST]
+    # Remove far bullets (oldest first, so they're at the front)
+    del bullets[:bisect.bisect_right(bullets, BULLET_MAX_DIST, key=lambda b: b['z'])]
+    if spent_bullets:
+        bullets[:] = [b for b in bullets if b['active']]
+        spent_bullets = 0
 
 def draw_bullets():
     """Render bullets and 3D crosshair"""
     # Bullets & Lasers
     for b in bullets:
-        glPushMatrix()
-        glTranslatef(b['x'], b['y'], b['z'])
+        rc_push()
+        rc_translate(b['x'], b['y'], b['z'])
         
         if b.get('type') == 'laser':
             # Laser: Long Red Beam
-            glColor3f(1.0, 0.0, 0.2)
-            glScalef(1.5, 0.5, 40.0) # Very long
+            rc_color(1.0, 0.0, 0.2)
+            rc_scale(1.5, 0.5, 40.0) # Very long
             draw_cube(2)
         else:
             # Normal: Yellow
-            glColor3f(1.0, 1.0, 0.0)
-            glScalef(2.0, 2.0, 8.0)
+            rc_color(1.0, 1.0, 0.0)
+            rc_scale(2.0, 2.0, 8.0)
             draw_sphere(2)
             
-        glPopMatrix()
+        rc_pop()
         
     # Enemy Bullets
-    glColor3f(1.0, 0.0, 0.0) # Red
-    for b in enemy_bullets:
-        glPushMatrix()
-        glTranslatef(b['x'], b['y'], b['z'])
+    rc_color(1.0, 0.0, 0.0) # Red
+    for x, y, z in enemy_bullets['pos'].tolist():
+        rc_push()
+        rc_translate(x, y, z)
         draw_sphere(1.5) # Smaller and less distracting
-        glPopMatrix()
+        rc_pop()
         
-    # 3D Crosshair (Projected at target distance)
+    # 3D Crosshair (Projected at target distance), one per jet
     # This helps aim
-    glPushMatrix()
-    glTranslatef(player_x, player_y, player_z - 600) # Slightly closer than max range for visibility
-    glColor3f(0.0, 1.0, 0.0)
-    # glLineWidth removed
-    glBegin(GL_LINES)
-    # Plus sign
-    glVertex3f(-20, 0, 0); glVertex3f(20, 0, 0)
-    glVertex3f(0, -20, 0); glVertex3f(0, 20, 0)
-    glEnd()
-    # glLineWidth(1) removed
+    rc_color(0.0, 1.0, 0.0)
+    for x, y, z in jet_positions():
+        rc_push()
+        rc_translate(x, y, z - 600) # Slightly closer than max range for visibility
+        submit(mesh_id('crosshair'))
+        rc_pop()
+
+
+# ============ PARTICLES ============
+
+# One array pool per emitter class so each class renders as a single point batch.
+# PARTICLE_BUDGET is a hard cap across all classes: emission beyond it is dropped.
+PARTICLE_BUDGET = 20000
+PARTICLE_CLASSES = {
+    'explosion': {'speed': 2.5, 'life': 40, 'color': (1.0, 0.55, 0.1), 'gravity': 0.03, 'drag': 0.94, 'size': 4.0},
+    'impact':    {'speed': 1.5, 'life': 15, 'color': (1.0, 1.0, 0.6), 'gravity': 0.0,  'drag': 0.85, 'size': 3.0},
+    'trail':     {'speed': 0.3, 'life': 20, 'color': (1.0, 1.0, 0.0), 'gravity': 0.0,  'drag': 0.90, 'size': 2.0},
+}
+
+particle_pools = {name: ArrayPool({
+    'pos': (np.float32, 3),
+    'vel': (np.float32, 3),
+    'life': (np.float32, 1),
+}, capacity=1024) for name in PARTICLE_CLASSES}
+particle_rng = np.random.default_rng()
+
+
+def particle_count():
+    return sum(len(pool) for pool in particle_pools.values())
+
+
+def emit_particles(kind, origin, count, scale=1.0):
+    """Burst of particles from origin with random directions, clipped to the budget"""
+    count = min(count, PARTICLE_BUDGET - particle_count())
+    if count <= 0:
+        return
+    spec = PARTICLE_CLASSES[kind]
+    dirs = particle_rng.standard_normal((count, 3)).astype(np.float32)
+    dirs /= np.maximum(np.linalg.norm(dirs, axis=1, keepdims=True), 1e-6)
+    speeds = particle_rng.uniform(0.3, 1.0, (count, 1)).astype(np.float32) * spec['speed'] * scale
+    life = particle_rng.uniform(0.6, 1.0, count).astype(np.float32) * spec['life']
+    particle_pools[kind].add(count, pos=origin, vel=dirs * speeds, life=life)
+
+
+def step_particles(spec, pos, vel, life):
+    """Advance particle columns one tick in place; returns the mask of particles still alive"""
+    vel *= spec['drag']
+    vel[:, 1] -= spec['gravity']
+    pos += vel
+    pos[:, 2] += GAME_SPEED # Debris drifts with the world
+    life -= 1
+    return life > 0
+
+
+def update_particles():
+    """Integrate all particles (drag, gravity, world scroll) and drop expired ones"""
+    for kind, pool in particle_pools.items():
+        if pool.count == 0:
+            continue
+        pool.keep(step_particles(PARTICLE_CLASSES[kind], pool['pos'], pool['vel'], pool['life']))
+
+
+def particle_batches():
+    """(point size, positions, colours) per emitter class, fading colour with remaining life"""
+    batches = []
+    for kind, pool in particle_pools.items():
+        if pool.count == 0:
+            continue
+        spec = PARTICLE_CLASSES[kind]
+        fade = np.clip(pool['life'] / spec['life'], 0.0, 1.0)
+        colors = np.outer(fade, spec['color']).astype(np.float32)
+        batches.append((spec['size'], np.ascontiguousarray(pool['pos']), colors))
+    return batches
+
+
+def draw_particles(batches, scale=1.0):
+    """Render each particle_batches entry as one GL_POINTS batch (point sizes are pixels, so follow the render scale)"""
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    for size, positions, colors in batches:
+        glPointSize(max(1.0, size * scale))
+        glVertexPointer(3, GL_FLOAT, 0, positions)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_POINTS, 0, len(positions))
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glPointSize(1.0)
+
+
+# ============ SNAPSHOTS ============
+
+# A snapshot is the full PLAYING state in one versioned binary blob: a header,
+# the scalar globals as one packed struct, RNG states, the boss, then every
+# entity container as a row count followed by its raw columns. Dict lists are
+# packed into the same column layout as the array pools, so saving is a few
+# tobytes() calls and loading is np.frombuffer plus pool.add.
+SNAPSHOT_MAGIC = b'SQSN'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<4sH')
+SNAPSHOT_COUNT = struct.Struct('<I')
+SNAPSHOT_SCALARS = [
+    ('current_level', 'B'), ('score', 'q'), ('elapsed_time', 'd'), ('cheat_mode', '?'),
+    ('player_x', 'd'), ('player_y', 'd'), ('player_z', 'd'), ('player_vx', 'd'), ('player_vy', 'd'),
+    ('player_hp', 'i'), ('player_shield', '?'), ('laser_active', '?'), ('laser_timer', 'd'),
+    ('missile_cooldown_timer', 'd'), ('spent_bullets', 'I'), ('next_enemy_uid', 'q'),
+    ('spawn_variant', 'B'), ('spawn_cursor', 'I'), ('level_tick', 'I'),
+    ('coop', '?'), ('wingman_x', 'd'), ('wingman_y', 'd'), ('wingman_vx', 'd'), ('wingman_vy', 'd'),
+]
+SNAPSHOT_SCALAR_STRUCT = struct.Struct('<' + ''.join(code for _, code in SNAPSHOT_SCALARS))
+SNAPSHOT_BOSS = struct.Struct('<?dddiidii?')  # present, x, y, z, hp, max_hp, angle, timer, phase, active
+SNAPSHOT_PCG64 = struct.Struct('<QQQQ?I')  # state hi/lo, inc hi/lo, has_uint32, uinteger
+SNAPSHOT_GAUSS = struct.Struct('<?d')
+# Dict-list containers as columns; string types are stored as indexes
+SNAPSHOT_OBSTACLE_TYPES = tuple(sorted({name for level in LEVEL_DEFS for name in level['obstacles']['types']}))
+SNAPSHOT_BULLET_TYPES = ('normal', 'laser')
+SNAPSHOT_LIST_FIELDS = {
+    'obstacles': {'pos': (np.float64, 3), 'type': (np.uint8, 1)},
+    'bullets': {'pos': (np.float64, 3), 'type': (np.uint8, 1), 'active': (np.bool_, 1)},
+    'missiles': {'pos': (np.float64, 3), 'vel': (np.float64, 3), 'target': (np.int64, 1), 'life': (np.int32, 1)},
+}
+# Header, scalars, the random module's state (625 words), gauss, two PCG64 states and the boss
+SNAPSHOT_PREFIX_SIZE = (SNAPSHOT_HEADER.size + SNAPSHOT_SCALAR_STRUCT.size + 625 * 4 + SNAPSHOT_GAUSS.size
+                        + 2 * SNAPSHOT_PCG64.size + SNAPSHOT_BOSS.size)
+AUTOSAVE_PATH = "autosave.sqs"
+AUTOSAVE_TICKS = 600  # ~10 s of play between autosaves
+SNAPSHOT_DIR = "snapshots"
+
+autosave_countdown = AUTOSAVE_TICKS
+snapshot_stats = {'saves': 0, 'bytes': 0, 'pack_ms': 0.0}
+
+
+def snapshot_pools():
+    """Array pools in snapshot order"""
+    pools = [('enemies', enemies), ('enemy_bullets', enemy_bullets), ('collectibles', collectibles)]
+    return pools + [('particles_' + kind, pool) for kind, pool in particle_pools.items()]
+
+
+def snapshot_containers():
+    """(name, fields) of every pack_columns container after the prefix, in snapshot order"""
+    return [(name, pool.fields) for name, pool in snapshot_pools()] + list(SNAPSHOT_LIST_FIELDS.items())
+
+
+def pack_columns(parts, fields, columns, count):
+    parts.append(SNAPSHOT_COUNT.pack(count))
+    for name, (dtype, width) in fields.items():
+        parts.append(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+
+def unpack_columns(data, offset, fields):
+    """Read one container written by pack_columns; returns (count, columns, new offset)"""
+    count, = SNAPSHOT_COUNT.unpack_from(data, offset)
+    offset += SNAPSHOT_COUNT.size
+    columns = {}
+    for name, (dtype, width) in fields.items():
+        column = np.frombuffer(data, dtype=dtype, count=count * width, offset=offset)
+        offset += column.nbytes
+        columns[name] = column if width == 1 else column.reshape(count, width)
+    return count, columns, offset
+
+
+def pack_rng(parts, rng):
+    state = rng.bit_generator.state
+    mask = (1 << 64) - 1
+    s, inc = state['state']['state'], state['state']['inc']
+    parts.append(SNAPSHOT_PCG64.pack(s >> 64, s & mask, inc >> 64, inc & mask,
+                                     bool(state['has_uint32']), state['uinteger']))
+
+
+def unpack_rng(data, offset, rng):
+    s_hi, s_lo, inc_hi, inc_lo, has_uint32, uinteger = SNAPSHOT_PCG64.unpack_from(data, offset)
+    rng.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {'state': (s_hi << 64) | s_lo, 'inc': (inc_hi << 64) | inc_lo},
+        'has_uint32': int(has_uint32),
+        'uinteger': uinteger,
+    }
+    return offset + SNAPSHOT_PCG64.size
+
+
+def save_snapshot():
+    """Pack the current game state into bytes"""
+    state = globals()
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+             SNAPSHOT_SCALAR_STRUCT.pack(*(state[name] for name, _ in SNAPSHOT_SCALARS))]
     
-    # Add a circle around it for better visibility
-    glBegin(GL_LINE_LOOP)
-    for i in range(20):
-        angle = 2 * 3.14159 * i / 20
-        glVertex3f(math.cos(angle)*15, math.sin(angle)*15, 0)
-    glEnd()
+    version, internal, gauss = random.getstate()
+    parts.append(array('I', internal).tobytes())
+    parts.append(SNAPSHOT_GAUSS.pack(gauss is not None, gauss or 0.0))
+    pack_rng(parts, enemy_rng)
+    pack_rng(parts, particle_rng)
     
-    glPopMatrix()
+    if boss:
+        parts.append(SNAPSHOT_BOSS.pack(True, boss['x'], boss['y'], boss['z'], boss['hp'], boss['max_hp'],
+                                        boss['angle'], boss['timer'], boss['phase'], boss['active']))
+    else:
+        parts.append(SNAPSHOT_BOSS.pack(False, 0, 0, 0, 0, 0, 0, 0, 0, False))
+    
+    for name, pool in snapshot_pools():
+        pack_columns(parts, pool.fields, pool, len(pool))
+    
+    fields = SNAPSHOT_LIST_FIELDS
+    pack_columns(parts, fields['obstacles'], {
+        'pos': [(o['x'], o['y'], o['z']) for o in obstacles],
+        'type': [SNAPSHOT_OBSTACLE_TYPES.index(o['type']) for o in obstacles],
+    }, len(obstacles))
+    pack_columns(parts, fields['bullets'], {
+        'pos': [(b['x'], b['y'], b['z']) for b in bullets],
+        'type': [SNAPSHOT_BULLET_TYPES.index(b['type']) for b in bullets],
+        'active': [b['active'] for b in bullets],
+    }, len(bullets))
+    pack_columns(parts, fields['missiles'], {
+        'pos': [(m['x'], m['y'], m['z']) for m in missiles],
+        'vel': [(m['dx'], m['dy'], m['dz']) for m in missiles],
+        'target': [-1 if m['target_id'] is None else m['target_id'] for m in missiles],
+        'life': [m['life'] for m in missiles],
+    }, len(missiles))
+    return b''.join(parts)
+
+
+def load_snapshot(data, timeline=True):
+    """Restore the game state from save_snapshot bytes and resume PLAYING (timeline=False skips the spawn timeline)"""
+    global game_state, paused, last_time, boss, obstacles, bullets, missiles, spawn_timeline
+    magic, version = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a StratoQuest snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    offset = SNAPSHOT_HEADER.size
+    
+    values = SNAPSHOT_SCALAR_STRUCT.unpack_from(data, offset)
+    offset += SNAPSHOT_SCALAR_STRUCT.size
+    globals().update(zip((name for name, _ in SNAPSHOT_SCALARS), values))
+    
+    internal = array('I')
+    internal.frombytes(data[offset:offset + 625 * internal.itemsize])
+    offset += 625 * internal.itemsize
+    has_gauss, gauss = SNAPSHOT_GAUSS.unpack_from(data, offset)
+    offset += SNAPSHOT_GAUSS.size
+    random.setstate((3, tuple(internal), gauss if has_gauss else None))
+    offset = unpack_rng(data, offset, enemy_rng)
+    offset = unpack_rng(data, offset, particle_rng)
+    
+    present, x, y, z, hp, max_hp, angle, timer, phase, active = SNAPSHOT_BOSS.unpack_from(data, offset)
+    offset += SNAPSHOT_BOSS.size
+    boss = {'x': x, 'y': y, 'z': z, 'hp': hp, 'max_hp': max_hp, 'active': active,
+            'angle': angle, 'timer': timer, 'phase': phase} if present else None
+    
+    for name, pool in snapshot_pools():
+        count, columns, offset = unpack_columns(data, offset, pool.fields)
+        pool.clear()
+        pool.add(count, **columns)
+    
+    fields = SNAPSHOT_LIST_FIELDS
+    count, c, offset = unpack_columns(data, offset, fields['obstacles'])
+    obstacles = [{'x': float(c['pos'][i, 0]), 'y': float(c['pos'][i, 1]), 'z': float(c['pos'][i, 2]),
+                  'type': SNAPSHOT_OBSTACLE_TYPES[c['type'][i]], 'active': True} for i in range(count)]
+    count, c, offset = unpack_columns(data, offset, fields['bullets'])
+    bullets = [{'x': float(c['pos'][i, 0]), 'y': float(c['pos'][i, 1]), 'z': float(c['pos'][i, 2]),
+                'type': SNAPSHOT_BULLET_TYPES[c['type'][i]], 'active': bool(c['active'][i])} for i in range(count)]
+    count, c, offset = unpack_columns(data, offset, fields['missiles'])
+    missiles = [{'x': float(c['pos'][i, 0]), 'y': float(c['pos'][i, 1]), 'z': float(c['pos'][i, 2]),
+                 'dx': float(c['vel'][i, 0]), 'dy': float(c['vel'][i, 1]), 'dz': float(c['vel'][i, 2]),
+                 'target_id': None if c['target'][i] < 0 else int(c['target'][i]),
+                 'life': int(c['life'][i])} for i in range(count)]
+    
+    if timeline:
+        spawn_timeline = load_spawn_timeline(current_level, spawn_variant)
+    game_state = PLAYING
+    paused = False
+    last_time = time.time()
+
+
+def write_snapshot(path):
+    """Save a snapshot to path atomically; returns the byte count"""
+    start = time.perf_counter()
+    data = save_snapshot()
+    snapshot_stats['pack_ms'] = (time.perf_counter() - start) * 1000.0
+    snapshot_stats['bytes'] = len(data)
+    snapshot_stats['saves'] += 1
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        load_snapshot(f.read())
+
+
+def autosave():
+    """Called once per PLAYING tick; writes AUTOSAVE_PATH every AUTOSAVE_TICKS"""
+    global autosave_countdown
+    autosave_countdown -= 1
+    if autosave_countdown > 0:
+        return
+    autosave_countdown = AUTOSAVE_TICKS
+    try:
+        write_snapshot(AUTOSAVE_PATH)
+    except OSError as e:
+        print(f"Autosave failed: {e}")
+
+
+def discard_autosave():
+    """The run ended, so there's nothing to resume"""
+    try:
+        os.remove(AUTOSAVE_PATH)
+    except OSError:
+        pass
+
+
+# ============ REPLAYS ============
+
+# --record PATH writes every PLAYING tick's snapshot to a replay file (see
+# replay.py). --replay PATH plays one back: idle() decodes the snapshot for
+# the current replay tick instead of simulating, so fast-forward only decodes
+# deltas and renders the frames that are actually shown.
+REPLAY_SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 64.0)
+REPLAY_SEEK_TICKS = 600  # Arrow keys jump 10 s
+
+replay_writer = None
+replay_reader = None
+replay_tick = 0.0
+replay_speed = 1.0
+replay_paused = False
+
+
+def record_replay_tick():
+    if replay_writer is not None:
+        replay_writer.write(save_snapshot())
+
+
+def close_replay():
+    """Finish the recording (registered with atexit)"""
+    if replay_writer is not None:
+        replay_writer.close()
+        print(f"Replay: {replay_writer.ticks} ticks, {replay_writer.bytes_raw} B of snapshots -> "
+              f"{replay_writer.file.name}")
+
+
+def replay_seek(tick):
+    """Show the recorded state at a tick"""
+    global replay_tick
+    replay_tick = float(max(0, min(tick, replay_reader.ticks - 1)))
+    load_snapshot(replay_reader.seek(int(replay_tick)), timeline=False)
+
+
+def advance_replay():
+    """Move the replay cursor by one frame's worth of ticks"""
+    if not replay_paused:
+        replay_seek(replay_tick + replay_speed)
+
+
+def replay_keyboard(key):
+    """Playback controls: SPACE pause, +/- speed, ESC quit"""
+    global replay_paused, replay_speed
+    if key == b'\x1b':
+        sys.exit()
+    elif key == b' ':
+        replay_paused = not replay_paused
+    elif key in (b'+', b'='):
+        replay_speed = REPLAY_SPEEDS[min(REPLAY_SPEEDS.index(replay_speed) + 1, len(REPLAY_SPEEDS) - 1)]
+    elif key == b'-':
+        replay_speed = REPLAY_SPEEDS[max(REPLAY_SPEEDS.index(replay_speed) - 1, 0)]
+    elif key == b'p':
+        global show_perf_overlay
+        show_perf_overlay = not show_perf_overlay
+
+
+def replay_special(key):
+    """Arrow keys seek, HOME/END jump to the ends"""
+    if key == GLUT_KEY_LEFT:
+        replay_seek(replay_tick - REPLAY_SEEK_TICKS)
+    elif key == GLUT_KEY_RIGHT:
+        replay_seek(replay_tick + REPLAY_SEEK_TICKS)
+    elif key == GLUT_KEY_HOME:
+        replay_seek(0)
+    elif key == GLUT_KEY_END:
+        replay_seek(replay_reader.ticks - 1)
+
+
+def draw_replay_status():
+    seconds = int(replay_tick) // 60
+    total = replay_reader.ticks // 60
+    text = f"REPLAY {seconds // 60}:{seconds % 60:02d} / {total // 60}:{total % 60:02d}  x{replay_speed:g}"
+    if replay_paused:
+        text += "  PAUSED"
+    draw_text_with_border(text, WINDOW_WIDTH // 2, WINDOW_HEIGHT - 30, (0.6, 0.9, 1.0), centered=True)
+
+
+def move_jet(x, y, vx, vy):
+    """One tick of inertia movement inside the play area; returns the new (x, y, vx, vy)"""
+    # Apply Velocity & Friction
+    x += vx
+    y += vy
+    
+    # Apply friction
+    vx *= PLAYER_FRICTION
+    vy *= PLAYER_FRICTION
+    
+    # Zero out low velocity
+    if abs(vx) < PLAYER_MIN_SPEED: vx = 0
+    if abs(vy) < PLAYER_MIN_SPEED: vy = 0
+
+    # Boundary checks
+    x = max(-player_bounds_x, min(player_bounds_x, x))
+    y = max(-player_bounds_y, min(player_bounds_y, y))
+    
+    # Wall bounce
+    if x == -player_bounds_x or x == player_bounds_x: vx = 0
+    if y == -player_bounds_y or y == player_bounds_y: vy = 0
+    return x, y, vx, vy
+
 
 def update_game_logic():
     """Update movement and game state logic"""
@@ -1663,108 +3761,346 @@ def update_game_logic():
         # Check Game Over
         if player_hp <= 0:
             game_state = GAME_OVER
+            discard_autosave()
             return
 
         # Level Progression
-        if current_level == 0 and score >= 200:
-            current_level = 1
-            print("Level Up! -> 2")
-        elif current_level == 1 and score >= 500:
-            current_level = 2
-            print("Level Up! -> 3")
-        elif current_level == 2 and score >= 1000:
-            current_level = 3
-            print("Level Up! -> 4")
-        elif current_level == 3 and score >= 1500:
-            current_level = 4
-            spawn_boss()
-            print("BOSS BATTLE START!")
+        threshold = LEVEL_DEFS[current_level]['score_to_advance']
+        if threshold is not None and score >= threshold:
+            current_level += 1
+            start_level_timeline(current_level)
+            if current_level == BOSS_LEVEL:
+                spawn_boss()
+                print("BOSS BATTLE START!")
+            else:
+                print(f"Level Up! -> {current_level + 1}")
         
         # Boss Win Condition
-        if current_level == 4:
+        if current_level == BOSS_LEVEL:
             if boss and not boss['active']:
                 # Boss Dead
                 print("YOU WIN!")
                 game_state = GAME_OVER # Reuse screen, maybe change text
+                discard_autosave()
                 # We can handle text change in draw_game_over based on score/boss state
         
-        # Apply Velocity & Friction
-        player_x += player_vx
-        player_y += player_vy
-        
-        # Apply friction
-        friction = 0.85
-        player_vx *= friction
-        player_vy *= friction
-        
-        # Zero out low velocity
-        if abs(player_vx) < 0.1: player_vx = 0
-        if abs(player_vy) < 0.1: player_vy = 0
-
-        # Boundary checks
-        player_x = max(-player_bounds_x, min(player_bounds_x, player_x))
-        player_y = max(-player_bounds_y, min(player_bounds_y, player_y))
-        
-        # Wall bounce
-        if player_x == -player_bounds_x or player_x == player_bounds_x: player_vx = 0
-        if player_y == -player_bounds_y or player_y == player_bounds_y: player_vy = 0
+        player_x, player_y, player_vx, player_vy = move_jet(player_x, player_y, player_vx, player_vy)
+        if coop:
+            global wingman_x, wingman_y, wingman_vx, wingman_vy
+            wingman_x, wingman_y, wingman_vx, wingman_vy = move_jet(wingman_x, wingman_y, wingman_vx, wingman_vy)
 
         # Update World
-        spawn_obstacle()
-        update_obstacles()
+        with profile_scope('spawn'):
+            run_spawn_timeline()
+        
+        with profile_scope('obstacles'):
+            update_obstacles()
         
-        spawn_pickup()
-        update_pickups()
+        with profile_scope('collectibles'):
+            update_collectibles()
         
-        if current_level < 4: # No minions during boss? Or maybe just fewer?
-            spawn_enemy() # Let them spawn for difficulty
+        with profile_scope('enemies'):
+            update_enemies()
         
-        update_enemies()
-        update_enemy_bullets()
+        with profile_scope('enemy_bullets'):
+            update_enemy_bullets()
         
-        if current_level == 4:
-            update_boss()
+        if current_level == BOSS_LEVEL:
+            with profile_scope('boss'):
+                update_boss()
         
-        spawn_ring()
-        update_rings()
+        with profile_scope('bullets'):
+            update_bullets()
+            update_missiles()
         
-        update_bullets()
-        update_missiles()
+        with profile_scope('particles'):
+            update_particles()
+        
+        with profile_scope('autosave'):
+            autosave()
+
+        with profile_scope('replay'):
+            record_replay_tick()
 
 
 def idle():
     """Idle callback for continuous rendering"""
-    update_game_logic()
-    display()
+    frame_start = time.perf_counter()
+    frame_time = time.time()
+    with profile_scope('update'):
+        if replay_reader is not None:
+            advance_replay()
+        else:
+            update_game_logic()
+    tick_ms = (time.perf_counter() - frame_start) * 1000.0
+    with profile_scope('display'):
+        display()
+    frame_ms = (time.perf_counter() - frame_start) * 1000.0
+    record_frame(frame_ms)
+    if gl_call_counts is not None:
+        update_gl_call_stats()
+    if benchmark is not None:
+        record_benchmark_frame(frame_ms - tick_ms)
+    if telemetry_writer is not None:
+        publish_telemetry(frame_start, frame_time, tick_ms, frame_ms)
+    if 'first_frame' not in startup_stats:
+        startup_stats['first_frame'] = frame_ms
+        print_startup_report()
 
 
 def reshape(width, height):
-    """Reshape callback"""
-    glViewport(0, 0, width, height)
+    """Reshape callback: projections, viewports, the HUD and the scene target all follow the window size"""
+    global WINDOW_WIDTH, WINDOW_HEIGHT
+    WINDOW_WIDTH, WINDOW_HEIGHT = max(1, width), max(1, height)  # Minimised windows report 0
+    glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+
+
+# ============ STARTUP ============
+
+# Once the window is open, warm_up() builds everything the first frames would
+# otherwise build mid-play: the circle tables, font display lists, shared
+# meshes and their GPU buffers, and each level's backdrop with the terrain
+# chunks at the start of the track. A loading bar is redrawn between steps,
+# and each phase is timed into startup_stats for the startup report.
+
+# Mesh keys requested by the draw_* functions; backdrops and terrain are warmed by drawing each level
+WARM_MESHES = [
+    ('sphere', 80, 80),
+    ('sphere', 60, 60),
+    ('cylinder', 80),
+    ('cube',),
+    ('quad',),
+    ('crosshair',),
+    ('torus', RING_RADIUS, RING_TUBE_RADIUS, 12, 4),
+    ('torus', RING_RADIUS, RING_TUBE_RADIUS, 32, 8),
+]
+WARM_TERRAIN_TIMEOUT = 10.0  # Seconds to wait for a level's terrain chunks before moving on
+
+startup_stats = {}  # Phase -> ms
+loading = None      # (fraction, label) while warm_up runs; display() shows the loading bar instead
+
+
+@contextmanager
+def startup_phase(name):
+    """Time a startup phase into startup_stats (repeated phases add up)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_stats[name] = startup_stats.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+
+def draw_loading_screen(fraction, label):
+    """Progress bar and the current warmup step"""
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluOrtho2D(0, WINDOW_WIDTH, WINDOW_HEIGHT, 0)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    
+    bar_width, bar_height = 400, 16
+    x, y = (WINDOW_WIDTH - bar_width) / 2, WINDOW_HEIGHT / 2
+    glDisable(GL_DEPTH_TEST)  # The fill sits on the track at the same depth
+    for color, width in (((0.2, 0.2, 0.2), bar_width), ((0.2, 0.6, 1.0), bar_width * fraction)):
+        glColor3f(*color)
+        glBegin(GL_QUADS)
+        glVertex3f(x, y, 0)
+        glVertex3f(x + width, y, 0)
+        glVertex3f(x + width, y + bar_height, 0)
+        glVertex3f(x, y + bar_height, 0)
+        glEnd()
+    glEnable(GL_DEPTH_TEST)
+    draw_text_2d(f"Loading {label}...", WINDOW_WIDTH // 2, y - 20, centered=True)
+
+
+def show_loading(fraction, label):
+    global loading
+    loading = (fraction, label)
+    display()
+    if bool(glutMainLoopEvent):  # freeglut: let the window map and repaint before the main loop starts
+        glutMainLoopEvent()
+
+
+def warm_fonts():
+    for font in (GLUT_BITMAP_TIMES_ROMAN_24, GLUT_BITMAP_HELVETICA_12):
+        font_list_base(font)
+
+
+def warm_meshes():
+    """Build the shared meshes and push them through the backend so their buffers exist"""
+    rc_begin_frame()
+    for key in WARM_MESHES:
+        submit(mesh_id(*key))
+    render_backend.execute(render_commands, np.identity(4, dtype=np.float32))
+
+
+def warm_level(level):
+    """Draw a level's backdrop until its starting terrain chunks are built and uploaded"""
+    global current_level, elapsed_time
+    saved = current_level, elapsed_time
+    current_level, elapsed_time = level, 0.0
+    try:
+        deadline = time.perf_counter() + WARM_TERRAIN_TIMEOUT
+        while True:
+            rc_begin_frame()
+            draw_current_level()  # Collects finished chunks and registers their meshes
+            if not terrain_streamer.pending or time.perf_counter() > deadline:
+                break
+            time.sleep(0.002)
+        render_backend.execute(render_commands, np.identity(4, dtype=np.float32))
+    finally:
+        current_level, elapsed_time = saved
+        rc_begin_frame()
+
+
+def warm_up():
+    """Build fonts, meshes and level backdrops behind a loading bar (call after create_window)"""
+    global loading
+    steps = [('tables', 'tables', geometry_tables.warm_tables),
+             ('fonts', 'text', warm_fonts),
+             ('meshes', 'meshes', warm_meshes)]
+    steps += [(f"level {level + 1}", 'levels', lambda level=level: warm_level(level))
+              for level in range(len(LEVEL_DEFS))]
+    with startup_phase('warmup'):
+        for i, (label, phase, step) in enumerate(steps):
+            show_loading(i / len(steps), label)
+            with startup_phase(phase):
+                step()
+        show_loading(1.0, 'done')
+    loading = None
+    startup_stats['warm_meshes'] = len(mesh_ids)
+
+
+def print_startup_report():
+    """One line of startup phase timings, printed after the first frame"""
+    stats = startup_stats
+    total = (time.perf_counter() - IMPORT_START) * 1000.0
+    over = " OVER BUDGET" if stats['import'] > IMPORT_BUDGET_MS else ""
+    warm = ", ".join(f"{phase} {stats[phase]:.0f}" for phase in ('tables', 'text', 'meshes', 'levels') if phase in stats)
+    print(f"Startup: import {stats['import']:.0f} ms (budget {IMPORT_BUDGET_MS:.0f}{over})  "
+          f"gl {stats.get('gl', 0.0):.0f} ms  window {stats.get('window', 0.0):.0f} ms  "
+          f"warmup {stats.get('warmup', 0.0):.0f} ms ({warm})  "
+          f"first frame {stats.get('first_frame', 0.0):.1f} ms  total {total:.0f} ms")
 
 
 # ============ MAIN ============
 
+def parse_args(argv):
+    """Parse StratoQuest options, leaving anything else for GLUT"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="StratoQuest", add_help=False)
+    parser.add_argument('--hitch-ms', type=float, default=HITCH_THRESHOLD_MS,
+                        help="frame time that triggers a hitch snapshot")
+    parser.add_argument('--hitch-dir', default=HITCH_DIR,
+                        help="directory for hitch snapshots")
+    parser.add_argument('--renderer', choices=['fixed', 'shader'], default='fixed',
+                        help="fixed-function GL or instanced GLSL 3.3")
+    parser.add_argument('--resume', nargs='?', const=AUTOSAVE_PATH, metavar='PATH',
+                        help="continue from a snapshot (default: the autosave)")
+    parser.add_argument('--record', metavar='PATH', help="record every played tick to a replay file")
+    parser.add_argument('--replay', metavar='PATH', help="play back a replay file instead of the game")
+    parser.add_argument('--replay-speed', type=float, default=1.0, choices=REPLAY_SPEEDS,
+                        help="initial playback speed in ticks per frame")
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help="publish per-frame stats to a shared-memory ring (read with telemetry.py)")
+    parser.add_argument('--coop', action='store_true',
+                        help="two-player split-screen (player 2: arrows to fly, '.' fire, ',' missiles)")
+    parser.add_argument('--render-scale', type=float, default=1.0, metavar='S',
+                        help=f"render the 3D scene at S times the window size ({RENDER_SCALE_MIN}-{RENDER_SCALE_MAX})")
+    parser.add_argument('--dynamic-res', action='store_true',
+                        help="scale the 3D resolution with the measured scene time")
+    parser.add_argument('--scene-budget-ms', type=float, default=SCENE_BUDGET_MS,
+                        help="scene time the dynamic resolution aims for")
+    parser.add_argument('--gl-profile', choices=list(GL_PROFILES), default=gl_profile,
+                        help="PyOpenGL checking: release (none), debug (errors logged, calls counted) or PyOpenGL's default")
+    parser.add_argument('--benchmark', type=int, metavar='FRAMES',
+                        help="with --replay: render FRAMES frames, print the timings and exit (see glbench.py)")
+    parser.add_argument('--budget', action='append', default=[], metavar='KIND=N',
+                        help="cap live entities of a kind (" + ", ".join(ENTITY_BUDGETS) + ")")
+    return parser.parse_known_args(argv[1:])
+
+
+def create_window(glut_args, renderer, title=b"StratoQuest"):
+    """Open the GLUT window and create the render backend (callbacks are left to the caller)"""
+    global render_backend
+    with startup_phase('gl'):
+        load_gl()
+    with startup_phase('window'):
+        glutInit([sys.argv[0]] + glut_args)
+        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+        glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
+        glutInitWindowPosition(100, 100)
+        glutCreateWindow(title)
+        
+        glEnable(GL_DEPTH_TEST)
+        glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+        
+        render_backend = create_render_backend(renderer)
+
+
 def main():
     """Initialize and run the game"""
-    glutInit(sys.argv)
-    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
-    glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
-    glutInitWindowPosition(100, 100)
-    glutCreateWindow(b"StratoQuest")
+    global HITCH_THRESHOLD_MS, HITCH_DIR
     
-    glEnable(GL_DEPTH_TEST)
-    glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+    args, glut_args = parse_args(sys.argv)
+    HITCH_THRESHOLD_MS = args.hitch_ms
+    HITCH_DIR = args.hitch_dir
+    for entry in args.budget:
+        kind, _, limit = entry.partition('=')
+        if kind not in ENTITY_BUDGETS or not limit.isdigit():
+            sys.exit(f"--budget expects KIND=N with KIND in {', '.join(ENTITY_BUDGETS)}")
+        ENTITY_BUDGETS[kind] = int(limit)
+    global replay_writer, replay_reader, replay_speed, telemetry_writer, coop
+    global render_scale, dynamic_resolution, SCENE_BUDGET_MS, gl_profile, benchmark
+    coop = args.coop
+    gl_profile = args.gl_profile
+    if not RENDER_SCALE_MIN <= args.render_scale <= RENDER_SCALE_MAX:
+        sys.exit(f"--render-scale must be between {RENDER_SCALE_MIN} and {RENDER_SCALE_MAX}")
+    render_scale = args.render_scale
+    dynamic_resolution = args.dynamic_res
+    SCENE_BUDGET_MS = args.scene_budget_ms
+    if args.telemetry:
+        telemetry_writer = telemetry.TelemetryWriter(args.telemetry)
+    if args.replay:
+        replay_reader = replay.ReplayReader(args.replay)
+        if replay_reader.ticks == 0:
+            sys.exit(f"{args.replay} has no recorded ticks")
+        replay_speed = args.replay_speed
+        replay_seek(0)
+        print(f"Replay: {replay_reader.ticks} ticks from {args.replay}")
+        if args.benchmark:
+            benchmark = {'frames': min(args.benchmark, int(replay_reader.ticks / replay_speed)),
+                         'display_ms': [], 'gl_calls': []}
+    elif args.benchmark:
+        sys.exit("--benchmark needs a recorded session (--replay PATH)")
+    elif args.record:
+        replay_writer = replay.ReplayWriter(args.record)
+        atexit.register(close_replay)
+    if args.resume and replay_reader is None:
+        try:
+            read_snapshot(args.resume)
+            print(f"Resumed level {current_level + 1}, score {score} from {args.resume}")
+        except FileNotFoundError:
+            print(f"No snapshot at {args.resume}, starting from the menu")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Could not resume from {args.resume}: {e}")
+    atexit.register(print_frame_report)
     
+    create_window(glut_args, args.renderer)
     glutDisplayFunc(display)
+    glutReshapeFunc(reshape)
     glutKeyboardFunc(keyboard)
     # glutKeyboardUpFunc removed to comply with spec
     glutSpecialFunc(special)
     glutMouseFunc(mouse)
     glutIdleFunc(idle)
     
+    warm_up()  # Callbacks first: freeglut may repaint the window while the loading bar is up
     glutMainLoop()
 
 
+startup_stats['import'] = (time.perf_counter() - IMPORT_START) * 1000.0
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,478 @@
+"""Authoritative server / rendering client split over asyncio.
+
+The server runs the normal simulation headless at TICK_RATE. After every
+tick it sends each client the game's binary snapshot (see save_snapshot in
+main.py). The first message to a client is a zlib-compressed keyframe. Later
+ones are deltas: each column is XORed against the same column of the
+previous snapshot, then zlib-compressed. Particle columns are first advanced
+one tick with main.step_particles, so their rows line up and mostly cancel.
+A client whose socket backs up is skipped and gets a fresh keyframe once it
+drains.
+
+The client decodes snapshots on a network thread. Its display() renders
+INTERP_TICKS behind the newest one, blending entity positions between the
+two snapshots around the render time. Keyboard and mouse events go back to
+the server tagged with a sequence number. Each snapshot carries the last
+sequence the server applied, which gives the client its input latency.
+
+    python netplay.py serve --listen 127.0.0.1:5757 --level 1
+    python netplay.py connect 127.0.0.1:5757
+    python netplay.py selftest            # end-to-end check on localhost
+
+Addresses are HOST:PORT or unix:PATH.
+"""
+import argparse
+import asyncio
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+import main as game
+from replay import COMPRESSION_LEVEL, xor_bytes
+
+TICK_RATE = 60
+DEFAULT_ADDRESS = "127.0.0.1:5757"
+INTERP_TICKS = 2        # Render this far behind the newest snapshot
+SNAP_DISTANCE = 60.0    # Rows that moved further than this between snapshots aren't blended
+MAX_BACKLOG = 1 << 20   # Bytes queued to a client before it's skipped
+
+KEYFRAME = 0
+DELTA = 1
+# kind, game_state, paused, tick, ack, snapshot size, payload size, server send time
+SNAPSHOT_MESSAGE = struct.Struct('<BBBIIIId')
+
+INPUT_KEY = 0
+INPUT_SPECIAL = 1
+INPUT_MOUSE = 2
+INPUT_MESSAGE = struct.Struct('<IBhh')  # seq, event, key/button, mouse state
+
+
+def parse_address(address):
+    """'unix:PATH' -> ('unix', PATH); 'HOST:PORT' -> ('tcp', (HOST, PORT))"""
+    if address.startswith('unix:'):
+        return 'unix', address[5:]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000.0 if samples else float('nan')
+
+
+# ============ DELTA CODING ============
+
+def split_snapshot(data):
+    """save_snapshot bytes -> (fixed-size prefix, [(fields, count, columns)] per container)"""
+    offset = game.SNAPSHOT_PREFIX_SIZE
+    containers = []
+    for name, fields in game.snapshot_containers():
+        count, columns, offset = game.unpack_columns(data, offset, fields)
+        containers.append((fields, count, columns))
+    return data[:game.SNAPSHOT_PREFIX_SIZE], containers
+
+
+def predict_columns(containers):
+    """Reference columns for the next snapshot: particles advanced one tick (as update_particles), the rest as is"""
+    predicted = []
+    for (name, _), (fields, count, columns) in zip(game.snapshot_containers(), containers):
+        kind = name[len('particles_'):]
+        if kind in game.PARTICLE_CLASSES and count:
+            columns = {key: column.copy() for key, column in columns.items()}
+            alive = game.step_particles(game.PARTICLE_CLASSES[kind], columns['pos'], columns['vel'], columns['life'])
+            columns = {key: column[alive] for key, column in columns.items()}
+        predicted.append({key: column.tobytes() for key, column in columns.items()})
+    return predicted
+
+
+def encode_delta(snapshot, previous):
+    """Compressed delta that decode_delta turns back into snapshot, given previous"""
+    prefix, containers = split_snapshot(snapshot)
+    old_prefix, old_containers = split_snapshot(previous)
+    parts = [xor_bytes(prefix, old_prefix).tobytes()]
+    for (fields, count, columns), reference in zip(containers, predict_columns(old_containers)):
+        parts.append(game.SNAPSHOT_COUNT.pack(count))
+        for key in fields:
+            raw = columns[key].tobytes()
+            parts.append(xor_bytes(raw, reference[key][:len(raw)]).tobytes())
+    return zlib.compress(b''.join(parts), COMPRESSION_LEVEL)
+
+
+def decode_delta(payload, previous):
+    """Inverse of encode_delta"""
+    data = zlib.decompress(payload)
+    old_prefix, old_containers = split_snapshot(previous)
+    offset = len(old_prefix)
+    parts = [xor_bytes(data[:offset], old_prefix).tobytes()]
+    for (fields, _, _), reference in zip(old_containers, predict_columns(old_containers)):
+        count, = game.SNAPSHOT_COUNT.unpack_from(data, offset)
+        parts.append(data[offset:offset + game.SNAPSHOT_COUNT.size])
+        offset += game.SNAPSHOT_COUNT.size
+        for key, (dtype, width) in fields.items():
+            size = count * width * np.dtype(dtype).itemsize
+            parts.append(xor_bytes(data[offset:offset + size], reference[key][:size]).tobytes())
+            offset += size
+    return b''.join(parts)
+
+
+# ============ SERVER ============
+
+class NetServer:
+    """Runs the simulation and streams snapshots to every connected client"""
+
+    def __init__(self, level=0):
+        self.tick = 0
+        self.clients = []  # [{'writer', 'previous', 'ack'}]
+        self.last_snapshot = None
+        self.server = None
+        game.current_level = level
+        game.reset_game()
+        game.game_state = game.PLAYING
+
+    async def start(self, address):
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            self.server = await asyncio.start_unix_server(self._serve_client, target)
+            return address
+        self.server = await asyncio.start_server(self._serve_client, *target)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def _serve_client(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = {'writer': writer, 'previous': None, 'ack': 0}
+        self.clients.append(client)
+        print(f"Client connected ({len(self.clients)} total)")
+        try:
+            while True:
+                seq, event, a, b = INPUT_MESSAGE.unpack(await reader.readexactly(INPUT_MESSAGE.size))
+                apply_input(event, a, b)
+                client['ack'] = seq
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.remove(client)
+            writer.close()
+            print(f"Client disconnected ({len(self.clients)} left)")
+
+    def broadcast(self, snapshot):
+        deltas = {}  # Clients in sync all share the previous snapshot, so encode once per base
+        for client in self.clients:
+            writer = client['writer']
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                client['previous'] = None  # Too far behind: resync with a keyframe later
+                continue
+            if client['previous'] is None:
+                kind, payload = KEYFRAME, zlib.compress(snapshot, COMPRESSION_LEVEL)
+            else:
+                base = client['previous']
+                if id(base) not in deltas:
+                    deltas[id(base)] = encode_delta(snapshot, base)
+                kind, payload = DELTA, deltas[id(base)]
+            writer.write(SNAPSHOT_MESSAGE.pack(kind, game.game_state, game.paused, self.tick, client['ack'],
+                                               len(snapshot), len(payload), time.time()) + payload)
+            client['previous'] = snapshot
+
+    async def run(self, ticks=None):
+        """Simulate at TICK_RATE (forever, or for a number of ticks)"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while ticks is None or self.tick < ticks:
+            game.update_game_logic()
+            self.tick += 1
+            self.last_snapshot = game.save_snapshot()
+            self.broadcast(self.last_snapshot)
+            next_tick += 1.0 / TICK_RATE
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def close(self):
+        self.server.close()
+        for client in list(self.clients):
+            client['writer'].close()
+        await self.server.wait_closed()
+
+
+def apply_input(event, a, b):
+    """Feed a client's input through the normal GLUT callbacks"""
+    if event == INPUT_KEY:
+        key = bytes([a])
+        if key == b'\x1b' and game.game_state == game.MENU:
+            return  # ESC on the menu quits; the server stays up
+        game.keyboard(key, 0, 0)
+    elif event == INPUT_SPECIAL:
+        game.special(a, 0, 0)
+    elif event == INPUT_MOUSE:
+        game.mouse(a, b, 0, 0)
+
+
+# ============ CLIENT ============
+
+class NetClient:
+    """Receives and decodes snapshots; holds no game state of its own"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.current = None
+        self.tick = 0
+        self.snapshots = deque(maxlen=16)  # (tick, game_state, paused, snapshot), newest last
+        self.lock = threading.Lock()
+        self.input_seq = 0
+        self.pending_inputs = {}  # seq -> send time
+        self.stats = {'messages': 0, 'keyframes': 0, 'wire_bytes': 0, 'raw_bytes': 0,
+                      'delay': [], 'input_latency': [], 'clock_offset': None, 'started': time.time()}
+
+    async def connect(self, address):
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            self.reader, self.writer = await asyncio.open_unix_connection(target)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(*target)
+            self.writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats['started'] = time.time()
+
+    async def receive(self):
+        """Decode snapshots until the server goes away"""
+        stats = self.stats
+        try:
+            while True:
+                header = await self.reader.readexactly(SNAPSHOT_MESSAGE.size)
+                kind, state, paused, tick, ack, size, length, sent = SNAPSHOT_MESSAGE.unpack(header)
+                payload = await self.reader.readexactly(length)
+                received = time.time()
+                if kind == KEYFRAME:
+                    self.current = zlib.decompress(payload)
+                    stats['keyframes'] += 1
+                else:
+                    self.current = decode_delta(payload, self.current)
+                self.tick = tick
+                with self.lock:
+                    self.snapshots.append((tick, state, paused, self.current))
+                # Server tick 0 in client time, from the least-delayed message so far
+                offset = received - tick / TICK_RATE
+                if stats['clock_offset'] is None or offset < stats['clock_offset']:
+                    stats['clock_offset'] = offset
+                stats['messages'] += 1
+                stats['wire_bytes'] += SNAPSHOT_MESSAGE.size + length
+                stats['raw_bytes'] += size
+                stats['delay'].append(received - sent)
+                for seq in [seq for seq in self.pending_inputs if seq <= ack]:
+                    stats['input_latency'].append(received - self.pending_inputs.pop(seq))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def send_input(self, event, a, b=0):
+        self.input_seq += 1
+        self.pending_inputs[self.input_seq] = time.time()
+        self.writer.write(INPUT_MESSAGE.pack(self.input_seq, event, a, b))
+
+    def bracket(self, render_tick):
+        """The two buffered snapshots around a (fractional) tick and the blend factor between them"""
+        with self.lock:
+            snapshots = list(self.snapshots)
+        if not snapshots:
+            return None, None, 0.0
+        for older, newer in zip(snapshots, snapshots[1:]):
+            if older[0] <= render_tick < newer[0]:
+                return older, newer, (render_tick - older[0]) / (newer[0] - older[0])
+        return snapshots[-1], None, 0.0  # Past the newest (or before the oldest): hold it
+
+    def report(self):
+        stats = self.stats
+        elapsed = max(time.time() - stats['started'], 1e-6)
+        return {
+            'messages': stats['messages'],
+            'keyframes': stats['keyframes'],
+            'snapshots_per_s': stats['messages'] / elapsed,
+            'kbytes_per_s': stats['wire_bytes'] / elapsed / 1024,
+            'bytes_per_message': stats['wire_bytes'] / max(stats['messages'], 1),
+            'compression': stats['raw_bytes'] / max(stats['wire_bytes'], 1),
+            'delay_p50_ms': percentile_ms(stats['delay'], 50),
+            'delay_p99_ms': percentile_ms(stats['delay'], 99),
+            'input_latency_p50_ms': percentile_ms(stats['input_latency'], 50),
+            'input_latency_p99_ms': percentile_ms(stats['input_latency'], 99),
+            'inputs_acked': len(stats['input_latency']),
+        }
+
+
+def print_report(report):
+    print(f"Snapshots: {report['messages']} ({report['keyframes']} keyframes), "
+          f"{report['snapshots_per_s']:.1f}/s, {report['bytes_per_message']:.0f} B each, "
+          f"{report['kbytes_per_s']:.1f} KB/s, {report['compression']:.1f}x smaller than raw")
+    print(f"Snapshot delay: p50 {report['delay_p50_ms']:.2f} ms  p99 {report['delay_p99_ms']:.2f} ms")
+    print(f"Input latency ({report['inputs_acked']} inputs): p50 {report['input_latency_p50_ms']:.2f} ms  "
+          f"p99 {report['input_latency_p99_ms']:.2f} ms")
+
+
+# ============ INTERPOLATION ============
+
+def capture_positions():
+    """Copies of every entity position in the loaded game state"""
+    return {
+        'player': np.array([game.player_x, game.player_y]),
+        'boss': None if game.boss is None else np.array([game.boss['x'], game.boss['y'], game.boss['z']]),
+        'pools': {name: pool['pos'].copy() for name, pool in game.snapshot_pools()},
+        'lists': {name: np.array([(e['x'], e['y'], e['z']) for e in getattr(game, name)]).reshape(-1, 3)
+                  for name in ('obstacles', 'bullets', 'missiles')},
+    }
+
+
+def blend_rows(older, newer, alpha):
+    """Interpolated rows; rows that jumped (different entity in the slot) keep the newer value"""
+    moved = np.abs(newer - older).max(axis=1, keepdims=True) if newer.ndim == 2 else np.abs(newer - older).max()
+    return np.where(moved < SNAP_DISTANCE, older + (newer - older) * alpha, newer)
+
+
+def blend_positions(older, alpha):
+    """Move the loaded (newer) state's positions back towards an older capture"""
+    newer = capture_positions()
+    game.player_x, game.player_y = blend_rows(older['player'], newer['player'], alpha)
+    if game.boss is not None and older['boss'] is not None:
+        game.boss['x'], game.boss['y'], game.boss['z'] = blend_rows(older['boss'], newer['boss'], alpha)
+    for name, pool in game.snapshot_pools():
+        if older['pools'][name].shape == newer['pools'][name].shape:
+            pool['pos'][:] = blend_rows(older['pools'][name], newer['pools'][name], alpha)
+    for name, rows in newer['lists'].items():
+        if older['lists'][name].shape == rows.shape and len(rows):
+            for entity, (x, y, z) in zip(getattr(game, name), blend_rows(older['lists'][name], rows, alpha)):
+                entity['x'], entity['y'], entity['z'] = float(x), float(y), float(z)
+
+
+def show_interpolated(client):
+    """Load the state INTERP_TICKS behind the newest snapshot into main's globals"""
+    offset = client.stats['clock_offset']
+    if offset is None:
+        return False
+    render_tick = (time.time() - offset) * TICK_RATE - INTERP_TICKS
+    older, newer, alpha = client.bracket(render_tick)
+    if older is None:
+        return False
+    if newer is not None and alpha > 0:
+        game.load_snapshot(older[3], timeline=False)
+        positions = capture_positions()
+        game.load_snapshot(newer[3], timeline=False)
+        blend_positions(positions, alpha)
+        state, paused = newer[1], newer[2]
+    else:
+        game.load_snapshot(older[3], timeline=False)
+        state, paused = older[1], older[2]
+    game.game_state = state
+    game.paused = bool(paused)
+    return True
+
+
+def run_client(address, renderer, glut_args):
+    """Open a window that renders the server's game and forwards input to it"""
+    client = NetClient()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(client.connect(address))
+    receiving = loop.create_task(client.receive())
+    threading.Thread(target=loop.run_until_complete, args=(receiving,), name="netplay-client", daemon=True).start()
+
+    def send(event, a, b=0):
+        loop.call_soon_threadsafe(client.send_input, event, a, b)
+
+    def keyboard(key, x, y):
+        if key == b'\x1b' and game.game_state == game.MENU:
+            print_report(client.report())
+            sys.exit()
+        send(INPUT_KEY, key.lower()[0])
+
+    def frame():
+        if receiving.done():
+            print("Server closed the connection")
+            print_report(client.report())
+            sys.exit()
+        if show_interpolated(client):
+            game.display()
+
+    game.create_window(glut_args, renderer, title=b"StratoQuest (client)")
+    game.glutDisplayFunc(frame)
+    game.glutIdleFunc(frame)
+    game.glutReshapeFunc(game.reshape)
+    game.glutKeyboardFunc(keyboard)
+    game.glutSpecialFunc(lambda key, x, y: send(INPUT_SPECIAL, key))
+    game.glutMouseFunc(lambda button, state, x, y: send(INPUT_MOUSE, button, state))
+    game.warm_up()
+    game.glutMainLoop()
+
+
+# ============ SELF CHECK ============
+
+async def self_check(address, seconds, level):
+    """Server and scripted client in one process; True if the client ends on the server's exact state"""
+    server = NetServer(level)
+    address = await server.start(address)
+    client = NetClient()
+    await client.connect(address)
+    receiving = asyncio.create_task(client.receive())
+    ticks = int(seconds * TICK_RATE)
+    simulating = asyncio.create_task(server.run(ticks))
+
+    # Fly a weave, fire constantly and launch missiles now and then
+    moves = [b'w', b'd', b's', b'a']
+    step = 0
+    while not simulating.done():
+        client.send_input(INPUT_KEY, moves[step // 6 % len(moves)][0])
+        client.send_input(INPUT_MOUSE, game.GLUT_LEFT_BUTTON, game.GLUT_DOWN)
+        if step % 40 == 0:
+            client.send_input(INPUT_MOUSE, game.GLUT_RIGHT_BUTTON, game.GLUT_DOWN)
+        step += 1
+        await asyncio.sleep(0.05)
+    await simulating
+
+    deadline = time.time() + 5.0
+    while client.tick < server.tick and time.time() < deadline:
+        await asyncio.sleep(0.01)
+    matched = client.current == server.last_snapshot
+    print(f"Ran {server.tick} ticks in {time.time() - client.stats['started']:.1f} s at {address}; "
+          f"score {game.score}, hp {game.player_hp}")
+    print_report(client.report())
+    print("Client state matches server" if matched else
+          f"MISMATCH: client at tick {client.tick}, server at {server.tick}")
+    client.writer.close()
+    await receiving
+    while server.clients and time.time() < deadline + 1.0:
+        await asyncio.sleep(0.01)  # Let the server notice the disconnect
+    await server.close()
+    return matched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="netplay", description="StratoQuest client/server")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the authoritative simulation")
+    serve.add_argument('--listen', default=DEFAULT_ADDRESS, help="HOST:PORT or unix:PATH")
+    serve.add_argument('--level', type=int, default=1, help="starting level (1-5)")
+    connect = commands.add_parser('connect', help="render a server's game")
+    connect.add_argument('address', nargs='?', default=DEFAULT_ADDRESS)
+    connect.add_argument('--renderer', choices=['fixed', 'shader'], default='fixed')
+    connect.add_argument('--gl-profile', choices=list(game.GL_PROFILES), default=game.gl_profile)
+    check = commands.add_parser('selftest', help="end-to-end check on localhost")
+    check.add_argument('--listen', default="127.0.0.1:0", help="HOST:PORT (0 picks a port) or unix:PATH")
+    check.add_argument('--seconds', type=float, default=5.0)
+    check.add_argument('--level', type=int, default=1)
+    args, glut_args = parser.parse_known_args(argv)
+
+    if args.command == 'serve':
+        async def serve_forever():
+            server = NetServer(args.level - 1)
+            print(f"Serving on {await server.start(args.listen)}")
+            await server.run()
+        asyncio.run(serve_forever())
+    elif args.command == 'connect':
+        game.gl_profile = args.gl_profile
+        run_client(args.address, args.renderer, glut_args)
+    else:
+        sys.exit(0 if asyncio.run(self_check(args.listen, args.seconds, args.level - 1)) else 1)
+
+
+if __name__ == "__main__":
+    main()
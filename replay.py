@@ -0,0 +1,153 @@
+"""Seekable replay files built from per-tick game snapshots.
+
+A replay is a stream of records, one per simulated tick. Every
+KEYFRAME_INTERVAL ticks the record is a full zlib-compressed snapshot. Other
+ticks store the XOR of the snapshot against the previous tick, then
+zlib-compress it. Bytes that didn't change XOR to zero, so each delta only
+costs the state that actually moved. A footer indexes the keyframe offsets.
+Seeking therefore jumps to the nearest keyframe and applies at most
+KEYFRAME_INTERVAL - 1 deltas, with no simulation.
+
+The snapshots themselves are opaque bytes here (see save_snapshot in main.py).
+"""
+import os
+import struct
+import zlib
+
+import numpy as np
+
+KEYFRAME_INTERVAL = 120  # Ticks between full snapshots (2 s at 60 ticks/sec)
+COMPRESSION_LEVEL = 1    # Fast enough to run every tick
+
+REPLAY_MAGIC = b'SQRP'
+REPLAY_VERSION = 1
+HEADER = struct.Struct('<4sHI')     # magic, version, keyframe interval
+RECORD = struct.Struct('<BII')      # kind, snapshot length, payload length
+INDEX_ENTRY = struct.Struct('<IQ')  # tick, file offset
+FOOTER = struct.Struct('<QI4s')     # index offset, keyframe count, magic
+FOOTER_MAGIC = b'SQRI'
+KEYFRAME = 0
+DELTA = 1
+
+
+def xor_bytes(a, b):
+    """XOR two byte strings, zero-padding the shorter one"""
+    out = np.zeros(max(len(a), len(b)), dtype=np.uint8)
+    out[:len(a)] = np.frombuffer(a, dtype=np.uint8)
+    out[:len(b)] ^= np.frombuffer(b, dtype=np.uint8)
+    return out
+
+
+class ReplayWriter:
+    """Appends one snapshot per tick; close() writes the keyframe index"""
+
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, keyframe_interval))
+        self.index = []  # (tick, offset) of every keyframe
+        self.ticks = 0
+        self.previous = None
+        self.bytes_raw = 0
+
+    def write(self, snapshot):
+        if self.ticks % self.keyframe_interval == 0:
+            self.index.append((self.ticks, self.file.tell()))
+            kind, payload = KEYFRAME, zlib.compress(snapshot, COMPRESSION_LEVEL)
+        else:
+            kind, payload = DELTA, zlib.compress(xor_bytes(snapshot, self.previous), COMPRESSION_LEVEL)
+        self.file.write(RECORD.pack(kind, len(snapshot), len(payload)))
+        self.file.write(payload)
+        self.previous = snapshot
+        self.ticks += 1
+        self.bytes_raw += len(snapshot)
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(b''.join(INDEX_ENTRY.pack(tick, offset) for tick, offset in self.index))
+        self.file.write(FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        self.file.close()
+
+
+class ReplayReader:
+    """Random access to the snapshot of any recorded tick"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        magic, version, self.keyframe_interval = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != REPLAY_MAGIC:
+            raise ValueError("not a StratoQuest replay")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"replay version {version}, expected {REPLAY_VERSION}")
+        self.index = self._read_index()
+        self.ticks = self._count_ticks()
+        self.tick = None      # Tick of the decoded snapshot in self.current
+        self.current = None
+        self.next_offset = 0  # File offset of the record after self.tick
+
+    def _read_index(self):
+        """Keyframe (tick, offset) list from the footer, or rebuilt by scanning if the recorder died"""
+        end = self.file.seek(0, os.SEEK_END)
+        if end >= HEADER.size + FOOTER.size:
+            self.file.seek(end - FOOTER.size)
+            index_offset, count, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+            if magic == FOOTER_MAGIC:
+                self.file.seek(index_offset)
+                self.end = index_offset
+                data = self.file.read(count * INDEX_ENTRY.size)
+                return [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(count)]
+        index = []
+        offset = HEADER.size
+        tick = 0
+        while True:
+            self.file.seek(offset)
+            record = self.file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                break
+            kind, _, length = RECORD.unpack(record)
+            if offset + RECORD.size + length > end:
+                break  # Torn final record
+            if kind == KEYFRAME:
+                index.append((tick, offset))
+            offset += RECORD.size + length
+            tick += 1
+        self.end = offset
+        return index
+
+    def _count_ticks(self):
+        """Ticks up to the end of the last complete record"""
+        if not self.index:
+            return 0
+        tick, offset = self.index[-1]
+        while offset < self.end:
+            self.file.seek(offset)
+            _, _, length = RECORD.unpack(self.file.read(RECORD.size))
+            offset += RECORD.size + length
+            tick += 1
+        return tick
+
+    def _read_record(self, offset):
+        self.file.seek(offset)
+        kind, size, length = RECORD.unpack(self.file.read(RECORD.size))
+        payload = zlib.decompress(self.file.read(length))
+        return kind, size, payload, offset + RECORD.size + length
+
+    def seek(self, tick):
+        """Snapshot bytes at a tick (clamped to the recording)"""
+        tick = max(0, min(tick, self.ticks - 1))
+        if self.tick is None or tick < self.tick or tick // self.keyframe_interval != self.tick // self.keyframe_interval:
+            # Jump to the keyframe at or before the tick; forward steps in the same interval reuse the cursor
+            key_tick, offset = self.index[tick // self.keyframe_interval]
+            _, size, payload, self.next_offset = self._read_record(offset)
+            self.current = payload[:size]
+            self.tick = key_tick
+        while self.tick < tick:
+            _, size, payload, self.next_offset = self._read_record(self.next_offset)
+            self.current = xor_bytes(payload, self.current)[:size].tobytes()
+            self.tick += 1
+        return self.current
+
+    def close(self):
+        self.file.close()
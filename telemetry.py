@@ -0,0 +1,186 @@
+"""Live telemetry through a memory-mapped ring buffer.
+
+The game writes one fixed-layout record per frame into a file-backed mmap
+(TelemetryWriter). Other processes map the same file read-only and view it
+as NumPy arrays (TelemetryReader), so reading costs the game nothing: no
+sockets, no locks, no log parsing.
+
+File layout: a 32-byte header, then CAPACITY records of RECORD_DTYPE. The
+header's 'written' counter is the total number of records published. Record
+n lives in slot n % capacity. Each slot's 'seq' is set to n + 1 only after
+the rest of the record is written. A reader that sees the expected seq
+before and after copying a record therefore knows it wasn't torn by the
+writer lapping it.
+
+    python telemetry.py telemetry.bin            # tail, one line per record
+    python telemetry.py telemetry.bin --every 60 # one line per second of play
+"""
+import argparse
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+TELEMETRY_MAGIC = b'SQTM'
+TELEMETRY_VERSION = 1
+CAPACITY = 4096  # ~68 s of frames at 60 fps
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('record_size', '<u2'),
+    ('capacity', '<u4'),
+    ('pid', '<u4'),
+    ('written', '<u8'),
+    ('reserved', '<u8'),
+])
+
+ENTITY_KINDS = ('obstacles', 'enemies', 'enemy_bullets', 'bullets', 'missiles', 'collectibles', 'particles')
+
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u8'),       # Record number + 1; 0 means never written
+    ('time', '<f8'),      # Unix time at the start of the frame
+    ('frame_ms', '<f4'),  # Update + display
+    ('tick_ms', '<f4'),   # Update only
+    ('fps', '<f4'),       # From the interval between frame starts
+    ('game_state', 'u1'),
+    ('level', 'u1'),
+    ('paused', 'u1'),
+    ('pad', 'u1'),
+    ('player_hp', '<i4'),
+    ('score', '<i8'),
+] + [(kind, '<u4') for kind in ENTITY_KINDS])
+
+
+def file_size(capacity):
+    return HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize
+
+
+class TelemetryWriter:
+    """Publishes records into the ring; the file is created (or reset) on open"""
+
+    def __init__(self, path, capacity=CAPACITY):
+        with open(path, 'wb') as f:
+            f.truncate(file_size(capacity))
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), file_size(capacity))
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.map)
+        self.records = np.ndarray((capacity,), RECORD_DTYPE, buffer=self.map, offset=HEADER_DTYPE.itemsize)
+        self.capacity = capacity
+        self.written = 0
+        self.scratch = np.zeros((), RECORD_DTYPE)
+        self.header['version'] = TELEMETRY_VERSION
+        self.header['record_size'] = RECORD_DTYPE.itemsize
+        self.header['capacity'] = capacity
+        self.header['pid'] = os.getpid()
+        self.header['magic'] = TELEMETRY_MAGIC  # Last: readers wait for the magic
+
+    def publish(self, **values):
+        """Write one record; fields not given are zero and seq is filled in"""
+        record = self.scratch
+        record[()] = 0
+        for name, value in values.items():
+            record[name] = value
+        slot = self.written % self.capacity
+        self.records['seq'][slot] = 0  # Mark the slot as being rewritten
+        self.records[slot] = record    # seq still 0 here
+        self.written += 1
+        self.records['seq'][slot] = self.written
+        self.header['written'] = self.written
+
+    def close(self):
+        del self.header, self.records
+        self.map.close()
+        self.file.close()
+
+
+class TelemetryReader:
+    """Read-only view of a ring written by another process"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.map)
+        if bytes(self.header['magic']) != TELEMETRY_MAGIC:
+            raise ValueError("not a StratoQuest telemetry file (or the game hasn't opened it yet)")
+        if self.header['version'] != TELEMETRY_VERSION or self.header['record_size'] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"telemetry version {int(self.header['version'])}, expected {TELEMETRY_VERSION}")
+        self.capacity = int(self.header['capacity'])
+        self.records = np.ndarray((self.capacity,), RECORD_DTYPE, buffer=self.map, offset=HEADER_DTYPE.itemsize)
+
+    @property
+    def written(self):
+        return int(self.header['written'])
+
+    def latest(self):
+        """Most recent complete record, or None before the first frame"""
+        records = self.since(max(self.written - 1, 0))
+        return records[-1] if len(records) else None
+
+    def since(self, seq):
+        """Copy of the records numbered after seq (at most one ring's worth, oldest first)"""
+        written = self.written
+        first = max(seq, written - self.capacity)
+        if first >= written:
+            return np.empty(0, RECORD_DTYPE)
+        slots = np.arange(first, written) % self.capacity
+        records = self.records[slots]  # Fancy indexing copies
+        # Drop anything the writer overwrote while we were copying
+        expected = np.arange(first, written, dtype=np.uint64) + 1
+        return records[(records['seq'] == expected) & (self.records['seq'][slots] == expected)]
+
+    def close(self):
+        del self.header, self.records
+        self.map.close()
+        self.file.close()
+
+
+STATE_NAMES = {0: 'menu', 1: 'select', 2: 'playing', 3: 'over', 4: 'paused'}
+
+
+def format_record(record):
+    entities = ' '.join(f"{kind}:{int(record[kind])}" for kind in ENTITY_KINDS)
+    state = STATE_NAMES.get(int(record['game_state']), '?')
+    if record['paused']:
+        state = 'paused'
+    return (f"#{int(record['seq'])} {time.strftime('%H:%M:%S', time.localtime(record['time']))} "
+            f"{state:<7} L{int(record['level']) + 1} hp {int(record['player_hp']):>3} score {int(record['score']):>6} "
+            f"fps {record['fps']:5.1f} frame {record['frame_ms']:5.2f} ms tick {record['tick_ms']:5.2f} ms  {entities}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="telemetry", description="Tail a StratoQuest telemetry ring")
+    parser.add_argument('path', help="file passed to the game's --telemetry option")
+    parser.add_argument('--every', type=int, default=1, help="print every Nth record")
+    parser.add_argument('--poll', type=float, default=0.1, help="seconds between polls")
+    parser.add_argument('--once', action='store_true', help="print the latest record and exit")
+    args = parser.parse_args(argv)
+
+    reader = TelemetryReader(args.path)
+    if args.once:
+        record = reader.latest()
+        print(format_record(record) if record is not None else "no records yet")
+        return
+    seen = max(reader.written - 1, 0)
+    try:
+        while True:
+            records = reader.since(seen)
+            if len(records):
+                if records['seq'][0] > seen + 1:
+                    print(f"(skipped {int(records['seq'][0]) - seen - 1} records)")
+                for record in records:
+                    if record['seq'] % args.every == 0:
+                        print(format_record(record))
+                seen = int(records['seq'][-1])
+                sys.stdout.flush()
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Chunked heightfield terrain for the scrolling ground.
+
+The ground is split into fixed-length chunks along the track. Each chunk's
+heights come from deterministic value noise over global coordinates, so a
+chunk always rebuilds identically and neighbours meet without seams. Chunk
+meshes are generated on a worker thread into vertex arrays; the render
+thread only uploads finished chunks (see ChunkStreamer.collect).
+"""
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CHUNK_LENGTH = 200   # Track units per chunk (along -Z)
+HALF_WIDTH = 400     # Ground spans x in [-HALF_WIDTH, HALF_WIDTH]
+CELLS_X = 32
+CELLS_Z = 8
+LANE_HALF_WIDTH = 130  # Land themes stay flat where obstacles spawn
+LANE_BLEND = 60
+
+# Terrain themes by style: amplitude (height units) and wavelength (track units)
+DEFAULT_THEME = {'style': 'hills', 'amplitude': 0.0, 'wavelength': 200.0}
+
+
+def _hash01(ix, iz, seed):
+    """Integer lattice hash -> [0, 1)"""
+    h = (ix.astype(np.int64) * 374761393 + iz.astype(np.int64) * 668265263 + seed * 1442695041) & 0xffffffff
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xffffffff
+    h ^= h >> 16
+    return h.astype(np.float64) / 4294967296.0
+
+
+def value_noise(x, z, seed):
+    """Smooth value noise in [0, 1) on a unit lattice"""
+    x0 = np.floor(x)
+    z0 = np.floor(z)
+    fx = x - x0
+    fz = z - z0
+    ux = fx * fx * (3 - 2 * fx)
+    uz = fz * fz * (3 - 2 * fz)
+    ix = x0.astype(np.int64)
+    iz = z0.astype(np.int64)
+    a = _hash01(ix, iz, seed)
+    b = _hash01(ix + 1, iz, seed)
+    c = _hash01(ix, iz + 1, seed)
+    d = _hash01(ix + 1, iz + 1, seed)
+    return (a + (b - a) * ux) + ((c + (d - c) * ux) - (a + (b - a) * ux)) * uz
+
+
+def fbm(x, z, seed, octaves=3):
+    """Fractal sum of value noise in [-1, 1]"""
+    total = np.zeros(np.broadcast(x, z).shape)
+    amplitude = 0.5
+    norm = 0.0
+    for octave in range(octaves):
+        scale = 2.0 ** octave
+        total += amplitude * (value_noise(x * scale, z * scale, seed + octave * 7919) * 2 - 1)
+        norm += amplitude
+        amplitude *= 0.5
+    return total / norm
+
+
+def terrain_height(theme, seed, x, t):
+    """Height above the base ground plane at lateral x and track distance t"""
+    amplitude = theme['amplitude']
+    if amplitude == 0:
+        return np.zeros(np.broadcast(x, t).shape)
+    wavelength = theme['wavelength']
+    nx = x / wavelength
+    nt = t / wavelength
+    style = theme['style']
+    if style == 'swell':
+        # Long ocean swell across the track with some noise in the crests
+        height = np.sin(nt * 2 * np.pi + fbm(nx, nt, seed, 2) * 1.5) * 0.7 + fbm(nx * 2, nt * 2, seed + 1, 2) * 0.3
+        return amplitude * height
+    if style == 'dunes':
+        # Ridged noise stretched along x gives long dune crests
+        height = 1.0 - np.abs(fbm(nx * 0.35, nt, seed, 3))
+        height = height * height * 2 - 0.5
+    elif style == 'crags':
+        height = np.abs(fbm(nx, nt, seed, 4)) ** 0.7 * 2 - 0.4
+    else:  # 'hills'
+        height = fbm(nx, nt, seed, 3) + 0.35
+    # Keep the obstacle lane flat and raise the sides
+    lane = np.clip((np.abs(x) - LANE_HALF_WIDTH) / LANE_BLEND, 0.0, 1.0)
+    return amplitude * np.maximum(height, 0.0) * lane * lane * (3 - 2 * lane)
+
+
+def build_chunk(theme, seed, index):
+    """Triangles and grid lines for one chunk in chunk-local space (z from 0 back to -CHUNK_LENGTH)"""
+    xs = np.linspace(-HALF_WIDTH, HALF_WIDTH, CELLS_X + 1)
+    ts = np.linspace(0, CHUNK_LENGTH, CELLS_Z + 1)
+    heights = terrain_height(theme, seed, xs[None, :], index * CHUNK_LENGTH + ts[:, None])
+    grid = np.empty((CELLS_Z + 1, CELLS_X + 1, 3), dtype=np.float32)
+    grid[..., 0] = xs[None, :]
+    grid[..., 1] = heights
+    grid[..., 2] = -ts[:, None]
+
+    a = grid[:-1, :-1]; b = grid[:-1, 1:]; c = grid[1:, 1:]; d = grid[1:, :-1]
+    triangles = np.concatenate([np.stack([a, b, c], axis=2), np.stack([a, c, d], axis=2)]).reshape(-1, 3)
+
+    # Cross lines on every row and lengthwise lines on every other column, lifted off the surface
+    lifted = grid + np.array([0, 1, 0], dtype=np.float32)
+    cross = np.stack([lifted[:-1, :-1], lifted[:-1, 1:]], axis=2).reshape(-1, 3)
+    along = np.stack([lifted[:-1, ::2], lifted[1:, ::2]], axis=2).reshape(-1, 3)
+    lines = np.concatenate([cross, along])
+    return np.ascontiguousarray(triangles), np.ascontiguousarray(lines)
+
+
+def visible_chunks(scroll, near_z, far_z, prefetch=1):
+    """Chunk indices covering world z in [far_z, near_z] at the given scroll distance"""
+    first = int(np.floor((scroll - near_z) / CHUNK_LENGTH))
+    last = int(np.floor((scroll - far_z) / CHUNK_LENGTH)) + prefetch
+    return range(first, last + 1)
+
+
+class ChunkStreamer:
+    """Builds chunks on a worker thread and keeps finished ones in an LRU keyed by (level, index)"""
+
+    def __init__(self, capacity=48):
+        self.capacity = capacity
+        self.cache = OrderedDict()  # (level, index) -> {'triangles', 'lines', 'meshes'}
+        self.pending = set()
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = threading.Thread(target=self._work, name="terrain-builder", daemon=True)
+        self.worker.start()
+
+    def _work(self):
+        while True:
+            key, theme = self.requests.get()
+            level, index = key
+            triangles, lines = build_chunk(theme, level, index)
+            self.results.put((key, triangles, lines))
+
+    def request(self, key, theme):
+        """Queue a chunk for building unless it's cached or already queued"""
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        elif key not in self.pending:
+            self.pending.add(key)
+            self.requests.put((key, theme))
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+        return entry
+
+    def collect(self):
+        """Move finished chunks into the cache; returns entries evicted to make room"""
+        evicted = []
+        while True:
+            try:
+                key, triangles, lines = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            self.cache[key] = {'triangles': triangles, 'lines': lines, 'meshes': None}
+            while len(self.cache) > self.capacity:
+                evicted.append(self.cache.popitem(last=False)[1])
+        return evicted
@@ -0,0 +1,351 @@
+"""Headless bot tournament for balance tuning and soak testing.
+
+Plays bot policies across many seeds on a multiprocessing pool. Each task is
+one (policy, start level, seed) triple and plays a batch of games in a
+vec_env.VecEnv until every game has finished once or hit the tick limit.
+Per-game results stream into a JSONL file as tasks complete. Re-running the
+same command skips tasks that already finished, so an interrupted run picks
+up where it stopped. An aggregated report is printed at the end.
+
+    python tournament.py --policies aim,dodge --seeds 64 --workers 8
+    python tournament.py --set LEVEL_DEFS.1.enemies.density=0.012 --set ENEMY_HP=3,1,6
+
+--set overrides a value in main.py before any game runs. The path is dotted
+through dicts and lists, and the value is parsed as JSON, or as a
+comma-separated list for arrays. Runs with different overrides or limits
+never mix in one results file. Values that main.py or vec_env.py copy into
+lookup tables at import time (see FROZEN_OVERRIDES) are rejected, since
+patching them afterwards would not reach the copies.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+import main as game
+import vec_env
+
+TICKS_PER_SECOND = 60
+SLICES = vec_env.OBSERVATION_SLICES
+
+
+# ============ POLICIES ============
+
+def _entities(obs, name, features):
+    """(n, k, features) view of an observation block"""
+    return obs[:, SLICES[name]].reshape(len(obs), -1, features)
+
+
+def _steer_towards(dx, dy, gain=40.0):
+    """Thrust towards a relative position (observation units)"""
+    return np.clip(dx * gain, -1, 1), np.clip(dy * gain, -1, 1)
+
+
+def policy_idle(obs, rng):
+    """Sit in the centre and hold the trigger"""
+    actions = np.zeros((len(obs), vec_env.ACTION_SIZE))
+    actions[:, 2] = 1
+    return actions
+
+
+def policy_random(obs, rng):
+    """Random thrust, fire and missiles"""
+    actions = rng.uniform(-1, 1, (len(obs), vec_env.ACTION_SIZE))
+    actions[:, 2:] = actions[:, 2:] > 0
+    return actions
+
+
+def policy_aim(obs, rng):
+    """Line up with the nearest enemy (or the boss) and keep firing"""
+    actions = np.zeros((len(obs), vec_env.ACTION_SIZE))
+    enemies = _entities(obs, 'enemies', vec_env.ENTITY_FEATURES)
+    boss = obs[:, SLICES['boss']]
+    target = np.where(enemies[:, 0, 0:1] > 0, enemies[:, 0, 1:3], boss[:, 1:3] * boss[:, 0:1])
+    actions[:, 0], actions[:, 1] = _steer_towards(target[:, 0], target[:, 1])
+    actions[:, 2] = 1
+    actions[:, 3] = (enemies[:, 0, 0] > 0) | (boss[:, 0] > 0)
+    return actions
+
+
+def policy_dodge(obs, rng):
+    """Aim like policy_aim, but veer away from close bullets and obstacles and towards pickups"""
+    actions = policy_aim(obs, rng)
+    thrust = actions[:, :2].copy()
+    bullets = _entities(obs, 'enemy_bullets', vec_env.BULLET_FEATURES)
+    obstacles = _entities(obs, 'obstacles', vec_env.ENTITY_FEATURES)
+    collectibles = _entities(obs, 'collectibles', vec_env.ENTITY_FEATURES)
+    for block, danger in ((bullets, 60.0), (obstacles, 120.0)):
+        present = block[..., 0] > 0
+        rel = block[..., 1:4] * vec_env.DEPTH_SCALE
+        close = present & (np.abs(rel[..., 2]) < danger) & (np.hypot(rel[..., 0], rel[..., 1]) < 25)
+        away = np.where(rel[..., :2] > 0, -1.0, 1.0) * close[..., None]  # Dead centre breaks to +x/+y
+        thrust += away.sum(axis=1) * 2
+    wanted = collectibles[:, 0, 0] > 0
+    pull_x, pull_y = _steer_towards(collectibles[:, 0, 1], collectibles[:, 0, 2])
+    thrust[:, 0] += wanted * pull_x * 0.5
+    thrust[:, 1] += wanted * pull_y * 0.5
+    actions[:, :2] = np.clip(thrust, -1, 1)
+    return actions
+
+
+POLICIES = {
+    'idle': policy_idle,
+    'random': policy_random,
+    'aim': policy_aim,
+    'dodge': policy_dodge,
+}
+
+
+# ============ OVERRIDES ============
+
+# Paths read once at import into derived tables; '*' matches any list index.
+# A path is frozen if it lies inside one of these or would replace one wholesale.
+FROZEN_OVERRIDES = {
+    ('COLLECTIBLE_TYPES',): "COLLECTIBLE_TYPE_INDEX and vec_env's COLLECTIBLE_* indices",
+    ('COLLECTIBLE_TYPE_INDEX',): "vec_env's COLLECTIBLE_* indices",
+    ('COLLECTIBLE_SPECS',): "COLLECTIBLE_SPEED, COLLECTIBLE_SCORE and the other per-index tables",
+    ('ENEMY_TYPES',): "ENEMY_TYPE_INDEX and vec_env.ENEMY_SHAPES",
+    ('HITBOX_SHAPES',): "HITBOXES, the ENEMY_BOUND_* tables and vec_env's capsule tables",
+    ('HITBOXES',): "the ENEMY_BOUND_* tables and vec_env's capsule tables",
+    ('LEVEL_DEFS', '*', 'obstacles', 'types'): "SNAPSHOT_OBSTACLE_TYPES and vec_env.OBSTACLE_SHAPES",
+}
+
+
+def frozen_reason(path):
+    """Why an override path can't take effect after import, or None if it can"""
+    for pattern, reason in FROZEN_OVERRIDES.items():
+        common = min(len(pattern), len(path))
+        if all(want in ('*', key) for want, key in zip(pattern[:common], path[:common])):
+            return reason
+    return None
+
+
+def parse_override(text):
+    """'DOTTED.PATH=VALUE' -> (path list, value)"""
+    path, _, raw = text.partition('=')
+    if not path or not raw:
+        raise ValueError(f"expected PATH=VALUE, got {text!r}")
+    reason = frozen_reason(path.split('.'))
+    if reason:
+        raise ValueError(f"can't override {path}: it is copied into {reason} at import")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = [json.loads(part) for part in raw.split(',')]
+    return path.split('.'), value
+
+
+def apply_overrides(overrides):
+    """Patch main.py globals (and the dicts/lists inside them) in this process"""
+    for path, value in overrides:
+        if len(path) == 1:
+            current = getattr(game, path[0])
+            if isinstance(current, np.ndarray):
+                value = np.array(value, dtype=current.dtype)
+            setattr(game, path[0], value)
+            continue
+        target = getattr(game, path[0])
+        for key in path[1:-1]:
+            target = target[int(key) if isinstance(target, list) else key]
+        last = path[-1]
+        target[int(last) if isinstance(target, list) else last] = value
+
+
+# ============ RUNS ============
+
+def task_key(task):
+    return f"{task['policy']}:{task['level']}:{task['seed']}"
+
+
+def play_task(task):
+    """Play one batch of games to completion; returns a list of per-game result dicts"""
+    started = time.perf_counter()
+    n = task['games']
+    env = vec_env.VecEnv(n, level=task['level'], seed=task['seed'])
+    rng = np.random.default_rng(task['seed'])
+    policy = POLICIES[task['policy']]
+    obs = env.reset()
+
+    finished = np.zeros(n, dtype=bool)
+    results = [None] * n
+    boss_seen = np.full(n, -1)
+    for tick in range(1, task['max_ticks'] + 1):
+        obs, reward, done, info = env.step(policy(obs, rng))
+        # Boss appears at the start of the tick it is spawned on
+        appeared = (boss_seen < 0) & (env.boss_spawned | (done & info['won'])) & ~finished
+        boss_seen[appeared] = tick
+        for i in np.flatnonzero(done & ~finished):
+            won = bool(info['won'][i])
+            results[i] = {
+                'score': int(info['score'][i]),
+                'ticks': tick,
+                'died': not won,
+                'death_tick': None if won else tick,
+                'level_reached': int(info['level'][i]) + 1,
+                'boss_kill_ticks': tick - int(boss_seen[i]) if won else None,
+            }
+        finished |= done
+        if finished.all():
+            break
+    for i in np.flatnonzero(~finished):
+        results[i] = {
+            'score': int(env.score[i]),
+            'ticks': task['max_ticks'],
+            'died': False,
+            'death_tick': None,
+            'level_reached': int(env.level[i]) + 1,
+            'boss_kill_ticks': None,
+        }
+    elapsed = time.perf_counter() - started
+    return [dict(result, task=task_key(task), config=task['config'], policy=task['policy'],
+                 level=task['level'], seed=task['seed'], game=i, seconds=round(elapsed, 3))
+            for i, result in enumerate(results)]
+
+
+def _init_worker(overrides):
+    apply_overrides(overrides)
+
+
+def load_results(path, config):
+    """Per-game results already in the file for this config, keyed by (task, game)"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'rb+') as f:
+        # Terminate a torn final line so appended rows start on their own line
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn final line from an interrupted write
+            if row.get('config') == config:
+                results[(row['task'], row['game'])] = row
+    return results
+
+
+def completed_tasks(results, games):
+    counts = {}
+    for task, _ in results:
+        counts[task] = counts.get(task, 0) + 1
+    return {task for task, count in counts.items() if count >= games}
+
+
+# ============ REPORT ============
+
+def summarize(rows):
+    """Aggregate per-game rows into one report entry"""
+    scores = np.array([row['score'] for row in rows])
+    deaths = [row['death_tick'] for row in rows if row['died']]
+    kills = [row['boss_kill_ticks'] for row in rows if row['boss_kill_ticks'] is not None]
+    levels = np.array([row['level_reached'] for row in rows])
+    return {
+        'games': len(rows),
+        'score_mean': float(scores.mean()),
+        'score_p10': float(np.percentile(scores, 10)),
+        'score_p50': float(np.percentile(scores, 50)),
+        'score_p90': float(np.percentile(scores, 90)),
+        'death_rate': len(deaths) / len(rows),
+        'time_to_death_s': float(np.median(deaths)) / TICKS_PER_SECOND if deaths else None,
+        'levels': {int(level): int(count) for level, count in zip(*np.unique(levels, return_counts=True))},
+        'boss_kill_rate': len(kills) / len(rows),
+        'boss_kill_s': float(np.median(kills)) / TICKS_PER_SECOND if kills else None,
+    }
+
+
+def build_report(results):
+    groups = {}
+    for row in results.values():
+        groups.setdefault((row['policy'], row['level']), []).append(row)
+    return {f"{policy} L{level + 1}": summarize(rows) for (policy, level), rows in sorted(groups.items())}
+
+
+def print_report(report):
+    print(f"{'policy':<12}{'games':>6}{'score p50':>11}{'p10-p90':>15}{'deaths':>8}{'ttd s':>7}"
+          f"{'boss':>6}{'kill s':>7}  levels reached")
+    for name, entry in report.items():
+        ttd = f"{entry['time_to_death_s']:.0f}" if entry['time_to_death_s'] is not None else '-'
+        kill = f"{entry['boss_kill_s']:.0f}" if entry['boss_kill_s'] is not None else '-'
+        levels = ' '.join(f"L{level}:{count}" for level, count in entry['levels'].items())
+        print(f"{name:<12}{entry['games']:>6}{entry['score_p50']:>11.0f}"
+              f"{entry['score_p10']:>7.0f}-{entry['score_p90']:<7.0f}{entry['death_rate']:>8.0%}{ttd:>7}"
+              f"{entry['boss_kill_rate']:>6.0%}{kill:>7}  {levels}")
+
+
+# ============ MAIN ============
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="tournament", description=__doc__.split('\n\n')[0])
+    parser.add_argument('--policies', default='aim,dodge', help="comma-separated: " + ", ".join(POLICIES))
+    parser.add_argument('--levels', default='1', help="comma-separated start levels (1-based)")
+    parser.add_argument('--seeds', type=int, default=16, help="seeds per policy and level")
+    parser.add_argument('--games', type=int, default=64, help="games per seed (one VecEnv batch)")
+    parser.add_argument('--max-ticks', type=int, default=game.TIMELINE_TICKS, help="tick limit per game")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--out', default='tournament.jsonl', help="per-game results (appended, used to resume)")
+    parser.add_argument('--report', help="also write the aggregated report as JSON")
+    parser.add_argument('--set', action='append', default=[], metavar='PATH=VALUE',
+                        help="override a main.py value, e.g. LEVEL_DEFS.0.score_to_advance=300")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    policies = args.policies.split(',')
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown:
+        sys.exit(f"unknown policies: {', '.join(unknown)}")
+    try:
+        overrides = [parse_override(text) for text in args.set]
+    except ValueError as error:
+        sys.exit(str(error))
+    levels = [int(level) - 1 for level in args.levels.split(',')]
+
+    # Results from other settings must not mix, so every row carries a hash of them
+    config = hashlib.sha1(json.dumps([args.set, args.games, args.max_ticks]).encode()).hexdigest()[:12]
+    results = load_results(args.out, config)
+    done = completed_tasks(results, args.games)
+    tasks = [{'policy': policy, 'level': level, 'seed': seed, 'games': args.games,
+              'max_ticks': args.max_ticks, 'config': config}
+             for policy in policies for level in levels for seed in range(args.seeds)]
+    pending = [task for task in tasks if task_key(task) not in done]
+    print(f"{len(tasks)} tasks ({len(tasks) - len(pending)} already done), {args.workers} workers")
+
+    # Warm the spawn timeline cache once so workers don't all build it
+    apply_overrides(overrides)
+    for level in range(len(game.LEVEL_DEFS)):
+        for variant in range(game.TIMELINE_VARIANTS):
+            game.load_spawn_timeline(level, variant)
+
+    started = time.perf_counter()
+    if pending:
+        with open(args.out, 'a') as out, \
+                multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(overrides,)) as pool:
+            for finished, rows in enumerate(pool.imap_unordered(play_task, pending), 1):
+                out.write(''.join(json.dumps(row) + '\n' for row in rows))
+                out.flush()
+                for row in rows:
+                    results[(row['task'], row['game'])] = row
+                print(f"[{finished}/{len(pending)}] {rows[0]['task']} "
+                      f"score p50 {np.median([row['score'] for row in rows]):.0f} "
+                      f"({time.perf_counter() - started:.1f}s)")
+
+    wanted = {task_key(task) for task in tasks}
+    report = build_report({key: row for key, row in results.items() if key[0] in wanted})
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
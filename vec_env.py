@@ -0,0 +1,795 @@
+"""Batched StratoQuest simulation for training and evaluating autopilot bots.
+
+VecEnv runs N independent games in lockstep. Every entity kind lives in
+fixed-capacity per-game slots (arrays shaped (n_envs, capacity, ...) plus an
+alive mask), and one step() advances all games with whole-array operations.
+The rules, constants, spawn timelines and hitboxes come from main.py, in the
+same order as update_game_logic; collisions within one step are resolved
+together rather than entity by entity. Nothing here needs a GL context.
+
+    env = VecEnv(1024, seed=1)
+    obs = env.reset()
+    obs, reward, done, info = env.step(actions)  # actions: (n_envs, ACTION_SIZE)
+
+Games that finish (player dead, boss defeated or max_steps reached) are reset
+inside step(); info reports their final score and outcome.
+"""
+import numpy as np
+
+import main as game
+
+# Actions: horizontal and vertical thrust in [-1, 1] (1 = one key press),
+# then fire and missile triggers (> 0.5 = pressed)
+ACTION_SIZE = 4
+
+# Observation layout: player state, then the nearest few of each entity kind
+# relative to the player, then the boss. Absent entities are all zeros.
+NEAREST_OBSTACLES = 4
+NEAREST_ENEMIES = 4
+NEAREST_ENEMY_BULLETS = 8
+NEAREST_COLLECTIBLES = 2
+PLAYER_FEATURES = 9
+ENTITY_FEATURES = 5   # present, dx, dy, dz, type
+BULLET_FEATURES = 4   # present, dx, dy, dz
+BOSS_FEATURES = 5     # present, dx, dy, dz, hp fraction
+OBSERVATION_SIZE = (PLAYER_FEATURES
+                    + (NEAREST_OBSTACLES + NEAREST_ENEMIES + NEAREST_COLLECTIBLES) * ENTITY_FEATURES
+                    + NEAREST_ENEMY_BULLETS * BULLET_FEATURES + BOSS_FEATURES)
+DEPTH_SCALE = 800.0   # Relative positions are divided by this
+
+
+def _observation_slices():
+    """Column ranges of each block in an observation row, in layout order"""
+    blocks = [('player', PLAYER_FEATURES),
+              ('obstacles', NEAREST_OBSTACLES * ENTITY_FEATURES),
+              ('enemies', NEAREST_ENEMIES * ENTITY_FEATURES),
+              ('collectibles', NEAREST_COLLECTIBLES * ENTITY_FEATURES),
+              ('enemy_bullets', NEAREST_ENEMY_BULLETS * BULLET_FEATURES),
+              ('boss', BOSS_FEATURES)]
+    slices = {}
+    start = 0
+    for name, width in blocks:
+        slices[name] = slice(start, start + width)
+        start += width
+    return slices
+
+
+OBSERVATION_SLICES = _observation_slices()
+
+HP_REWARD = 10.0      # Reward per HP gained (negative when hit), on top of score gained
+
+# Per-game slot counts; spawns past these are skipped like the entity budgets in main
+DEFAULT_CAPACITY = {
+    'obstacles': 64,
+    'enemies': 32,
+    'collectibles': 16,
+    'bullets': 16,
+    'missiles': 12,
+    'enemy_bullets': 512,
+}
+
+OBSTACLE_TYPES = tuple(sorted({name for level in game.LEVEL_DEFS for name in level['obstacles']['types']}))
+COLLECTIBLE_HEALTH, COLLECTIBLE_SHIELD, COLLECTIBLE_LASER, COLLECTIBLE_RING = (
+    game.COLLECTIBLE_TYPE_INDEX[name] for name in ('health', 'shield', 'laser', 'ring'))
+
+
+# ============ GEOMETRY ============
+
+def dot(u, v):
+    """Dot product over the last (xyz) axis"""
+    return u[..., 0] * v[..., 0] + u[..., 1] * v[..., 1] + u[..., 2] * v[..., 2]
+
+
+def point_segment_dist_sq(p, a, b):
+    """Squared distance from points p to segments ab, broadcast over leading axes"""
+    ab = b - a
+    ap = p - a
+    t = np.clip(dot(ap, ab) / np.maximum(dot(ab, ab), 1e-9), 0.0, 1.0)
+    d = ap - ab * t[..., None]
+    return dot(d, d)
+
+
+def segment_dist_sq(p0, p1, q0, q1):
+    """Squared distance between segments p0p1 and q0q1, broadcast over leading axes"""
+    eps = 1e-9
+    d1 = p1 - p0
+    d2 = q1 - q0
+    r = p0 - q0
+    a = dot(d1, d1)
+    e = dot(d2, d2)
+    b = dot(d1, d2)
+    c = dot(d1, r)
+    f = dot(d2, r)
+    safe_a = np.maximum(a, eps)
+    safe_e = np.maximum(e, eps)
+    denom = a * e - b * b
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.maximum(denom, eps), 0.0, 1.0), 0.0)
+    t = (b * s + f) / safe_e
+    s = np.where(t < 0, np.clip(-c / safe_a, 0.0, 1.0), np.where(t > 1, np.clip((b - c) / safe_a, 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+    # Degenerate segments: p is a point, or q is a point
+    point_p = a <= eps
+    point_q = e <= eps
+    s = np.where(point_p, 0.0, np.where(point_q, np.clip(-c / safe_a, 0.0, 1.0), s))
+    t = np.where(point_q, 0.0, np.where(point_p, np.clip(f / safe_e, 0.0, 1.0), t))
+    d = r + d1 * s[..., None] - d2 * t[..., None]
+    return dot(d, d)
+
+
+def capsule_table(names):
+    """Pad main.HITBOX_SHAPES into (types, shapes) capsule arrays; spheres become zero-length capsules"""
+    count = max(len(game.HITBOX_SHAPES[name]) for name in names)
+    a = np.zeros((len(names), count, 3))
+    b = np.zeros((len(names), count, 3))
+    radius = np.zeros((len(names), count))
+    valid = np.zeros((len(names), count), dtype=bool)
+    for i, name in enumerate(names):
+        for j, shape in enumerate(game.HITBOX_SHAPES[name]):
+            if shape[0] == 'sphere':
+                a[i, j] = b[i, j] = shape[1]
+                radius[i, j] = shape[2]
+            else:
+                a[i, j], b[i, j], radius[i, j] = shape[1], shape[2], shape[3]
+            valid[i, j] = True
+    bound_center = np.array([game.HITBOXES[name]['center'] for name in names])
+    bound_radius = np.array([game.HITBOXES[name]['radius'] for name in names])
+    return {'a': a, 'b': b, 'radius': radius, 'valid': valid,
+            'bound_center': bound_center, 'bound_radius': bound_radius}
+
+
+OBSTACLE_SHAPES = capsule_table(OBSTACLE_TYPES)
+ENEMY_SHAPES = capsule_table(game.ENEMY_TYPES)
+
+
+def shapes_hit(table, types, origins, p0, p1, probe_radius):
+    """Per-pair hitbox test: probe segments p0-p1 (..., 3) against typed hitboxes placed at origins"""
+    a = (p0 - origins)[..., None, :]
+    b = (p1 - origins)[..., None, :]
+    reach = table['radius'][types] + probe_radius[..., None]
+    dist_sq = segment_dist_sq(a, b, table['a'][types], table['b'][types])
+    return (table['valid'][types] & (dist_sq <= reach * reach)).any(axis=-1)
+
+
+def bound_candidates(pool, table, envs, p0, p1, probe_radius):
+    """(probe, slot) pairs where probe segments p0-p1 (one per entry of envs) touch a live entity's bounding sphere"""
+    probes, slots = np.nonzero(pool.alive[envs])
+    rows = envs[probes]
+    types = pool['type'][rows, slots]
+    centers = pool['pos'][rows, slots] + table['bound_center'][types]
+    reach = table['bound_radius'][types] + probe_radius[probes]
+    near = point_segment_dist_sq(centers, p0[probes], p1[probes]) <= reach * reach
+    return probes[near], slots[near]
+
+
+# ============ SLOT STORAGE ============
+
+class SlotPool:
+    """Fixed-capacity entity slots per game: columns shaped (n_envs, capacity[, width]) plus an alive mask"""
+
+    def __init__(self, n_envs, capacity, fields):
+        self.capacity = capacity
+        self.columns = {name: np.zeros((n_envs, capacity) if width == 1 else (n_envs, capacity, width), dtype=dtype)
+                        for name, (dtype, width) in fields.items()}
+        self.alive = np.zeros((n_envs, capacity), dtype=bool)
+        self.skipped = 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def spawn(self, envs, **values):
+        """Claim one free slot per entry of envs (repeats allowed); entries that don't fit are skipped"""
+        envs = np.asarray(envs, dtype=np.intp)
+        if len(envs) == 0:
+            return
+        # Rank of each entry among the entries for the same game
+        order = np.argsort(envs, kind='stable')
+        sorted_envs = envs[order]
+        rank = np.empty(len(envs), dtype=np.intp)
+        rank[order] = np.arange(len(envs)) - np.searchsorted(sorted_envs, sorted_envs, side='left')
+        # Free slots first in each game's row
+        games, inverse = np.unique(envs, return_inverse=True)
+        free_slots = np.argsort(self.alive[games], axis=1, kind='stable')
+        free_count = self.capacity - np.count_nonzero(self.alive[games], axis=1)
+        fits = rank < free_count[inverse]
+        self.skipped += len(envs) - int(np.count_nonzero(fits))
+        rows = envs[fits]
+        slots = free_slots[inverse[fits], rank[fits]]
+        self.alive[rows, slots] = True
+        for name, column in self.columns.items():
+            value = values.get(name, 0)
+            if isinstance(value, np.ndarray) and value.ndim == column.ndim - 1:
+                value = value[fits]  # One value per entry; anything else is broadcast
+            column[rows, slots] = value
+
+    def clear(self, envs):
+        self.alive[envs] = False
+
+
+# ============ ENVIRONMENT ============
+
+class VecEnv:
+    """N StratoQuest games advanced together by step(actions)"""
+
+    def __init__(self, n_envs, level=0, seed=None, max_steps=None, capacity=None):
+        self.n = n_envs
+        self.start_level = level
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        caps = dict(DEFAULT_CAPACITY, **(capacity or {}))
+        self._load_timelines()
+
+        n = n_envs
+        self.player = np.zeros((n, 3))   # x, y, z (z stays at main.player_z)
+        self.player[:, 2] = game.player_z
+        self.velocity = np.zeros((n, 2))
+        self.hp = np.zeros(n)
+        self.shield = np.zeros(n, dtype=bool)
+        self.laser_timer = np.zeros(n)
+        self.missile_cooldown = np.zeros(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.zeros(n, dtype=np.intp)
+        self.level_tick = np.zeros(n, dtype=np.intp)
+        self.cursor = np.zeros(n, dtype=np.intp)
+        self.cursor_start = np.zeros(n, dtype=np.intp)
+        self.cursor_end = np.zeros(n, dtype=np.intp)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.boss_active = np.zeros(n, dtype=bool)
+        self.boss_spawned = np.zeros(n, dtype=bool)
+        self.boss_pos = np.zeros((n, 3))
+        self.boss_hp = np.zeros(n)
+        self.boss_angle = np.zeros(n)
+        self.boss_timer = np.zeros(n, dtype=np.int64)
+        self.next_uid = 1
+
+        self.obstacles = SlotPool(n, caps['obstacles'], {'pos': (np.float64, 3), 'type': (np.intp, 1)})
+        self.enemies = SlotPool(n, caps['enemies'], {'pos': (np.float64, 3), 'type': (np.intp, 1),
+                                                     'hp': (np.int64, 1), 'uid': (np.int64, 1)})
+        self.collectibles = SlotPool(n, caps['collectibles'], {'pos': (np.float64, 3), 'type': (np.intp, 1)})
+        self.bullets = SlotPool(n, caps['bullets'], {'pos': (np.float64, 3), 'laser': (np.bool_, 1)})
+        self.missiles = SlotPool(n, caps['missiles'], {'pos': (np.float64, 3), 'vel': (np.float64, 3),
+                                                       'life': (np.int64, 1), 'target': (np.intp, 1),
+                                                       'target_uid': (np.int64, 1)})
+        self.enemy_bullets = SlotPool(n, caps['enemy_bullets'], {
+            'pos': (np.float64, 3), 'dir': (np.float64, 3), 'speed': (np.float64, 1),
+            'accel': (np.float64, 1), 'max_speed': (np.float64, 1), 'turn': (np.float64, 1)})
+        self.pools = [self.obstacles, self.enemies, self.collectibles, self.bullets,
+                      self.missiles, self.enemy_bullets]
+
+    def _load_timelines(self):
+        """Flatten every level's timeline variants into one event table with per-(level, variant) ranges"""
+        ticks, kinds, types, xs, ys = [], [], [], [], []
+        self.timeline_range = np.zeros((len(game.LEVEL_DEFS), game.TIMELINE_VARIANTS, 2), dtype=np.intp)
+        offset = 0
+        for level, level_def in enumerate(game.LEVEL_DEFS):
+            # Map the level's type indices onto the global type tables used here
+            type_maps = {
+                game.SPAWN_OBSTACLE: [OBSTACLE_TYPES.index(name) for name in level_def['obstacles']['types']],
+                game.SPAWN_ENEMY: [game.ENEMY_TYPE_INDEX[name] for name in level_def['enemies']['types']],
+                game.SPAWN_PICKUP: [game.COLLECTIBLE_TYPE_INDEX[name] for name in level_def['pickups']['types']],
+                game.SPAWN_RING: [COLLECTIBLE_RING],
+            }
+            for variant in range(game.TIMELINE_VARIANTS):
+                timeline = game.load_spawn_timeline(level, variant)
+                count = len(timeline['ticks'])
+                ticks.append(np.frombuffer(timeline['ticks'], dtype=np.uint32))
+                event_kinds = np.frombuffer(timeline['kinds'], dtype=np.uint8)
+                event_types = np.frombuffer(timeline['types'], dtype=np.uint8)
+                kinds.append(event_kinds)
+                types.append(np.array([type_maps[k][t] for k, t in zip(event_kinds, event_types)], dtype=np.intp))
+                xs.append(np.frombuffer(timeline['xs'], dtype=np.float32))
+                ys.append(np.frombuffer(timeline['ys'], dtype=np.float32))
+                self.timeline_range[level, variant] = (offset, offset + count)
+                offset += count
+        self.event_tick = np.concatenate(ticks).astype(np.int64)
+        self.event_kind = np.concatenate(kinds)
+        self.event_type = np.concatenate(types)
+        self.event_x = np.concatenate(xs).astype(np.float64)
+        self.event_y = np.concatenate(ys).astype(np.float64)
+
+    def _start_timeline(self, envs):
+        variants = self.rng.integers(game.TIMELINE_VARIANTS, size=len(envs))
+        ranges = self.timeline_range[self.level[envs], variants]
+        self.cursor_start[envs] = ranges[:, 0]
+        self.cursor[envs] = ranges[:, 0]
+        self.cursor_end[envs] = ranges[:, 1]
+        self.level_tick[envs] = 0
+
+    def _spawn_boss(self, envs):
+        self.boss_active[envs] = True
+        self.boss_spawned[envs] = True
+        self.boss_pos[envs] = (0, 20, game.BOSS_Z)
+        self.boss_hp[envs] = game.BOSS_HP
+        self.boss_angle[envs] = 0
+        self.boss_timer[envs] = 0
+
+    def reset(self, envs=None):
+        """Start new games (all of them, or the given indices / mask); returns observations"""
+        if envs is None:
+            envs = np.arange(self.n)
+        else:
+            envs = np.asarray(envs)
+            envs = np.flatnonzero(envs) if envs.dtype == bool else envs.astype(np.intp)
+        self.player[envs, :2] = 0
+        self.velocity[envs] = 0
+        self.hp[envs] = 100
+        self.shield[envs] = False
+        self.laser_timer[envs] = 0
+        self.missile_cooldown[envs] = 0
+        self.score[envs] = 0
+        self.level[envs] = self.start_level
+        self.steps[envs] = 0
+        self.boss_active[envs] = False
+        self.boss_spawned[envs] = False
+        for pool in self.pools:
+            pool.clear(envs)
+        self._start_timeline(envs)
+        boss_start = envs[self.level[envs] == game.BOSS_LEVEL]
+        self._spawn_boss(boss_start)
+        return self.observe()
+
+    # ---- step phases, in update_game_logic order ----
+
+    def _apply_actions(self, actions):
+        thrust = np.clip(actions[:, :2], -1.0, 1.0) * game.PLAYER_ACCEL
+        np.clip(self.velocity + thrust, -game.PLAYER_MAX_SPEED, game.PLAYER_MAX_SPEED, out=self.velocity)
+        envs = np.flatnonzero(actions[:, 2] > 0.5)
+        self.bullets.spawn(envs, pos=self.player[envs], laser=self.laser_timer[envs] > 0)
+        self._fire_missiles(np.flatnonzero((actions[:, 3] > 0.5) & (self.missile_cooldown <= 0)))
+
+    def _fire_missiles(self, envs):
+        self.missile_cooldown[envs] = game.MISSILE_COOLDOWN_MAX
+        barrage = np.repeat(envs, game.MISSILE_BARRAGE)
+        offsets = np.tile((np.arange(game.MISSILE_BARRAGE) - (game.MISSILE_BARRAGE - 1) / 2) * 5, len(envs))
+        pos = self.player[barrage].copy()
+        pos[:, 0] += offsets
+        self.missiles.spawn(barrage, pos=pos, vel=(0, 0, -1), life=game.MISSILE_LIFE, target=-1, target_uid=0)
+
+    def _progress_levels(self):
+        thresholds = np.array([d['score_to_advance'] if d['score_to_advance'] is not None else np.inf
+                               for d in game.LEVEL_DEFS])
+        up = np.flatnonzero(self.score >= thresholds[self.level])
+        if len(up):
+            self.level[up] += 1
+            self._start_timeline(up)
+            self._spawn_boss(up[self.level[up] == game.BOSS_LEVEL])
+
+    def _move_player(self):
+        self.player[:, :2] += self.velocity
+        self.velocity *= game.PLAYER_FRICTION
+        self.velocity[np.abs(self.velocity) < game.PLAYER_MIN_SPEED] = 0
+        bounds = np.array([game.player_bounds_x, game.player_bounds_y])
+        np.clip(self.player[:, :2], -bounds, bounds, out=self.player[:, :2])
+        self.velocity[np.abs(self.player[:, :2]) == bounds] = 0
+
+    def _run_timelines(self):
+        while True:
+            cursor = np.minimum(self.cursor, len(self.event_tick) - 1)
+            due = np.flatnonzero((self.cursor < self.cursor_end) & (self.event_tick[cursor] <= self.level_tick))
+            if len(due) == 0:
+                break
+            events = self.cursor[due]
+            kinds = self.event_kind[events]
+            pos = np.stack([self.event_x[events], self.event_y[events], np.zeros(len(events))], axis=1)
+            types = self.event_type[events]
+            for kind, pool, spawn_z in ((game.SPAWN_OBSTACLE, self.obstacles, game.OBSTACLE_SPAWN_Z),
+                                        (game.SPAWN_ENEMY, self.enemies, game.ENEMY_SPAWN_Z),
+                                        (game.SPAWN_PICKUP, self.collectibles, game.COLLECTIBLE_SPAWN_Z),
+                                        (game.SPAWN_RING, self.collectibles, game.COLLECTIBLE_SPAWN_Z)):
+                picked = kinds == kind
+                if not picked.any():
+                    continue
+                where = pos[picked]
+                where[:, 2] = spawn_z
+                if kind == game.SPAWN_OBSTACLE:
+                    where[:, 1] = -100
+                extra = {}
+                if kind == game.SPAWN_ENEMY:
+                    extra['hp'] = game.ENEMY_HP[types[picked]]
+                    extra['uid'] = self.next_uid + np.arange(len(where))
+                    self.next_uid += len(where)
+                pool.spawn(due[picked], pos=where, type=types[picked], **extra)
+            self.cursor[due] += 1
+        self.level_tick += 1
+        wrapped = self.level_tick >= game.TIMELINE_TICKS
+        self.level_tick[wrapped] = 0
+        self.cursor[wrapped] = self.cursor_start[wrapped]
+
+    def _damage_player(self, hits, amount):
+        """Apply per-game hit counts; a shield absorbs the first hit"""
+        absorbed = self.shield & (hits > 0)
+        self.shield[absorbed] = False
+        self.hp -= (hits - absorbed) * amount
+
+    def _player_collisions(self, pool, table, radius):
+        """Kill entities of a pool that the player flew into; returns per-game hit counts"""
+        alive = pool.alive
+        pos = pool['pos']
+        types = pool['type']
+        probe = self.player[:, None, :]
+        reach = (np.abs(table['bound_center'][:, 2]) + table['bound_radius']).max() + radius
+        near = alive & (np.abs(pos[..., 2] - self.player[:, None, 2]) <= reach)
+        envs, slots = np.nonzero(near)
+        if len(envs) == 0:
+            return np.zeros(self.n, dtype=np.int64)
+        point = self.player[envs]
+        hit = shapes_hit(table, types[envs, slots], pos[envs, slots], point, point, np.full(len(envs), radius))
+        alive[envs[hit], slots[hit]] = False
+        return np.bincount(envs[hit], minlength=self.n)
+
+    def _update_obstacles(self):
+        pos = self.obstacles['pos']
+        pos[..., 2] += game.OBSTACLE_SPEED
+        self.obstacles.alive &= pos[..., 2] <= game.OBSTACLE_DESPAWN_Z
+        hits = self._player_collisions(self.obstacles, OBSTACLE_SHAPES, game.PLAYER_HIT_RADIUS)
+        self._damage_player(hits, game.COLLISION_DAMAGE)
+
+    def _update_collectibles(self):
+        self.laser_timer = np.maximum(self.laser_timer - game.TICK_SECONDS, 0.0)
+        pool = self.collectibles
+        pos = pool['pos']
+        types = pool['type']
+        pos[..., 2] += game.COLLECTIBLE_SPEED[types]
+        offset = pos - self.player[:, None, :]
+        collected = pool.alive & (dot(offset, offset) < game.COLLECTIBLE_RADIUS_SQ[types])
+        pool.alive &= ~collected & (pos[..., 2] < 50)
+        if not collected.any():
+            return
+        counts = np.stack([np.count_nonzero(collected & (types == t), axis=1)
+                           for t in range(len(game.COLLECTIBLE_TYPES))], axis=1)
+        self.score += counts @ game.COLLECTIBLE_SCORE
+        self.hp = np.where(counts[:, COLLECTIBLE_HEALTH] > 0,
+                           np.minimum(100, self.hp + game.HEALTH_PICKUP_HP * counts[:, COLLECTIBLE_HEALTH]), self.hp)
+        self.shield |= counts[:, COLLECTIBLE_SHIELD] > 0
+        self.laser_timer[counts[:, COLLECTIBLE_LASER] > 0] = game.LASER_DURATION
+
+    def _kill_enemies(self, envs, slots):
+        """Deactivate enemies whose HP ran out and award their points"""
+        # Several shots can finish the same enemy in one step; score each (env, slot) once
+        flat = np.unique(envs * self.enemies.capacity + slots)
+        envs, slots = np.divmod(flat, self.enemies.capacity)
+        dead = self.enemies.alive[envs, slots] & (self.enemies['hp'][envs, slots] <= 0)
+        envs, slots = envs[dead], slots[dead]
+        self.enemies.alive[envs, slots] = False
+        np.add.at(self.score, envs, game.ENEMY_POINTS[self.enemies['type'][envs, slots]])
+
+    def _bullet_probes(self, envs, slots):
+        """Swept segments and radii for the given bullets, as bullet_probe in main"""
+        laser = self.bullets['laser'][envs, slots]
+        p0 = self.bullets['pos'][envs, slots]
+        p1 = p0.copy()
+        p1[..., 2] -= np.where(laser, game.BULLET_SPEED * 40, game.BULLET_SPEED * 20)
+        radius = np.where(laser, game.LASER_HIT_RADIUS, game.BULLET_HIT_RADIUS).astype(np.float64)
+        return p0, p1, radius
+
+    def _update_enemies(self):
+        pool = self.enemies
+        pos = pool['pos']
+        types = pool['type']
+
+        # Movement and tracking by type
+        pos[..., 2] += game.ENEMY_SPEED[types]
+        tracking = game.ENEMY_TRACKING[types]
+        pos[..., :2] += (self.player[:, None, :2] - pos[..., :2]) * tracking[..., None]
+
+        # Shooting: one RNG draw for every slot
+        shooters = pool.alive & (pos[..., 2] > game.ENEMY_FIRE_Z) & (self.rng.random(pool.alive.shape) < game.ENEMY_FIRE_CHANCE)
+        envs, slots = np.nonzero(shooters)
+        if len(envs):
+            origins = pos[envs, slots]
+            self._emit_enemy_bullets(envs, origins, self.player[envs] - origins)
+
+        # Collision with Player
+        hits = self._player_collisions(pool, ENEMY_SHAPES, game.PLAYER_HIT_RADIUS)
+        self._damage_player(hits, game.COLLISION_DAMAGE)
+
+        # Collision with Bullets: bounding spheres for each live bullet, exact shapes for candidates
+        bullet_envs, bullet_slots = np.nonzero(self.bullets.alive)
+        if len(bullet_envs):
+            p0, p1, radius = self._bullet_probes(bullet_envs, bullet_slots)
+            probes, enemy_slots = bound_candidates(pool, ENEMY_SHAPES, bullet_envs, p0, p1, radius)
+            envs = bullet_envs[probes]
+            hit = shapes_hit(ENEMY_SHAPES, types[envs, enemy_slots], pos[envs, enemy_slots],
+                             p0[probes], p1[probes], radius[probes])
+            probes, envs, enemy_slots = probes[hit], envs[hit], enemy_slots[hit]
+            laser = self.bullets['laser'][envs, bullet_slots[probes]]
+            # A normal bullet stops at the first enemy it hits; lasers pierce
+            first = np.ones(len(probes), dtype=bool)
+            first[1:] = probes[1:] != probes[:-1]
+            keep = laser | first
+            probes, envs, enemy_slots, laser = probes[keep], envs[keep], enemy_slots[keep], laser[keep]
+            damage = np.where(laser, game.BULLET_DAMAGE['laser'], game.BULLET_DAMAGE['normal'])
+            np.subtract.at(pool['hp'], (envs, enemy_slots), damage)
+            self.bullets.alive[envs[~laser], bullet_slots[probes[~laser]]] = False
+            self._kill_enemies(envs, enemy_slots)
+
+        pool.alive &= pos[..., 2] < 50
+
+    def _emit_enemy_bullets(self, envs, origins, dirs, speed=None, accel=0.0, max_speed=None, turn=0.0):
+        # Read at call time so tournament --set overrides of ENEMY_BULLET_SPEED apply
+        speed = game.ENEMY_BULLET_SPEED if speed is None else speed
+        max_speed = game.ENEMY_BULLET_SPEED if max_speed is None else max_speed
+        norms = np.linalg.norm(dirs, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.enemy_bullets.spawn(envs, pos=origins, dir=dirs / norms, speed=speed, accel=accel,
+                                 max_speed=max_speed, turn=turn)
+
+    def _update_enemy_bullets(self):
+        pool = self.enemy_bullets
+        envs, slots = np.nonzero(pool.alive)
+        if len(envs) == 0:
+            return
+        pos = pool['pos'][envs, slots]
+        dirs = pool['dir'][envs, slots]
+        speed = np.minimum(pool['speed'][envs, slots] + pool['accel'][envs, slots], pool['max_speed'][envs, slots])
+        turn = pool['turn'][envs, slots]
+        turning = turn != 0
+        if turning.any():
+            c = np.cos(turn[turning])
+            s = np.sin(turn[turning])
+            dx = dirs[turning, 0]
+            dy = dirs[turning, 1]
+            dirs[turning, 0] = dx * c - dy * s
+            dirs[turning, 1] = dx * s + dy * c
+            pool['dir'][envs, slots] = dirs
+        pos += dirs * speed[:, None]
+        pool['pos'][envs, slots] = pos
+        pool['speed'][envs, slots] = speed
+
+        offset = pos - self.player[envs]
+        hits = dot(offset, offset) < game.ENEMY_BULLET_HIT_RADIUS ** 2
+        self._damage_player(np.bincount(envs[hits], minlength=self.n), game.ENEMY_BULLET_DAMAGE)
+        z = pos[:, 2]
+        pool.alive[envs, slots] = (~hits & (z < 50) & (z > -1200) &
+                                   (np.abs(pos[:, 0]) < 400) & (np.abs(pos[:, 1]) < 400))
+
+    def _boss_patterns(self, envs, count, aim_offsets, **curve):
+        """Emit count bullets per boss in envs, aimed at the player plus per-bullet offsets (count, 2)"""
+        if len(envs) == 0:
+            return
+        origins = np.repeat(self.boss_pos[envs], count, axis=0)
+        dirs = np.repeat(self.player[envs] - self.boss_pos[envs], count, axis=0)
+        dirs[:, :2] += np.tile(aim_offsets, (len(envs), 1))
+        self._emit_enemy_bullets(np.repeat(envs, count), origins, dirs, **curve)
+
+    def _update_boss(self):
+        envs = np.flatnonzero(self.boss_active)
+        if len(envs) == 0:
+            return
+        self.boss_angle[envs] += 0.02
+        angle = self.boss_angle[envs]
+        self.boss_pos[envs, 0] = np.sin(angle) * 80
+        self.boss_pos[envs, 1] = np.cos(angle * 2) * 30 + 10
+        self.boss_timer[envs] += 1
+        timer = self.boss_timer[envs]
+        hp_pct = self.boss_hp[envs] / game.BOSS_HP
+        phase = np.where(hp_pct > 0.66, 0, np.where(hp_pct > 0.33, 1, 2))
+
+        def fan(count, spread):
+            offsets = np.zeros((count, 2))
+            offsets[:, 0] = np.linspace(-spread / 2, spread / 2, count) if count > 1 else 0
+            return offsets
+
+        def ring(picked, count, radius):
+            angles = self.boss_angle[picked][:, None] + np.arange(count) * (2 * np.pi / count)
+            return np.stack([np.cos(angles) * radius, np.sin(angles) * radius], axis=-1).reshape(-1, 2)
+
+        def ring_batch(picked, count, radius):
+            if len(picked) == 0:
+                return
+            origins = np.repeat(self.boss_pos[picked], count, axis=0)
+            dirs = np.repeat(self.player[picked] - self.boss_pos[picked], count, axis=0)
+            dirs[:, :2] += ring(picked, count, radius)
+            self._emit_enemy_bullets(np.repeat(picked, count), origins, dirs)
+
+        self._boss_patterns(envs[(phase == 0) & (timer % 60 == 0)], 3, fan(3, 80))
+        self._boss_patterns(envs[(phase == 1) & (timer % 45 == 0)], 7, fan(7, 180))
+        ring_batch(envs[(phase == 1) & (timer % 90 == 0)], 24, 60)
+        spiral = envs[(phase == 2) & (timer % 3 == 0)]
+        if len(spiral):
+            arms = 8
+            angles = (self.boss_timer[spiral] * 0.07)[:, None] + np.arange(arms) * (2 * np.pi / arms)
+            dirs = np.stack([np.cos(angles) * 0.6, np.sin(angles) * 0.6, np.ones_like(angles)], axis=-1)
+            self._emit_enemy_bullets(np.repeat(spiral, arms), np.repeat(self.boss_pos[spiral], arms, axis=0),
+                                     dirs.reshape(-1, 3), speed=1.0, accel=0.02,
+                                     max_speed=game.ENEMY_BULLET_SPEED, turn=0.01)
+        volley = envs[(phase == 2) & (timer % 60 == 0)]
+        self._boss_patterns(volley, 5, fan(5, 120))
+        ring_batch(volley, 36, 45)
+
+        # Boss hitbox: body sphere plus eight spinning spikes, per game
+        spin = np.radians(np.arange(8) * 45 + timer[:, None])
+        rim = np.stack([np.cos(spin), np.sin(spin), np.zeros_like(spin)], axis=-1)
+        a = np.concatenate([np.zeros((len(envs), 1, 3)), rim * game.BOSS_BODY_RADIUS], axis=1)
+        b = np.concatenate([np.zeros((len(envs), 1, 3)), rim * (game.BOSS_BODY_RADIUS + game.BOSS_SPIKE_LENGTH)], axis=1)
+        shape_radius = np.array([game.BOSS_BODY_RADIUS] + [game.BOSS_SPIKE_RADIUS] * 8, dtype=np.float64)
+        origin = self.boss_pos[envs][:, None, None, :]
+
+        def boss_hits(p0, p1, radius):
+            """(len(envs), probes) mask of probes touching each boss"""
+            reach = shape_radius + radius[..., None]
+            dist_sq = segment_dist_sq((p0[:, :, None, :] - origin), (p1[:, :, None, :] - origin),
+                                      a[:, None], b[:, None])
+            return (dist_sq <= reach * reach).any(axis=-1)
+
+        # Player bullets
+        every = np.broadcast_to(np.arange(self.bullets.capacity), (len(envs), self.bullets.capacity))
+        p0, p1, radius = self._bullet_probes(envs[:, None], every)
+        hits = boss_hits(p0, p1, radius) & self.bullets.alive[envs]
+        laser = self.bullets['laser'][envs]
+        damage = (np.count_nonzero(hits & laser, axis=1) * game.BOSS_BULLET_DAMAGE['laser']
+                  + np.count_nonzero(hits & ~laser, axis=1) * game.BOSS_BULLET_DAMAGE['normal'])
+        self.bullets.alive[envs] &= ~(hits & ~laser)
+
+        # Missiles
+        m_pos = self.missiles['pos'][envs]
+        m_radius = np.full(m_pos.shape[:2], float(game.MISSILE_HIT_RADIUS))
+        m_hits = boss_hits(m_pos, m_pos, m_radius) & self.missiles.alive[envs]
+        damage = damage + np.count_nonzero(m_hits, axis=1) * game.MISSILE_BOSS_DAMAGE
+        self.missiles.alive[envs] &= ~m_hits
+
+        self.boss_hp[envs] -= damage
+        killed = envs[self.boss_hp[envs] <= 0]
+        self.boss_active[killed] = False
+        self.score[killed] += game.BOSS_POINTS
+
+    def _update_bullets(self):
+        pos = self.bullets['pos']
+        pos[..., 2] -= game.BULLET_SPEED * 20
+        self.bullets.alive &= pos[..., 2] > game.BULLET_MAX_DIST
+
+    def _update_missiles(self):
+        self.missile_cooldown = np.maximum(self.missile_cooldown - game.TICK_SECONDS, 0.0)
+        pool = self.missiles
+        if not pool.alive.any():
+            return
+        envs, slots = np.nonzero(pool.alive)
+        pool['life'][envs, slots] -= 1
+        pos = pool['pos'][envs, slots]
+        vel = pool['vel'][envs, slots]
+        pos[:, 2] -= game.MISSILE_SPEED
+
+        # Targets: keep a live one, otherwise the nearest enemy in front
+        enemies = self.enemies
+        target = pool['target'][envs, slots]
+        target_slot = np.maximum(target, 0)
+        still_valid = ((target >= 0) & enemies.alive[envs, target_slot]
+                       & (enemies['uid'][envs, target_slot] == pool['target_uid'][envs, slots]))
+        probes, enemy_slots = np.nonzero(enemies.alive[envs] & ~still_valid[:, None])
+        offset = enemies['pos'][envs[probes], enemy_slots] - pos[probes]
+        dist_sq = dot(offset, offset)
+        eligible = (offset[:, 2] < 0) & (dist_sq < 9999 ** 2)
+        probes, enemy_slots, dist_sq = probes[eligible], enemy_slots[eligible], dist_sq[eligible]
+        order = np.lexsort((dist_sq, probes))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = probes[order][1:] != probes[order][:-1]
+        nearest = np.full(len(envs), -1)
+        nearest[probes[order][first]] = enemy_slots[order][first]
+        target = np.where(still_valid, target, nearest)
+        pool['target'][envs, slots] = target
+        pool['target_uid'][envs, slots] = np.where(target >= 0, enemies['uid'][envs, np.maximum(target, 0)], 0)
+
+        # Homing
+        aim = enemies['pos'][envs, np.maximum(target, 0)] - pos
+        mag = np.sqrt(dot(aim, aim))[:, None]
+        steer = (target >= 0)[:, None] & (mag > 0)
+        aim = aim / np.where(mag > 0, mag, 1.0)
+        vel = np.where(steer, vel * (1 - game.MISSILE_STEER) + aim * game.MISSILE_STEER, vel)
+        pos += vel * game.MISSILE_SPEED
+        pool['pos'][envs, slots] = pos
+        pool['vel'][envs, slots] = vel
+
+        # Collision with Enemies (first enemy hit per missile)
+        radius = np.full(len(envs), float(game.MISSILE_HIT_RADIUS))
+        probes, enemy_slots = bound_candidates(enemies, ENEMY_SHAPES, envs, pos, pos, radius)
+        if len(probes):
+            hit_envs = envs[probes]
+            hit = shapes_hit(ENEMY_SHAPES, enemies['type'][hit_envs, enemy_slots], enemies['pos'][hit_envs, enemy_slots],
+                             pos[probes], pos[probes], radius[probes])
+            probes, enemy_slots = probes[hit], enemy_slots[hit]
+            first = np.ones(len(probes), dtype=bool)
+            first[1:] = probes[1:] != probes[:-1]
+            probes, enemy_slots = probes[first], enemy_slots[first]
+            hit_envs = envs[probes]
+            np.subtract.at(enemies['hp'], (hit_envs, enemy_slots), game.MISSILE_DAMAGE)
+            pool.alive[hit_envs, slots[probes]] = False
+            self._kill_enemies(hit_envs, enemy_slots)
+
+        pool.alive[envs, slots] &= (pool['life'][envs, slots] > 0) & (pos[:, 2] > game.BULLET_MAX_DIST)
+
+    def step(self, actions):
+        """Advance every game one tick; returns (observations, rewards, dones, info)"""
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.n, ACTION_SIZE)
+        score_before = self.score.copy()
+        hp_before = self.hp.copy()
+
+        self._apply_actions(actions)
+        self._progress_levels()
+        self._move_player()
+        self._run_timelines()
+        self._update_obstacles()
+        self._update_collectibles()
+        self._update_enemies()
+        self._update_enemy_bullets()
+        self._update_boss()
+        self._update_bullets()
+        self._update_missiles()
+        self.steps += 1
+
+        reward = (self.score - score_before) + (self.hp - hp_before) * HP_REWARD
+        dead = self.hp <= 0
+        won = self.boss_spawned & ~self.boss_active & ~dead
+        done = dead | won
+        if self.max_steps is not None:
+            done |= self.steps >= self.max_steps
+        info = {'score': self.score.copy(), 'won': won, 'level': self.level.copy(), 'steps': self.steps.copy()}
+        if done.any():
+            self.reset(done)
+        return self.observe(), reward, done, info
+
+    # ---- observations ----
+
+    def _nearest(self, pool, count, with_type):
+        """Features of the nearest `count` live entities of a pool, (n_envs, count, features)"""
+        offset = pool['pos'] - self.player[:, None, :]
+        dist_sq = np.where(pool.alive, dot(offset, offset), np.inf)
+        count = min(count, pool.capacity)
+        picked = np.argpartition(dist_sq, count - 1, axis=1)[:, :count] if count < pool.capacity else \
+            np.broadcast_to(np.arange(pool.capacity), dist_sq.shape)
+        order = np.argsort(np.take_along_axis(dist_sq, picked, axis=1), axis=1)
+        picked = np.take_along_axis(picked, order, axis=1)
+        present = np.take_along_axis(pool.alive, picked, axis=1)
+        rel = np.take_along_axis(offset, picked[..., None], axis=1) / DEPTH_SCALE
+        features = [present[..., None], rel]
+        if with_type:
+            features.append(np.take_along_axis(pool['type'], picked, axis=1)[..., None])
+        return np.where(present[..., None], np.concatenate(features, axis=-1), 0.0)
+
+    def observe(self):
+        """(n_envs, OBSERVATION_SIZE) float32 observations"""
+        player = np.stack([
+            self.player[:, 0] / game.player_bounds_x,
+            self.player[:, 1] / game.player_bounds_y,
+            self.velocity[:, 0] / game.PLAYER_MAX_SPEED,
+            self.velocity[:, 1] / game.PLAYER_MAX_SPEED,
+            self.hp / 100.0,
+            self.shield,
+            self.laser_timer / game.LASER_DURATION,
+            self.missile_cooldown / game.MISSILE_COOLDOWN_MAX,
+            self.level / (len(game.LEVEL_DEFS) - 1),
+        ], axis=1)
+        boss = np.concatenate([
+            self.boss_active[:, None],
+            (self.boss_pos - self.player) / DEPTH_SCALE,
+            (self.boss_hp / game.BOSS_HP)[:, None],
+        ], axis=1) * self.boss_active[:, None]
+        parts = [
+            player,
+            self._nearest(self.obstacles, NEAREST_OBSTACLES, True).reshape(self.n, -1),
+            self._nearest(self.enemies, NEAREST_ENEMIES, True).reshape(self.n, -1),
+            self._nearest(self.collectibles, NEAREST_COLLECTIBLES, True).reshape(self.n, -1),
+            self._nearest(self.enemy_bullets, NEAREST_ENEMY_BULLETS, False).reshape(self.n, -1),
+            boss,
+        ]
+        return np.concatenate(parts, axis=1).astype(np.float32)
+
+
+# ============ SELF CHECK ============
+
+def self_check():
+    """Rule checks that need no GL context; raises AssertionError on a mismatch"""
+    # Two bullets converging on one 'fast' (1 hp) enemy score the kill once, as update_enemies does
+    env = VecEnv(1, seed=0)
+    env.reset()
+    for pool in env.pools:
+        pool.clear([0])
+    fast = game.ENEMY_TYPE_INDEX['fast']
+    env.enemies.spawn([0], pos=np.array([[0.0, 0.0, -30.0]]), type=fast, hp=game.ENEMY_HP[fast], uid=1)
+    env.bullets.spawn([0, 0], pos=np.array([[0.0, 0.0, -30.0], [0.2, 0.0, -30.0]]), laser=False)
+    env._update_enemies()
+    assert not env.enemies.alive.any(), "enemy survived two bullets"
+    assert env.score[0] == game.ENEMY_POINTS[fast], f"kill scored {env.score[0]}, expected {game.ENEMY_POINTS[fast]}"
+    print("vec_env self check passed")
+
+
+if __name__ == "__main__":
+    self_check()